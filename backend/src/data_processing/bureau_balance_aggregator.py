@@ -0,0 +1,199 @@
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from backend.src.data_processing.clustered_table import ClusteredTable
+from backend.src.data_processing.partial_aggregator import PartialAggregator
+from backend.src.data_processing.table_schema import TableSchema
+
+
+class BureauBalanceAggregator:
+    """
+    Two-level aggregation of bureau_balance, the monthly status of each bureau credit.
+
+    bureau_balance is only linked to the applications through bureau, by SK_ID_BUREAU. It is first reduced per
+    SK_ID_BUREAU chunk by chunk, keeping only the credits of the sampled applications, then joined to bureau and
+    rolled up per SK_ID_CURR. Only one chunk and one row per credit are held in memory, never the whole table.
+    """
+
+    ID_COLUMN = 'SK_ID_BUREAU'
+    GROUPBY_COLUMN = 'SK_ID_CURR'
+    COLUMNS = ['SK_ID_BUREAU', 'MONTHS_BALANCE', 'STATUS']
+
+    # C is closed and X unknown, the other statuses are the days past due bucket of the month
+    STATUS_VALUES = ['C', 'X', '0', '1', '2', '3', '4', '5']
+    DPD_BY_STATUS = {'0': 0, '1': 1, '2': 2, '3': 3, '4': 4, '5': 5}
+
+    # Aggregations per credit. They can be computed on each chunk and combined, see COMBINE_FUNCTIONS
+    BALANCE_AGGREGATIONS = {
+        'MONTHS_BALANCE': ['min', 'max', 'size'],
+        'DPD': ['max'],
+    }
+    COMBINE_FUNCTIONS = PartialAggregator.MERGE_FUNCTIONS
+
+    # Aggregations per application of the per credit data. The STATUS counts are summed.
+    BUREAU_AGGREGATIONS = {
+        'MONTHS_BALANCE_min': ['min'],
+        'MONTHS_BALANCE_max': ['max'],
+        'MONTHS_BALANCE_size': ['mean', 'sum'],
+        'DPD_max': ['max', 'mean'],
+    }
+
+    def __init__(self, chunk_size: int) -> None:
+        """
+        Initializes a new instance of the BureauBalanceAggregator class.
+
+        Parameters:
+        chunk_size (int): The number of rows of bureau_balance read at once.
+        """
+        self.chunk_size = chunk_size
+
+    def read_chunks(self, files_path: str, file_name: str, bureau_ids = None) -> Iterator[pd.DataFrame]:
+        """
+        Read bureau_balance chunk by chunk, from its clustered or columnar copy if it is up to date or from the CSV file.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of bureau_balance.
+        bureau_ids: If set, the chunks may be restricted to the rows of these SK_ID_BUREAU, when the clustered copy is read.
+            The chunks of the other copies hold every row.
+
+        Returns:
+        Iterator[pd.DataFrame]: The chunks of the table.
+        """
+        columnar_path = TableSchema.get_columnar_path(files_path, file_name)
+        clustered_path = None if bureau_ids is None else ClusteredTable.get_clustered_path(files_path, file_name)
+
+        if clustered_path is not None:
+            yield from ClusteredTable(clustered_path).iter_batches(bureau_ids, self.COLUMNS)
+        elif columnar_path is None:
+            yield from pd.read_csv(f"{files_path}/{file_name}", usecols=self.COLUMNS, dtype={'STATUS': 'str'}, chunksize=self.chunk_size)
+        else:
+            for batch in pq.ParquetFile(columnar_path).iter_batches(batch_size=self.chunk_size, columns=self.COLUMNS):
+                yield batch.to_pandas()
+
+    def get_empty_balance(self) -> pd.DataFrame:
+        """
+        Get the aggregates of no credit.
+
+        Returns:
+        pd.DataFrame: An empty DataFrame with the columns of the aggregates, indexed by SK_ID_BUREAU.
+        """
+        columns = [f"{column}_{function}" for column, functions in self.BALANCE_AGGREGATIONS.items() for function in functions]
+        columns += [f"STATUS_{value}_sum" for value in self.STATUS_VALUES]
+
+        return pd.DataFrame(columns=columns, index=pd.Index([], name=self.ID_COLUMN), dtype='float64')
+
+    def reduce_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregate a chunk of bureau_balance per credit.
+
+        Parameters:
+        chunk (pd.DataFrame): The chunk.
+
+        Returns:
+        pd.DataFrame: The partial aggregates and STATUS counts of each credit of the chunk, indexed by SK_ID_BUREAU.
+        """
+        if chunk.empty:
+            return self.get_empty_balance()
+
+        status = pd.Categorical(chunk['STATUS'].astype('str'), categories=self.STATUS_VALUES)
+        dpd = pd.Series(status).map(self.DPD_BY_STATUS).astype('float64')
+        chunk = pd.DataFrame({
+            self.ID_COLUMN: chunk[self.ID_COLUMN].to_numpy(),
+            'MONTHS_BALANCE': chunk['MONTHS_BALANCE'].to_numpy(),
+            'DPD': dpd.to_numpy(),
+        })
+
+        partial = chunk.groupby(self.ID_COLUMN).agg(self.BALANCE_AGGREGATIONS)
+        partial.columns = ['_'.join(column) for column in partial.columns]
+
+        status_counts = pd.crosstab(chunk[self.ID_COLUMN], status, dropna=False)
+        status_counts = status_counts.reindex(index=partial.index, columns=self.STATUS_VALUES, fill_value=0)
+        status_counts.columns = [f"STATUS_{value}_sum" for value in self.STATUS_VALUES]
+
+        return pd.concat([partial, status_counts], axis=1)
+
+    def combine(self, partials: list) -> pd.DataFrame:
+        """
+        Combine partial aggregates of the same credits.
+
+        Parameters:
+        partials (list): The partial aggregates, indexed by SK_ID_BUREAU.
+
+        Returns:
+        pd.DataFrame: The combined aggregates, one row per credit.
+        """
+        data = pd.concat(partials)
+        if data.index.is_unique:
+            return data
+
+        combine_functions = {column: self.COMBINE_FUNCTIONS[column.rsplit('_', 1)[1]] for column in data.columns}
+
+        return data.groupby(level=0).agg(combine_functions)
+
+    def aggregate_balance(self, files_path: str, file_name: str, bureau_ids) -> pd.DataFrame:
+        """
+        Aggregate bureau_balance per credit, reading it chunk by chunk.
+
+        The partial aggregates of the chunks are combined whenever they outgrow the combined ones, so the memory used
+        is bounded by the number of credits kept rather than by the size of the table.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of bureau_balance.
+        bureau_ids: The SK_ID_BUREAU of the credits to aggregate.
+
+        Returns:
+        pd.DataFrame: The aggregates of each credit, indexed by SK_ID_BUREAU.
+        """
+        bureau_ids = pd.Index(pd.unique(np.asarray(bureau_ids)))
+
+        combined = None
+        partials = []
+        partial_rows = 0
+        for chunk in self.read_chunks(files_path, file_name, bureau_ids):
+            chunk = chunk[chunk[self.ID_COLUMN].isin(bureau_ids)]
+            if chunk.empty:
+                continue
+
+            partial = self.reduce_chunk(chunk)
+            partials.append(partial)
+            partial_rows += len(partial)
+
+            if partial_rows > max(self.chunk_size, 0 if combined is None else len(combined)):
+                combined = self.combine(partials if combined is None else [combined] + partials)
+                partials = []
+                partial_rows = 0
+
+        if partials:
+            combined = self.combine(partials if combined is None else [combined] + partials)
+
+        if combined is None:
+            return self.get_empty_balance()
+
+        return combined
+
+    def aggregate(self, bureau_data: pd.DataFrame, balance_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Roll the per credit aggregates of bureau_balance up per application.
+
+        Parameters:
+        bureau_data (pd.DataFrame): The SK_ID_CURR and SK_ID_BUREAU columns of bureau.
+        balance_data (pd.DataFrame): The aggregates of each credit, indexed by SK_ID_BUREAU.
+
+        Returns:
+        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
+        """
+        data = bureau_data[[self.GROUPBY_COLUMN, self.ID_COLUMN]].join(balance_data, on=self.ID_COLUMN, how='inner')
+
+        aggregation_dict = dict(self.BUREAU_AGGREGATIONS)
+        aggregation_dict.update({column: ['sum'] for column in balance_data.columns if column.startswith('STATUS_')})
+
+        aggregated_data = data.groupby(self.GROUPBY_COLUMN).agg(aggregation_dict)
+        aggregated_data.columns = ['_'.join(column) for column in aggregated_data.columns]
+        aggregated_data.reset_index(inplace=True)
+
+        return aggregated_data
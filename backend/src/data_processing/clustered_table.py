@@ -0,0 +1,197 @@
+import json
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from backend.src.data_processing.read_data_abc import ReadDataABC
+
+
+class ClusteredTable:
+    """
+    Copy of a table sorted by a key column, in an uncompressed Arrow IPC file that is memory-mapped when read.
+
+    The rows are written in blocks of BLOCK_SIZE rows, and the smallest and largest key of each block are kept in the
+    metadata of the file: a sparse index. Reading the rows of some keys only touches the blocks whose key range holds
+    one of them, and in each of these blocks only the key column and the rows kept, found by binary search. Reading a
+    sample, a batch of applications or a single one costs about as much as the rows it returns.
+
+    The child tables are clustered by SK_ID_CURR, except bureau_balance which is only linked to bureau, by SK_ID_BUREAU.
+    """
+
+    EXTENSION = '.clustered.arrow'
+    BLOCK_SIZE = 16_384
+    INDEX_METADATA_KEY = b'clustered_index'
+
+    # Key of the clustered copy of each table
+    CLUSTER_KEYS = {
+        ReadDataABC.BUREAU_NAME: 'SK_ID_CURR',
+        ReadDataABC.BUREAU_BALANCE_NAME: 'SK_ID_BUREAU',
+        ReadDataABC.CREDIT_CARD_BALANCE_NAME: 'SK_ID_CURR',
+        ReadDataABC.INSTALLMENTS_PAYMENTS_NAME: 'SK_ID_CURR',
+        ReadDataABC.PREVIOUS_APPLICATION_NAME: 'SK_ID_CURR',
+        ReadDataABC.POS_CASH_BALANCE_NAME: 'SK_ID_CURR'
+    }
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a clustered table, memory-mapped.
+
+        Parameters:
+        path (str): The path of the file.
+        """
+        self.path = path
+        self.reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+
+        index = json.loads(self.reader.schema.metadata[self.INDEX_METADATA_KEY])
+        self.key = index['key']
+        self.first_keys = np.asarray(index['first_keys'], dtype='int64')
+        self.last_keys = np.asarray(index['last_keys'], dtype='int64')
+
+    @classmethod
+    def clustered_file_name(cls, file_name: str) -> str:
+        """
+        Get the name of the clustered copy of a CSV file, e.g. 'bureau.clustered.arrow' for 'bureau.csv'.
+
+        Parameters:
+        file_name (str): The CSV file name.
+
+        Returns:
+        str: The clustered file name.
+        """
+        return f"{os.path.splitext(file_name)[0]}{cls.EXTENSION}"
+
+    @classmethod
+    def get_clustered_path(cls, files_path: str, file_name: str) -> Optional[str]:
+        """
+        Get the path of the clustered copy of a CSV file if it can be used in place of the CSV.
+
+        The copy is used if it exists and is not older than the CSV file, as the columnar copy, see TableSchema.get_columnar_path.
+
+        Parameters:
+        files_path (str): The directory of the files.
+        file_name (str): The CSV file name.
+
+        Returns:
+        Optional[str]: The path of the clustered file, or None if there is none up to date.
+        """
+        clustered_path = f"{files_path}/{cls.clustered_file_name(file_name)}"
+        csv_path = f"{files_path}/{file_name}"
+
+        if not os.path.isfile(clustered_path):
+            return None
+
+        if os.path.isfile(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(clustered_path):
+            return None
+
+        return clustered_path
+
+    @classmethod
+    def write(cls, data: pd.DataFrame, path: str, key: str, block_size: int = BLOCK_SIZE) -> None:
+        """
+        Write a clustered table, atomically.
+
+        The rows are sorted by key with a stable sort, so the rows of a key keep their order.
+
+        Parameters:
+        data (pd.DataFrame): The data of the table. Its key column must not have missing values.
+        path (str): The path of the file.
+        key (str): The column the rows are sorted by.
+        block_size (int): The number of rows of each block.
+        """
+        data = data.sort_values(key, kind='stable', ignore_index=True)
+        keys = data[key].to_numpy()
+        starts = range(0, len(data), block_size)
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        index = {
+            'key': key,
+            'first_keys': [int(keys[start]) for start in starts],
+            'last_keys': [int(keys[min(start + block_size, len(data)) - 1]) for start in starts]
+        }
+        schema = table.schema.with_metadata({**(table.schema.metadata or {}), cls.INDEX_METADATA_KEY: json.dumps(index)})
+
+        with pa.OSFile(f"{path}.tmp", 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in table.cast(schema).to_batches(max_chunksize=block_size):
+                    writer.write_batch(batch)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def get_row_indices(keys: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """
+        Get the indices of the rows of some keys, by binary search.
+
+        Parameters:
+        keys (np.ndarray): The keys of the rows, in increasing order.
+        ids (np.ndarray): The keys whose rows are wanted, in increasing order and unique.
+
+        Returns:
+        np.ndarray: The indices of the rows, in increasing order.
+        """
+        starts = np.searchsorted(keys, ids, side='left')
+        lengths = np.searchsorted(keys, ids, side='right') - starts
+        ends = np.cumsum(lengths)
+
+        return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - lengths), lengths)
+
+    def iter_record_batches(self, ids=None, columns: list = None) -> Iterator[pa.RecordBatch]:
+        """
+        Read the rows of some keys, block by block.
+
+        Parameters:
+        ids: The keys whose rows are read. All the rows are read if None.
+        columns (list): The columns to read. All the columns are read if None.
+
+        Returns:
+        Iterator[pa.RecordBatch]: The rows of each block holding some of them.
+        """
+        if ids is None:
+            blocks = [(block, None) for block in range(self.reader.num_record_batches)]
+        else:
+            ids = np.unique(np.asarray(ids, dtype='int64'))
+            # The keys of a block are between its first and last keys
+            lows = np.searchsorted(ids, self.first_keys, side='left')
+            highs = np.searchsorted(ids, self.last_keys, side='right')
+            blocks = [(block, ids[lows[block]:highs[block]]) for block in np.flatnonzero(highs > lows)]
+
+        for block, block_ids in blocks:
+            batch = self.reader.get_batch(int(block))
+            if block_ids is not None:
+                keys = batch.column(self.key).to_numpy()
+                batch = batch.take(pa.array(self.get_row_indices(keys, block_ids)))
+            if columns is not None:
+                batch = batch.select(columns)
+
+            yield batch
+
+    def iter_batches(self, ids=None, columns: list = None) -> Iterator[pd.DataFrame]:
+        """
+        Read the rows of some keys, block by block.
+
+        Parameters:
+        ids: The keys whose rows are read. All the rows are read if None.
+        columns (list): The columns to read. All the columns are read if None.
+
+        Returns:
+        Iterator[pd.DataFrame]: The rows of each block holding some of them.
+        """
+        for batch in self.iter_record_batches(ids, columns):
+            yield batch.to_pandas()
+
+    def read(self, ids=None, columns: list = None) -> pd.DataFrame:
+        """
+        Read the rows of some keys.
+
+        Parameters:
+        ids: The keys whose rows are read. All the rows are read if None.
+        columns (list): The columns to read. All the columns are read if None.
+
+        Returns:
+        pd.DataFrame: The rows, sorted by key. Empty, with the columns read, if there are none.
+        """
+        schema = self.reader.schema if columns is None else pa.schema([self.reader.schema.field(column) for column in columns], metadata=self.reader.schema.metadata)
+
+        return pa.Table.from_batches(list(self.iter_record_batches(ids, columns)), schema=schema).to_pandas()
@@ -0,0 +1,137 @@
+from typing import Iterable
+
+import pandas as pd
+
+
+class DataStructureBuilder:
+    """
+    Builder of the data structure written to shared_config/data_structure.json.
+
+    The structure gives the dtype of each column and, for the columns that are not numerical, the values they take:
+    integer columns with at most 2 values and all the other non float columns. It is built in a single pass over
+    batches of rows, so the data does not have to be held in memory at once. The integer columns are checked together
+    with vectorised operations and the values of the other columns are tracked up to max_values: beyond it, only the
+    dtype of the column is written.
+    """
+
+    DEFAULT_MAX_VALUES = 1000
+    BATCH_SIZE = 100_000
+
+    # Integer columns with more values are numerical
+    MAX_INTEGER_VALUES = 2
+
+    def __init__(self, max_values: int = DEFAULT_MAX_VALUES) -> None:
+        """
+        Initializes a new instance of the DataStructureBuilder class.
+
+        Parameters:
+        max_values (int): The maximum number of values listed for a column.
+        """
+        self.max_values = max_values
+        self.dtypes = {}
+        self.values = {}
+
+    def add_values(self, column: str, new_values: Iterable, limit: int) -> None:
+        """
+        Add values to the values of a column, keeping the order in which they appear.
+
+        Parameters:
+        column (str): The name of the column.
+        new_values (Iterable): The distinct values of a batch.
+        limit (int): The maximum number of values. The values are no longer tracked when it is exceeded.
+        """
+        values = self.values[column]
+        for value in new_values:
+            if value not in values:
+                values[value] = None
+
+        if len(values) > limit:
+            self.values[column] = None
+
+    def update_integer_columns(self, data: pd.DataFrame, columns: list) -> None:
+        """
+        Add the values of a batch of integer columns.
+
+        A column has at most 2 values in a batch if all its values are either its minimum or its maximum.
+
+        Parameters:
+        data (pd.DataFrame): The batch.
+        columns (list): The integer columns whose values are still tracked.
+        """
+        block = data[columns].to_numpy()
+        minimums = block.min(axis=0)
+        maximums = block.max(axis=0)
+        is_minimum = block == minimums
+        is_maximum = block == maximums
+
+        has_few_values = (is_minimum | is_maximum).all(axis=0)
+        minimum_first = is_minimum.argmax(axis=0) <= is_maximum.argmax(axis=0)
+
+        for i, column in enumerate(columns):
+            if not has_few_values[i]:
+                self.values[column] = None
+            elif minimums[i] == maximums[i]:
+                self.add_values(column, [minimums[i].item()], self.MAX_INTEGER_VALUES)
+            elif minimum_first[i]:
+                self.add_values(column, [minimums[i].item(), maximums[i].item()], self.MAX_INTEGER_VALUES)
+            else:
+                self.add_values(column, [maximums[i].item(), minimums[i].item()], self.MAX_INTEGER_VALUES)
+
+    def update(self, data: pd.DataFrame) -> None:
+        """
+        Add a batch of rows to the structure.
+
+        Parameters:
+        data (pd.DataFrame): The batch. Its columns and dtypes must be the same for every batch.
+        """
+        for column in data.columns:
+            if column not in self.dtypes:
+                self.dtypes[column] = str(data[column].dtype)
+                self.values[column] = None if self.dtypes[column].startswith('float') else {}
+
+        if data.empty:
+            return
+
+        integer_columns = [column for column in data.columns if self.dtypes[column].startswith('int') and self.values[column] is not None]
+        if integer_columns:
+            self.update_integer_columns(data, integer_columns)
+
+        for column in data.columns:
+            if self.values[column] is not None and not self.dtypes[column].startswith('int'):
+                self.add_values(column, data[column].dropna().unique().tolist(), self.max_values)
+
+    def build(self, data: pd.DataFrame) -> dict:
+        """
+        Build the structure of a DataFrame, batch by batch.
+
+        Parameters:
+        data (pd.DataFrame): The data.
+
+        Returns:
+        dict: The structure, see get_structure.
+        """
+        self.update(data.iloc[:0])
+        for start in range(0, len(data), self.BATCH_SIZE):
+            self.update(data.iloc[start:start + self.BATCH_SIZE])
+
+        return self.get_structure()
+
+    def get_structure(self) -> dict:
+        """
+        Get the structure of the rows added so far.
+
+        Returns:
+        dict: The type of each column, and the values of its non-numerical columns, by column name.
+        """
+        structure = {}
+        for column, dtype in self.dtypes.items():
+            values = self.values[column]
+            if values is None:
+                structure[column] = {'type': dtype}
+            else:
+                structure[column] = {
+                    'type': dtype,
+                    'values': list(values)
+                }
+
+        return structure
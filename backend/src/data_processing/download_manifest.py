@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+
+class DownloadManifest:
+    """
+    Manifest of the files downloaded from a blob container.
+
+    For each file it records the blob ETag, size and last modification date, along with the checksum,
+    size and modification time of the local copy. This lets a sync tell apart files that are up to date,
+    files whose blob changed and files that were truncated or altered locally.
+    """
+
+    MANIFEST_NAME = '.download_manifest.json'
+    HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, download_path: str) -> None:
+        """
+        Load the manifest of a download directory. A missing or unreadable manifest is treated as empty.
+
+        Parameters:
+        download_path (str): The local directory the files are downloaded to.
+        """
+        self.download_path = download_path
+        self.manifest_path = os.path.join(download_path, self.MANIFEST_NAME)
+        self.entries = {}
+        self._lock = threading.Lock()
+
+        if os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def blob_fingerprint(properties) -> dict:
+        """
+        Get the fields identifying a version of a blob.
+
+        Parameters:
+        properties: The blob properties (azure BlobProperties or LocalBlobProperties).
+
+        Returns:
+        dict: The ETag, size and last modification date of the blob.
+        """
+        last_modified = properties.last_modified
+
+        return {
+            'etag': properties.etag,
+            'size': properties.size,
+            'last_modified': last_modified.isoformat() if last_modified is not None else None,
+        }
+
+    @staticmethod
+    def blob_content_md5(properties) -> Optional[str]:
+        """
+        Get the MD5 of the content of a blob, as set by the service when the blob was uploaded in a single request.
+
+        Parameters:
+        properties: The blob properties (azure BlobProperties or LocalBlobProperties).
+
+        Returns:
+        Optional[str]: The hexadecimal MD5, or None if the blob has none.
+        """
+        content_md5 = getattr(getattr(properties, 'content_settings', None), 'content_md5', None)
+
+        return bytes(content_md5).hex() if content_md5 else None
+
+    @classmethod
+    def file_checksum(cls, file_path: str, algorithm: str = 'sha256') -> str:
+        """
+        Compute the checksum of a local file, reading it in chunks.
+
+        Parameters:
+        file_path (str): The path of the file.
+        algorithm (str): The hashlib algorithm, SHA-256 by default.
+
+        Returns:
+        str: The hexadecimal checksum.
+        """
+        checksum = hashlib.new(algorithm)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b''):
+                checksum.update(chunk)
+
+        return checksum.hexdigest()
+
+    def is_up_to_date(self, blob_name: str, properties) -> bool:
+        """
+        Check whether the local copy of a blob can be kept.
+
+        The local file is only read when its size or modification time differ from the manifest,
+        in which case its checksum decides whether it is still valid. A file missing from the manifest
+        is only kept if it matches the MD5 of the blob.
+
+        Parameters:
+        blob_name (str): The name of the blob.
+        properties: The current properties of the blob.
+
+        Returns:
+        bool: True if the local file matches the current blob, False if it must be downloaded.
+        """
+        entry = self.entries.get(blob_name)
+        file_path = os.path.join(self.download_path, blob_name)
+
+        if not os.path.isfile(file_path):
+            return False
+
+        if entry is None:
+            # File downloaded before the manifest existed: adopt it only if its content is the one of the blob.
+            # A file of the same size may be an older version, so without the MD5 of the blob it is downloaded again.
+            content_md5 = self.blob_content_md5(properties)
+            if content_md5 is None or os.path.getsize(file_path) != properties.size:
+                return False
+            if self.file_checksum(file_path, 'md5') != content_md5:
+                return False
+            self.record(blob_name, properties)
+            return True
+
+        if entry['blob'] != self.blob_fingerprint(properties):
+            return False
+
+        stat = os.stat(file_path)
+        if stat.st_size != entry['size']:
+            return False
+
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        if self.file_checksum(file_path) != entry['sha256']:
+            return False
+
+        # The file was touched but its content is unchanged
+        self.record(blob_name, properties, entry['sha256'])
+        return True
+
+    def record(self, blob_name: str, properties, sha256: Optional[str] = None) -> None:
+        """
+        Record a downloaded file in the manifest and save it.
+
+        Parameters:
+        blob_name (str): The name of the blob.
+        properties: The properties of the downloaded blob.
+        sha256 (str): The checksum of the local file. Computed from the file if None.
+        """
+        file_path = os.path.join(self.download_path, blob_name)
+        stat = os.stat(file_path)
+
+        entry = {
+            'blob': self.blob_fingerprint(properties),
+            'sha256': sha256 if sha256 is not None else self.file_checksum(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+
+        with self._lock:
+            self.entries[blob_name] = entry
+            self.save()
+
+    def remove(self, blob_name: str) -> None:
+        """
+        Remove a file from the manifest and save it.
+
+        Parameters:
+        blob_name (str): The name of the blob.
+        """
+        with self._lock:
+            if self.entries.pop(blob_name, None) is not None:
+                self.save()
+
+    def save(self) -> None:
+        """
+        Write the manifest atomically so that an interrupted sync never leaves it half written.
+        """
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=4)
+        os.replace(temp_path, self.manifest_path)
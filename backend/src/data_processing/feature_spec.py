@@ -0,0 +1,349 @@
+import json
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from backend.src.data_processing.partial_aggregator import PartialAggregator
+from backend.src.data_processing.sequence_aggregator import SequenceAggregator
+from backend.src.data_processing.table_schema import TableSchema
+
+DEFAULT_FEATURE_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, 'shared_config', 'feature_spec.json')
+
+
+class AggregationPlan:
+    """
+    Execution plan of the aggregation of a table, compiled from its feature spec by FeatureSpec.compile.
+
+    The plan only reads the columns the features need, computes the derived columns they use, in the order of the spec,
+    and computes all the aggregations and counts of the table in a single groupby, sharing the states of the
+    aggregations (e.g. mean and sum of a column share its sum), see PartialAggregator. The sequence features are
+    computed in a single pass over the rows sorted by group and order, see SequenceAggregator.
+    """
+
+    def __init__(self, file_name: str, groupby_col: str, read_columns: list, derived: dict, categorical_columns: list,
+                 aggregations: dict, sequences: dict) -> None:
+        """
+        Initializes a new instance of the AggregationPlan class.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        groupby_col (str): The column to group by.
+        read_columns (list): The columns of the file to read, in the order of the file.
+        derived (dict): The derived columns to compute, in order, by name. See FeatureSpec for their description.
+        categorical_columns (list): The columns whose values are counted.
+        aggregations (dict): The aggregation functions of each column.
+        sequences (dict): The order column and the sequence features, by name. Empty if there are none.
+        """
+        self.file_name = file_name
+        self.groupby_col = groupby_col
+        self.read_columns = read_columns
+        self.derived = derived
+        self.categorical_columns = categorical_columns
+        self.aggregations = aggregations
+        self.sequences = sequences
+
+    def get_extra_columns(self) -> list:
+        """
+        Get the columns read only to compute derived columns or sequence features.
+
+        Returns:
+        list: The columns, in the order of the file.
+        """
+        used_columns = {self.groupby_col, *self.categorical_columns, *self.aggregations}
+
+        return [column for column in self.read_columns if column not in used_columns]
+
+    def get_aggregator(self, levels: dict = None) -> PartialAggregator:
+        """
+        Get the aggregator computing the aggregations and counts of the table.
+
+        Parameters:
+        levels (dict): The values counted for some categorical columns, see PartialAggregator.
+
+        Returns:
+        PartialAggregator: The aggregator. The table can also be aggregated shard by shard with it, once prepared.
+        """
+        return PartialAggregator(self.aggregations, self.categorical_columns, self.groupby_col, levels)
+
+    def get_sequence_aggregator(self) -> Optional[SequenceAggregator]:
+        """
+        Get the aggregator computing the sequence features of the table.
+
+        Returns:
+        Optional[SequenceAggregator]: The aggregator. None if the table has no sequence features.
+        """
+        if not self.sequences:
+            return None
+
+        return SequenceAggregator(self.sequences['order'], self.sequences['features'], self.groupby_col)
+
+    def prepare(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the derived columns. The data given is not modified.
+
+        Parameters:
+        data (pd.DataFrame): The data of the table, with at least the columns read.
+
+        Returns:
+        pd.DataFrame: The data with the derived columns.
+        """
+        for name, column_spec in self.derived.items():
+            values = FeatureSpec.evaluate(column_spec['expression'], data)
+            if 'fillna' in column_spec:
+                values = values.fillna(column_spec['fillna'])
+            if 'dtype' in column_spec:
+                values = values.astype(column_spec['dtype'])
+            data = data.assign(**{name: values})
+
+        return data
+
+    def aggregate(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]]) -> pd.DataFrame:
+        """
+        Aggregate the data of the table, whole or shard by shard.
+
+        Each shard is prepared and reduced to its partial states before the next one is read, see PartialAggregator.aggregate.
+        The sequence features depend on all the rows of a group, which may be in several shards, so the columns they use
+        are kept from each shard and aggregated once all of them are read.
+
+        Parameters:
+        data (Union[pd.DataFrame, Iterable[pd.DataFrame]]): The data of the table, or its shards, e.g. the chunks of its
+            file, with at least the columns read.
+
+        Returns:
+        pd.DataFrame: The aggregated data, grouped by the groupby column, followed by the sequence features.
+        """
+        shards = [data] if isinstance(data, pd.DataFrame) else data
+        sequence_aggregator = self.get_sequence_aggregator()
+        sequence_columns = [self.groupby_col, *sequence_aggregator.get_columns()] if sequence_aggregator is not None else []
+        sequence_shards = []
+
+        def prepare_shards() -> Iterator[pd.DataFrame]:
+            for shard in shards:
+                shard = self.prepare(shard)
+                if sequence_columns:
+                    sequence_shards.append(shard[sequence_columns])
+                yield shard
+
+        aggregated_data = self.get_aggregator().aggregate(prepare_shards())
+
+        if sequence_aggregator is not None:
+            sequence_data = sequence_shards[0] if len(sequence_shards) == 1 else pd.concat(sequence_shards, ignore_index=True)
+            aggregated_data = aggregated_data.merge(sequence_aggregator.aggregate(sequence_data), on=self.groupby_col, how='left')
+
+        return aggregated_data
+
+    def get_sql_columns(self, quote: Callable[[str], str], table_alias: str) -> dict:
+        """
+        Get the SQL expressions of the columns the aggregations, counts and sequence features use.
+
+        Parameters:
+        quote (Callable[[str], str]): The function quoting an SQL identifier.
+        table_alias (str): The alias of the table in the query.
+
+        Returns:
+        dict: The SQL expression of each column, by name, without the groupby column.
+        """
+        columns = {column: f"{table_alias}.{quote(column)}" for column in self.read_columns if column != self.groupby_col}
+        for name, column_spec in self.derived.items():
+            expression = FeatureSpec.to_sql(column_spec['expression'], lambda column: columns[column])
+            if 'fillna' in column_spec:
+                expression = f"COALESCE({expression}, {column_spec['fillna']})"
+            if FeatureSpec.SQL_TYPES.get(column_spec.get('dtype')) is not None:
+                expression = f"CAST({expression} AS {FeatureSpec.SQL_TYPES[column_spec['dtype']]})"
+            columns[name] = expression
+
+        sequence_columns = self.get_sequence_aggregator().get_columns() if self.sequences else []
+        used_columns = dict.fromkeys([*self.categorical_columns, *self.aggregations, *sequence_columns, *self.get_extra_columns()])
+
+        return {column: columns[column] for column in used_columns}
+
+
+class FeatureSpec:
+    """
+    Declarative spec of the aggregated features of the tables, as described in shared_config/feature_spec.json.
+
+    For each table, keyed by the name of the matching ReadDataABC constant as in columns_info.json, the spec lists:
+    - derived: the columns computed before the aggregation, in order. Each has an expression, optionally a value filling
+      its missing values and a dtype. An expression is a column name, a number, or a list [operator, arguments...] whose
+      arguments are expressions, e.g. ["subtract", ["coalesce", "DAYS_ENDDATE_FACT", "DAYS_CREDIT_ENDDATE"], "DAYS_CREDIT"].
+      A derived column can replace a column of the file with the same name.
+    - categorical: the columns whose values are counted per group, as one-hot encoding followed by a sum.
+    - aggregations: the aggregation functions of each column, see PartialAggregator.
+    - sequences: the features of the rows of each group taken in order, with the order column and the features by name,
+      each with a column, a function and optionally a number of last rows, see SequenceAggregator.
+
+    compile turns the spec of a table into an AggregationPlan, reading only the columns of the features asked for.
+    """
+
+    OPERATORS = {
+        'add': lambda left, right: left + right,
+        'subtract': lambda left, right: left - right,
+        'multiply': lambda left, right: left * right,
+        'divide': lambda left, right: left / right,
+        'coalesce': lambda left, right: left.where(left.notna(), right),
+    }
+    SQL_OPERATORS = {
+        'add': '({} + {})',
+        'subtract': '({} - {})',
+        'multiply': '({} * {})',
+        'divide': '({} * 1.0 / {})',
+        'coalesce': 'COALESCE({}, {})',
+    }
+    SQL_TYPES = {'int64': 'INTEGER', 'float64': 'REAL'}
+
+    def __init__(self, feature_spec_path: str = DEFAULT_FEATURE_SPEC_PATH, schema: TableSchema = None) -> None:
+        """
+        Load the feature spec.
+
+        Parameters:
+        feature_spec_path (str): The path of the feature_spec.json file.
+        schema (TableSchema): The schema of the tables, giving the columns of the files. The default one if None.
+        """
+        with open(feature_spec_path, 'r') as f:
+            spec = json.load(f)
+
+        self.groupby_col = spec['groupby']
+        self.tables = spec['tables']
+        self.schema = schema if schema is not None else TableSchema()
+        self.file_names = {key: file_name for file_name, key in self.schema.table_keys.items()}
+
+    def get_file_names(self) -> List[str]:
+        """
+        Get the tables with aggregated features.
+
+        Returns:
+        List[str]: The CSV file names of the tables, in the order of the spec.
+        """
+        return [self.file_names[key] for key in self.tables]
+
+    def get_table_spec(self, file_name: str) -> Optional[dict]:
+        """
+        Get the spec of a table.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        Optional[dict]: The spec of the table. None if it has no aggregated features.
+        """
+        return self.tables.get(self.schema.table_keys.get(file_name))
+
+    @classmethod
+    def get_expression_columns(cls, expression) -> List[str]:
+        """
+        Get the columns an expression uses.
+
+        Parameters:
+        expression: The expression.
+
+        Returns:
+        List[str]: The columns, without duplicates.
+        """
+        if isinstance(expression, str):
+            return [expression]
+        if isinstance(expression, list):
+            if expression[0] not in cls.OPERATORS:
+                raise ValueError(f"Unknown operator {expression[0]}. Expected one of {list(cls.OPERATORS)}.")
+            return list(dict.fromkeys(column for argument in expression[1:] for column in cls.get_expression_columns(argument)))
+
+        return []
+
+    @classmethod
+    def evaluate(cls, expression, data: pd.DataFrame):
+        """
+        Evaluate an expression on the data of a table.
+
+        Parameters:
+        expression: The expression.
+        data (pd.DataFrame): The data.
+
+        Returns:
+        The values of the expression, a Series unless it is a number.
+        """
+        if isinstance(expression, str):
+            return data[expression]
+        if isinstance(expression, list):
+            return cls.OPERATORS[expression[0]](*[cls.evaluate(argument, data) for argument in expression[1:]])
+
+        return expression
+
+    @classmethod
+    def to_sql(cls, expression, column_sql: Callable[[str], str]) -> str:
+        """
+        Translate an expression to SQL.
+
+        Parameters:
+        expression: The expression.
+        column_sql (Callable[[str], str]): The function giving the SQL expression of a column.
+
+        Returns:
+        str: The SQL expression.
+        """
+        if isinstance(expression, str):
+            return column_sql(expression)
+        if isinstance(expression, list):
+            return cls.SQL_OPERATORS[expression[0]].format(*[cls.to_sql(argument, column_sql) for argument in expression[1:]])
+
+        return repr(expression)
+
+    def compile(self, file_name: str, features: list = None) -> Optional[AggregationPlan]:
+        """
+        Compile the spec of a table into an aggregation plan.
+
+        The aggregations, counts and sequence features not asked for are removed, then the derived columns they do not use,
+        then the columns of the file none of them use, so that these columns are never read.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        features (list): The aggregated features to compute, e.g. those the model is trained on. All of them if None.
+            The counts of a categorical column are kept if any of them is asked for, as its values depend on the data.
+
+        Returns:
+        Optional[AggregationPlan]: The plan. None if the table has no aggregated features.
+        """
+        table_spec = self.get_table_spec(file_name)
+        if table_spec is None:
+            return None
+
+        derived = table_spec.get('derived', {})
+        categorical_columns = table_spec.get('categorical', [])
+        aggregations = table_spec.get('aggregations', {})
+        sequence_features = table_spec.get('sequences', {}).get('features', {})
+
+        if features is not None:
+            features = set(features)
+            aggregations = {
+                column: [function for function in functions if f"{column}_{function}" in features]
+                for column, functions in aggregations.items()
+            }
+            aggregations = {column: functions for column, functions in aggregations.items() if functions}
+            categorical_columns = [
+                column for column in categorical_columns
+                if any(feature.startswith(f"{column}_") and feature.endswith('_sum') for feature in features)
+            ]
+            sequence_features = {name: feature_spec for name, feature_spec in sequence_features.items() if name in features}
+
+        sequences = {'order': table_spec['sequences']['order'], 'features': sequence_features} if sequence_features else {}
+
+        # Columns needed, walking the derived columns backwards, as a derived column can use the ones before it
+        needed_columns = set([*categorical_columns, *aggregations])
+        if sequences:
+            needed_columns.update([sequences['order'], *(feature_spec['column'] for feature_spec in sequence_features.values())])
+        live_derived = {}
+        for name, column_spec in reversed(list(derived.items())):
+            if name in needed_columns:
+                live_derived[name] = column_spec
+                needed_columns.discard(name)
+                needed_columns.update(self.get_expression_columns(column_spec['expression']))
+        live_derived = dict(reversed(list(live_derived.items())))
+
+        schema_columns = [column['fieldname'] for column in self.schema.get_columns(file_name)]
+        unknown_columns = needed_columns - set(schema_columns)
+        if schema_columns and unknown_columns:
+            raise ValueError(f"Unknown columns {sorted(unknown_columns)} in the feature spec of {file_name}.")
+
+        needed_columns.add(self.groupby_col)
+        read_columns = [column for column in schema_columns if column in needed_columns] if schema_columns else sorted(needed_columns)
+
+        return AggregationPlan(file_name, self.groupby_col, read_columns, live_derived, categorical_columns, aggregations, sequences)
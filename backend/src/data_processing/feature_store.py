@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+import pandas as pd
+
+from backend.src.data_processing.table_schema import TableSchema
+
+
+class FeatureStore:
+    """
+    Persistent store of computed features, such as the aggregated data of each table.
+
+    Each entry is saved as a Parquet file along with the fingerprint of the inputs it was computed from
+    (source files, aggregation spec, sampling...). An entry is only returned while its fingerprint matches,
+    so that a change of any input triggers its recomputation.
+    """
+
+    MANIFEST_NAME = 'feature_store.json'
+    EXTENSION = '.parquet'
+
+    def __init__(self, store_path: str) -> None:
+        """
+        Load the manifest of a store directory. A missing or unreadable manifest is treated as empty.
+
+        Parameters:
+        store_path (str): The directory of the store. Created on the first save.
+        """
+        self.store_path = store_path
+        self.manifest_path = os.path.join(store_path, self.MANIFEST_NAME)
+        self.entries = {}
+
+        if os.path.isfile(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def source_fingerprint(files_path: str, file_name: str) -> dict:
+        """
+        Get the fields identifying the version of a source table, without reading it.
+
+        Both the CSV file and its columnar copy are described, since either of them can be read.
+
+        Parameters:
+        files_path (str): The directory of the files.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        dict: The size and modification time of each existing file of the table, by file name.
+        """
+        fingerprint = {}
+        for name in [file_name, TableSchema.columnar_file_name(file_name)]:
+            file_path = os.path.join(files_path, name)
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                fingerprint[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+        return fingerprint
+
+    @staticmethod
+    def fingerprint(**inputs) -> str:
+        """
+        Compute the fingerprint of the inputs of an entry.
+
+        Parameters:
+        inputs: The inputs, as JSON serializable values. Other values are serialized with str.
+
+        Returns:
+        str: The hexadecimal SHA-256 of the inputs.
+        """
+        serialized_inputs = json.dumps(inputs, sort_keys=True, default=str)
+
+        return hashlib.sha256(serialized_inputs.encode('utf-8')).hexdigest()
+
+    def get_path(self, name: str) -> str:
+        """
+        Get the path of the data of an entry.
+
+        Parameters:
+        name (str): The name of the entry.
+
+        Returns:
+        str: The path of the Parquet file.
+        """
+        return os.path.join(self.store_path, f"{os.path.splitext(name)[0]}{self.EXTENSION}")
+
+    def is_up_to_date(self, name: str, fingerprint: str) -> bool:
+        """
+        Check whether an entry was computed from the given inputs.
+
+        Parameters:
+        name (str): The name of the entry.
+        fingerprint (str): The fingerprint of the current inputs.
+
+        Returns:
+        bool: True if the stored data can be used.
+        """
+        return self.entries.get(name) == fingerprint and os.path.isfile(self.get_path(name))
+
+    def load(self, name: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        """
+        Load an entry if it was computed from the given inputs.
+
+        Parameters:
+        name (str): The name of the entry.
+        fingerprint (str): The fingerprint of the current inputs.
+
+        Returns:
+        Optional[pd.DataFrame]: The stored data, or None if it is missing or outdated.
+        """
+        if not self.is_up_to_date(name, fingerprint):
+            return None
+
+        return pd.read_parquet(self.get_path(name))
+
+    def save(self, name: str, fingerprint: str, data: pd.DataFrame) -> None:
+        """
+        Save an entry and record its fingerprint.
+
+        The data is written to a temporary file first so that an interrupted save never leaves a partial entry.
+
+        Parameters:
+        name (str): The name of the entry.
+        fingerprint (str): The fingerprint of the inputs the data was computed from.
+        data (pd.DataFrame): The data to store.
+        """
+        os.makedirs(self.store_path, exist_ok=True)
+
+        file_path = self.get_path(name)
+        temp_path = f"{file_path}.tmp"
+        data.to_parquet(temp_path, index=False)
+        os.replace(temp_path, file_path)
+
+        self.entries[name] = fingerprint
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        """
+        Write the manifest atomically.
+        """
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=4)
+        os.replace(temp_path, self.manifest_path)
@@ -0,0 +1,177 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from azure.core.exceptions import ResourceModifiedError
+
+
+class LocalContentSettings:
+    """
+    Content settings of a blob stored in a LocalBlobContainerClient.
+
+    Mirrors the attributes of azure.storage.blob.ContentSettings used by the loaders.
+    """
+
+    def __init__(self, content_md5: Optional[bytes] = None) -> None:
+        self.content_md5 = content_md5
+
+
+class LocalBlobProperties:
+    """
+    Properties of a blob stored in a LocalBlobContainerClient.
+
+    Mirrors the attributes of azure.storage.blob.BlobProperties used by the loaders. As for the blobs uploaded in
+    blocks, the MD5 of the content is not set unless given.
+    """
+
+    def __init__(self, name: str, size: int, etag: str, last_modified: datetime, content_md5: Optional[bytes] = None) -> None:
+        self.name = name
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_settings = LocalContentSettings(content_md5)
+
+
+class LocalBlobDownloader:
+    """
+    Stream downloader over a local file.
+
+    Mirrors the subset of azure.storage.blob.StorageStreamDownloader used by the loaders:
+    `read`, `readall`, `chunks` and `properties`.
+    """
+
+    def __init__(self, file_path: str, properties: LocalBlobProperties, offset: int = 0, length: Optional[int] = None, latency: float = 0.0, chunk_size: int = 4 * 1024 * 1024) -> None:
+        self.properties = properties
+        self.size = properties.size - offset if length is None else min(length, properties.size - offset)
+        self._file_path = file_path
+        self._offset = offset
+        self._remaining = self.size
+        self._latency = latency
+        self._chunk_size = chunk_size
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read at most size bytes from the blob. A negative size reads everything left.
+
+        Parameters:
+        size (int): The maximum number of bytes to read.
+
+        Returns:
+        bytes: The bytes read, empty when the download is complete.
+        """
+        if self._remaining <= 0:
+            return b''
+
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+
+        if self._latency:
+            time.sleep(self._latency)
+
+        with open(self._file_path, 'rb') as blob_file:
+            blob_file.seek(self._offset)
+            data = blob_file.read(size)
+
+        self._offset += len(data)
+        self._remaining -= len(data)
+
+        return data
+
+    def readall(self) -> bytes:
+        """
+        Read the whole (remaining) blob in memory.
+
+        Returns:
+        bytes: The content of the blob.
+        """
+        return self.read()
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Iterate over the blob content.
+
+        Returns:
+        Iterator[bytes]: The chunks of the blob.
+        """
+        while True:
+            data = self.read(self._chunk_size)
+            if not data:
+                break
+            yield data
+
+
+class LocalBlobClient:
+    """
+    Blob client over a local file. Mirrors the subset of azure.storage.blob.BlobClient used by the loaders.
+    """
+
+    def __init__(self, file_path: str, blob_name: str, latency: float = 0.0) -> None:
+        self.blob_name = blob_name
+        self._file_path = file_path
+        self._latency = latency
+
+    def get_blob_properties(self) -> LocalBlobProperties:
+        """
+        Get the properties of the blob.
+
+        Returns:
+        LocalBlobProperties: The size, ETag and last modification date of the blob.
+        """
+        stat = os.stat(self._file_path)
+        etag = f'"0x{stat.st_mtime_ns:X}{stat.st_size:X}"'
+        last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+
+        return LocalBlobProperties(self.blob_name, stat.st_size, etag, last_modified)
+
+    def download_blob(self, offset: Optional[int] = None, length: Optional[int] = None, etag: Optional[str] = None, **kwargs) -> LocalBlobDownloader:
+        """
+        Start the download of the blob.
+
+        Parameters:
+        offset (int): The first byte to download.
+        length (int): The number of bytes to download.
+        etag (str): If set, the download fails unless the blob still has this ETag.
+
+        Returns:
+        LocalBlobDownloader: The downloader streaming the blob content.
+        """
+        properties = self.get_blob_properties()
+        if etag is not None and etag != properties.etag:
+            raise ResourceModifiedError(f"The blob {self.blob_name} has been modified.")
+
+        return LocalBlobDownloader(self._file_path, properties, offset or 0, length, self._latency)
+
+
+class LocalBlobContainerClient:
+    """
+    Fake blob container backed by a local directory.
+
+    It can be given to SimpleLoadData in place of the Azure container client to run or benchmark the downloads offline.
+    The latency (in seconds) is waited before each read to simulate a network round trip.
+    """
+
+    def __init__(self, root_path: str, latency: float = 0.0) -> None:
+        self.root_path = root_path
+        self.latency = latency
+
+    def get_blob_client(self, blob: str) -> LocalBlobClient:
+        """
+        Get a client for a blob of the container.
+
+        Parameters:
+        blob (str): The name of the blob.
+
+        Returns:
+        LocalBlobClient: The client of the blob.
+        """
+        return LocalBlobClient(os.path.join(self.root_path, blob), blob, self.latency)
+
+    def list_blob_names(self) -> List[str]:
+        """
+        List the names of the blobs in the container.
+
+        Returns:
+        List[str]: The names of the blobs.
+        """
+        return sorted(name for name in os.listdir(self.root_path) if os.path.isfile(os.path.join(self.root_path, name)))
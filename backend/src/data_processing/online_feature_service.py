@@ -0,0 +1,241 @@
+import json
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from backend.src.data_processing.simple_read_data import SimpleReadData
+
+
+class OnlineFeatureService:
+    """
+    Service building the aggregated features of a single application, to predict it without sending them all.
+
+    The child tables are aggregated once per build with the aggregate_table method of the reader, which reads the copies of
+    the tables written by SimpleLoadData.convert_to_columnar, so the features are the same as the ones the model is trained
+    on. The aggregated data of each table is stored as the sorted SK_ID_CURR of its applications and a matrix of their
+    features, one row per application, in NumPy files. A lookup memory-maps the files, finds the rows of the applications
+    by binary search and only reads these rows: nothing is read from the tables nor aggregated per request.
+
+    The features are stored as float64, NaN where missing, as they are fed to the model. The values of the one-hot encoded
+    columns are counted for every value of the table, as all the rows are aggregated.
+    """
+
+    MANIFEST_NAME = 'online_features.json'
+    ID_COLUMN = 'SK_ID_CURR'
+
+    # Files of the aggregated data of a table: the SK_ID_CURR of its rows and their features
+    IDS_SUFFIX = 'ids'
+    FEATURES_SUFFIX = 'features'
+
+    def __init__(self, store_path: str, reader: SimpleReadData = None) -> None:
+        """
+        Initializes a new instance of the OnlineFeatureService class.
+
+        Parameters:
+        store_path (str): The directory of the aggregated tables. Created if needed.
+        reader (SimpleReadData): The reader whose aggregations are used. A new one if None.
+        """
+        self.store_path = store_path
+        self.reader = reader if reader is not None else SimpleReadData()
+        self.tables = {}
+        self.manifest = self.load_manifest()
+
+    def get_path(self, file_name: str, suffix: str) -> str:
+        """
+        Get the path of a file of the aggregated data of a table.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        suffix (str): IDS_SUFFIX or FEATURES_SUFFIX.
+
+        Returns:
+        str: The path of the NumPy file, e.g. 'bureau.ids.npy' for 'bureau.csv'.
+        """
+        return os.path.join(self.store_path, f"{os.path.splitext(file_name)[0]}.{suffix}.npy")
+
+    def load_manifest(self) -> dict:
+        """
+        Load the manifest of the aggregated tables.
+
+        Returns:
+        dict: The fingerprint of the inputs and the feature names of each aggregated table. Empty if there is none.
+        """
+        try:
+            with open(os.path.join(self.store_path, self.MANIFEST_NAME), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'tables': {}}
+
+    def save_manifest(self) -> None:
+        """
+        Save the manifest of the aggregated tables, atomically.
+        """
+        manifest_path = os.path.join(self.store_path, self.MANIFEST_NAME)
+        with open(f"{manifest_path}.tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=4)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def get_table_fingerprint(self, files_path: str, file_name: str) -> str:
+        """
+        Get the fingerprint of the inputs of the aggregated data of a table: its files, those of the tables it is linked
+        through and how it is aggregated, see SimpleReadData.get_table_fingerprint.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        str: The fingerprint of the aggregated data.
+        """
+        # All the rows are aggregated, as the ones of all the applications with a sampling frequency of 1
+        return self.reader.get_table_fingerprint(files_path, file_name, 1)
+
+    def is_up_to_date(self, file_name: str, fingerprint: str) -> bool:
+        """
+        Check whether the aggregated data of a table is stored for these inputs.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        fingerprint (str): The fingerprint of the inputs of the aggregated data.
+
+        Returns:
+        bool: True if the manifest has this fingerprint for the table and its files exist.
+        """
+        entry = self.manifest['tables'].get(file_name)
+        return (isinstance(entry, dict) and entry.get('fingerprint') == fingerprint
+                and all(os.path.isfile(self.get_path(file_name, suffix)) for suffix in [self.IDS_SUFFIX, self.FEATURES_SUFFIX]))
+
+    def write_array(self, array: np.ndarray, path: str) -> None:
+        """
+        Write a NumPy file, atomically.
+
+        Parameters:
+        array (np.ndarray): The array.
+        path (str): The path of the file.
+        """
+        with open(f"{path}.tmp", 'wb') as f:
+            np.save(f, array)
+        os.replace(f"{path}.tmp", path)
+
+    def build(self, files_path: str) -> List[str]:
+        """
+        Aggregate the child tables whose inputs changed since they were last aggregated.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+
+        Returns:
+        List[str]: The CSV file names of the tables aggregated.
+        """
+        os.makedirs(self.store_path, exist_ok=True)
+        built = []
+
+        for file_name in self.reader.get_aggregation_methods():
+            fingerprint = self.get_table_fingerprint(files_path, file_name)
+            if self.is_up_to_date(file_name, fingerprint):
+                continue
+
+            with self.reader.profiler.stage('aggregate', table=file_name) as record:
+                aggregated_data = self.reader.aggregate_table(files_path, file_name, None)
+                self.reader.profiler.record_data(record, aggregated_data)
+
+            aggregated_data = aggregated_data.sort_values(self.ID_COLUMN, ignore_index=True)
+            features = aggregated_data.drop(columns=[self.ID_COLUMN])
+            self.write_array(aggregated_data[self.ID_COLUMN].to_numpy(dtype='int64'), self.get_path(file_name, self.IDS_SUFFIX))
+            self.write_array(features.to_numpy(dtype='float64', na_value=np.nan), self.get_path(file_name, self.FEATURES_SUFFIX))
+
+            self.tables.pop(file_name, None)
+            self.manifest['tables'][file_name] = {'fingerprint': fingerprint, 'columns': list(features.columns)}
+            self.save_manifest()
+            built.append(file_name)
+
+        return built
+
+    def open_table(self, file_name: str) -> tuple:
+        """
+        Open the aggregated data of a table, memory-mapped.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        tuple: The sorted SK_ID_CURR of the applications having rows in the table and the matrix of their features.
+        """
+        if file_name not in self.tables:
+            self.tables[file_name] = (
+                np.load(self.get_path(file_name, self.IDS_SUFFIX), mmap_mode='r'),
+                np.load(self.get_path(file_name, self.FEATURES_SUFFIX), mmap_mode='r')
+            )
+
+        return self.tables[file_name]
+
+    def get_rows(self, file_name: str, sk_id_currs: np.ndarray) -> np.ndarray:
+        """
+        Get the aggregated data of a table of some applications. Only their rows are read from the memory-mapped file.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        sk_id_currs (np.ndarray): The SK_ID_CURR of the applications.
+
+        Returns:
+        np.ndarray: The features, one row per application in their order. NaN for the applications without rows in the table.
+        """
+        ids, features = self.open_table(file_name)
+        if len(ids) == 0:
+            return np.full((len(sk_id_currs), features.shape[1]), np.nan)
+
+        # The SK_ID_CURR are sorted and unique: the row of an application, if any, is where its SK_ID_CURR would be inserted
+        positions = np.minimum(np.searchsorted(ids, sk_id_currs), len(ids) - 1)
+        found = ids[positions] == sk_id_currs
+
+        return np.where(found[:, np.newaxis], features[positions], np.nan)
+
+    def get_batch_features(self, applications: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+        """
+        Build the features of some applications: their own fields and the aggregated data of their child tables.
+
+        Parameters:
+        applications (pd.DataFrame): The SK_ID_CURR and the other fields of the applications, e.g. those of application_test.csv.
+        columns (list): If set, the columns of the result, e.g. the features the model is trained on. The missing ones are NaN.
+
+        Returns:
+        pd.DataFrame: The features, in the order of the applications, with the columns named as in retrieve_data, see
+            SimpleReadData.join_tables. The aggregated data of a table is NaN for the applications without rows in it.
+        """
+        sk_id_currs = applications[self.ID_COLUMN].to_numpy(dtype='int64')
+        file_names = list(self.reader.get_aggregation_methods())
+
+        application_columns = [column for column in applications.columns if column != self.ID_COLUMN]
+        resolved_columns = self.reader.resolve_column_names(
+            [application_columns] + [self.manifest['tables'][file_name]['columns'] for file_name in file_names]
+        )
+        aggregated_data = pd.DataFrame(
+            np.hstack([self.get_rows(file_name, sk_id_currs) for file_name in file_names]),
+            columns=[column for table_columns in resolved_columns[1:] for column in table_columns]
+        )
+
+        data = pd.concat([
+            applications.reset_index(drop=True).rename(columns=dict(zip(application_columns, resolved_columns[0]))),
+            aggregated_data
+        ], axis=1)
+
+        if columns is not None:
+            data = data.reindex(columns=columns)
+
+        return data
+
+    def get_features(self, sk_id_curr: int, application: dict = None, columns: list = None) -> pd.DataFrame:
+        """
+        Build the features of an application: its own fields and the aggregated data of its child tables.
+
+        Parameters:
+        sk_id_curr (int): The SK_ID_CURR of the application.
+        application (dict): The other fields of the application.
+        columns (list): If set, the columns of the result, e.g. the features the model is trained on. The missing ones are NaN.
+
+        Returns:
+        pd.DataFrame: The features, in a single row. See get_batch_features.
+        """
+        return self.get_batch_features(pd.DataFrame([{**(application or {}), self.ID_COLUMN: sk_id_curr}]), columns)
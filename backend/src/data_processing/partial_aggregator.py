@@ -0,0 +1,293 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class PartialAggregator:
+    """
+    Aggregation of a table per group as mergeable partial states, so that it can be computed shard by shard.
+
+    Each aggregation is expressed with states that are combined by a function of the states only: min, max, sum, the
+    count of the non-missing values and the size of the groups. mean is the sum divided by the count. The values of the
+    categorical columns are counted, as with one-hot encoding followed by a sum.
+
+    A shard, e.g. a chunk of a file, the rows given to a process or to a machine, is reduced to its partial states with
+    partial, the partial states of the shards are combined with merge, in any order and any number of times, and the
+    result is built from the merged states with finalize. Whatever the shards, min, max and the counts are the same;
+    sums are computed in float64, and only their last bits may depend on the order they are added in.
+    """
+
+    # States of each aggregation, and how the states of several shards are combined
+    STATES = {
+        'min': ['min'],
+        'max': ['max'],
+        'sum': ['sum'],
+        'mean': ['sum', 'count'],
+        'count': ['count'],
+        'size': ['size'],
+    }
+    MERGE_FUNCTIONS = {'min': 'min', 'max': 'max', 'sum': 'sum', 'count': 'sum', 'size': 'sum'}
+
+    def __init__(self, aggregations: dict, categorical_columns: list = None, groupby_col: str = 'SK_ID_CURR', levels: dict = None) -> None:
+        """
+        Initializes a new instance of the PartialAggregator class.
+
+        Parameters:
+        aggregations (dict): The aggregation functions of each column, e.g. {'AMT_CREDIT': ['max', 'min', 'mean']}. See STATES.
+        categorical_columns (list): The columns whose values are counted.
+        groupby_col (str): The column to group by.
+        levels (dict): The values counted for some categorical columns, in the order of the result. The others count the
+            values they have in any shard, sorted.
+        """
+        unknown_functions = {function for functions in aggregations.values() for function in functions} - set(self.STATES)
+        if unknown_functions:
+            raise ValueError(f"Aggregations {sorted(unknown_functions)} can not be merged. Expected some of {list(self.STATES)}.")
+
+        self.aggregations = aggregations
+        self.categorical_columns = categorical_columns or []
+        self.groupby_col = groupby_col
+        self.levels = levels or {}
+
+    def get_states(self) -> dict:
+        """
+        Get the states needed by the aggregations of each column.
+
+        Returns:
+        dict: The states of each column, without duplicates.
+        """
+        return {
+            column: list(dict.fromkeys(state for function in functions for state in self.STATES[function]))
+            for column, functions in self.aggregations.items()
+        }
+
+    @staticmethod
+    def count_categories(data: pd.DataFrame, columns_names: list, groupby_col: str, groups: pd.Index, levels: dict = None) -> pd.DataFrame:
+        """
+        Count the occurrences of each value of the categorical columns in each group.
+
+        The counts are computed from the category codes with a single bincount per column, without building
+        the one-hot encoded columns. Missing values are not counted, as with one-hot encoding.
+
+        Parameters:
+        data (pd.DataFrame): The data to count.
+        columns_names (list): The names of the categorical columns.
+        groupby_col (str): The column to group by.
+        groups (pd.Index): The groups, in the order of the result.
+        levels (dict): The values counted for some columns. The values of the others are those of their categories, or the
+            values they have, sorted.
+
+        Returns:
+        pd.DataFrame: One column per value of each column, with a (column, value) MultiIndex, indexed like groups.
+        """
+        group_codes = groups.get_indexer(data[groupby_col])
+        valid_groups = group_codes >= 0
+        nb_groups = len(groups)
+
+        counts = []
+        for column in columns_names:
+            values = data[column]
+            if levels is not None and column in levels:
+                column_levels = levels[column]
+                codes = pd.Categorical(values, categories=column_levels).codes
+            elif isinstance(values.dtype, pd.CategoricalDtype):
+                codes, column_levels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, column_levels = pd.factorize(values, sort=True)
+
+            codes = codes.astype(np.int64)
+            valid = valid_groups & (codes >= 0)
+            nb_levels = len(column_levels)
+
+            column_counts = np.bincount(group_codes[valid] * nb_levels + codes[valid], minlength=nb_groups * nb_levels)
+
+            counts.append(pd.DataFrame(
+                column_counts.reshape(nb_groups, nb_levels),
+                index=groups,
+                columns=pd.MultiIndex.from_product([[column], list(column_levels)])
+            ))
+
+        if not counts:
+            return pd.DataFrame(index=groups)
+
+        return pd.concat(counts, axis=1)
+
+    def partial(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduce a shard to its partial states.
+
+        Parameters:
+        data (pd.DataFrame): The rows of the shard.
+
+        Returns:
+        pd.DataFrame: The states of each group of the shard, with (column, state) columns and (column, value) columns
+            for the counts of the categorical columns, indexed by the groupby column.
+        """
+        states = self.get_states()
+
+        # The sums of float columns, e.g. float32 ones, are accumulated in float64
+        sum_columns = [column for column, column_states in states.items() if 'sum' in column_states and pd.api.types.is_float_dtype(data[column].dtype)]
+        data = data.astype({column: 'float64' for column in sum_columns}) if sum_columns else data
+
+        if not states:
+            groups = data.groupby(self.groupby_col).size().index
+            return self.count_categories(data, self.categorical_columns, self.groupby_col, groups, self.levels)
+
+        partial = data.groupby(self.groupby_col).agg(states)
+        if not self.categorical_columns:
+            return partial
+
+        counts = self.count_categories(data, self.categorical_columns, self.groupby_col, partial.index, self.levels)
+
+        return pd.concat([partial, counts], axis=1)
+
+    def merge(self, partials: list) -> pd.DataFrame:
+        """
+        Combine the partial states of several shards.
+
+        Parameters:
+        partials (list): The partial states, see partial.
+
+        Returns:
+        pd.DataFrame: The partial states of all the shards, one row per group.
+        """
+        data = pd.concat(partials)
+
+        # A value counted in some shards only is not counted in the others
+        count_columns = [column for column in data.columns if column[0] in self.categorical_columns]
+        if count_columns:
+            missing_columns = data[count_columns].columns[data[count_columns].isna().any().to_numpy()]
+            if len(missing_columns):
+                data = data.fillna({column: 0 for column in missing_columns}).astype({column: 'int64' for column in missing_columns})
+
+        if data.index.is_unique:
+            return data.sort_index()
+
+        merge_functions = {
+            column: 'sum' if column[0] in self.categorical_columns else self.MERGE_FUNCTIONS[column[1]]
+            for column in data.columns
+        }
+
+        return data.groupby(level=0).agg(merge_functions)
+
+    @staticmethod
+    def merge_dtypes(dtype, shard_dtype):
+        """
+        Get the dtype of a column from its dtype in the previous shards and in a new one.
+
+        Parameters:
+        dtype: The dtype of the column in the previous shards. None if there are none.
+        shard_dtype: The dtype of the column in the new shard.
+
+        Returns:
+        The dtype of the column. The categories of categorical columns whose shards have different categories are all of them, sorted.
+        Numeric columns downcast differently in each shard, e.g. float32 and float64, have the dtype holding all their values.
+        """
+        if isinstance(dtype, pd.CategoricalDtype) and isinstance(shard_dtype, pd.CategoricalDtype) and dtype != shard_dtype:
+            return pd.CategoricalDtype(sorted(set(dtype.categories) | set(shard_dtype.categories)))
+        if isinstance(dtype, np.dtype) and isinstance(shard_dtype, np.dtype) and dtype.kind in 'iuf' and shard_dtype.kind in 'iuf':
+            return np.result_type(dtype, shard_dtype)
+
+        return shard_dtype
+
+    @staticmethod
+    def get_levels(states: pd.DataFrame, column: str, dtype = None) -> list:
+        """
+        Get the values of a categorical column counted in the merged partial states, in the same order whatever the shards.
+
+        Parameters:
+        states (pd.DataFrame): The merged partial states.
+        column (str): The categorical column.
+        dtype: The dtype of the column. The values are in the order of its categories if it is categorical, sorted otherwise.
+
+        Returns:
+        list: The values of the column.
+        """
+        counted_levels = [level for state_column, level in states.columns if state_column == column]
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = list(dtype.categories)
+            return categories + sorted(set(counted_levels) - set(categories))
+
+        return sorted(counted_levels)
+
+    def finalize(self, states: pd.DataFrame, dtypes: dict = None) -> pd.DataFrame:
+        """
+        Build the aggregated data from the merged partial states.
+
+        Parameters:
+        states (pd.DataFrame): The merged partial states, see merge.
+        dtypes (dict): The dtype of the columns of the table. The means of float and object columns keep their dtype, and the
+            values of categorical columns are in the order of their categories.
+
+        Returns:
+        pd.DataFrame: One <column>_<function> column per aggregation and one <column>_<value>_sum column per value of each
+            categorical column, with the groupby column first, sorted by group.
+        """
+        dtypes = dtypes or {}
+
+        columns = {}
+        for column, functions in self.aggregations.items():
+            for function in functions:
+                if function == 'mean':
+                    values = states[(column, 'sum')].astype('float64') / states[(column, 'count')]
+                    # As with a groupby mean, e.g. float32 columns have float32 means
+                    if pd.api.types.is_float_dtype(dtypes.get(column)) or pd.api.types.is_object_dtype(dtypes.get(column)):
+                        values = values.astype(dtypes[column])
+                else:
+                    values = states[(column, function)]
+                columns[f"{column}_{function}"] = values
+
+        for column in self.categorical_columns:
+            column_levels = self.levels.get(column)
+            if column_levels is None:
+                column_levels = self.get_levels(states, column, dtypes.get(column))
+            for level in column_levels:
+                if (column, level) not in states.columns:
+                    values = pd.Series(0, index=states.index, dtype='int64')
+                else:
+                    values = states[(column, level)]
+                    if values.dtype != 'int64':
+                        values = values.fillna(0).astype('int64')
+                columns[f"{column}_{level}_sum"] = values
+
+        aggregated_data = pd.DataFrame(columns, index=states.index.rename(self.groupby_col))
+
+        return aggregated_data.reset_index()
+
+    def aggregate(self, shards: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Aggregate a table given shard by shard.
+
+        The partial states are merged whenever they outgrow the merged ones, so only one shard and about one row per group
+        are held in memory.
+
+        Parameters:
+        shards (Iterable[pd.DataFrame]): The shards of the table, e.g. the chunks of a file.
+
+        Returns:
+        pd.DataFrame: The aggregated data, see finalize.
+        """
+        merged = None
+        partials = []
+        partial_rows = 0
+        dtypes = {}
+        for shard in shards:
+            partial = self.partial(shard)
+            partials.append(partial)
+            partial_rows += len(partial)
+            for column in [*self.aggregations, *self.categorical_columns]:
+                dtypes[column] = self.merge_dtypes(dtypes.get(column), shard[column].dtype)
+
+            if partial_rows > (0 if merged is None else len(merged)):
+                merged = self.merge(partials if merged is None else [merged] + partials)
+                partials = []
+                partial_rows = 0
+
+        if merged is None and not partials:
+            raise ValueError("At least one shard is needed to aggregate a table.")
+
+        if partials or merged is None:
+            merged = self.merge(partials if merged is None else [merged] + partials)
+
+        return self.finalize(merged, dtypes)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from azure.core import MatchConditions
+
+from backend.src.data_processing.download_manifest import DownloadManifest
+
+
+class RangeDownload:
+    """
+    Resumable download of a blob through byte-range requests.
+
+    The blob is written to a `.part` file next to its destination. The progress of each byte range is persisted
+    in a `.part.json` state file after every chunk, so that an interrupted download continues where it stopped
+    as long as the blob did not change. The file is moved to its destination only once every range is complete.
+    """
+
+    PART_SUFFIX = '.part'
+    STATE_SUFFIX = '.part.json'
+
+    def __init__(self, blob_client, properties, download_file_path: str, chunk_size: int, range_count: int = 1) -> None:
+        """
+        Prepare the download of a blob.
+
+        Parameters:
+        blob_client: The client of the blob to download.
+        properties: The current properties of the blob.
+        download_file_path (str): The local path of the downloaded file.
+        chunk_size (int): The size in bytes of each read request.
+        range_count (int): The number of ranges downloaded in parallel for a new download.
+        """
+        self.blob_client = blob_client
+        self.properties = properties
+        self.download_file_path = download_file_path
+        self.part_path = f"{download_file_path}{self.PART_SUFFIX}"
+        self.state_path = f"{download_file_path}{self.STATE_SUFFIX}"
+        self.chunk_size = chunk_size
+        self.range_count = range_count
+        self.ranges = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def split_ranges(size: int, range_count: int) -> List[list]:
+        """
+        Split a blob into contiguous byte ranges.
+
+        Parameters:
+        size (int): The size of the blob in bytes.
+        range_count (int): The number of ranges.
+
+        Returns:
+        List[list]: The [start, end, downloaded bytes] of each range.
+        """
+        range_size = max(1, -(-size // range_count))
+
+        return [[start, min(start + range_size, size), 0] for start in range(0, size, range_size)] or [[0, 0, 0]]
+
+    def load_state(self) -> bool:
+        """
+        Load the progress of a previous download of the same blob version.
+
+        Returns:
+        bool: True if the download can be resumed, False if it must start over.
+        """
+        if not os.path.isfile(self.state_path) or not os.path.isfile(self.part_path):
+            return False
+
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if state.get('blob') != DownloadManifest.blob_fingerprint(self.properties):
+            return False
+
+        if os.path.getsize(self.part_path) != self.properties.size:
+            return False
+
+        self.ranges = state['ranges']
+        return True
+
+    def save_state(self) -> None:
+        """
+        Persist the progress of the download.
+        """
+        state = {
+            'blob': DownloadManifest.blob_fingerprint(self.properties),
+            'ranges': self.ranges,
+        }
+
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def download_range(self, byte_range: list, checksum=None) -> None:
+        """
+        Download the missing part of a byte range into the `.part` file.
+
+        Parameters:
+        byte_range (list): The [start, end, downloaded bytes] of the range. Updated as chunks are written.
+        checksum: An optional hash object updated with the downloaded bytes.
+        """
+        start, end, done = byte_range
+        if start + done >= end:
+            return
+
+        downloader = self.blob_client.download_blob(
+            offset=start + done,
+            length=end - start - done,
+            etag=self.properties.etag,
+            match_condition=MatchConditions.IfNotModified
+        )
+
+        with open(self.part_path, 'r+b') as part_file:
+            part_file.seek(start + done)
+            chunk = downloader.read(self.chunk_size)
+            while chunk:
+                part_file.write(chunk)
+                part_file.flush()
+                if checksum is not None:
+                    checksum.update(chunk)
+
+                with self._lock:
+                    byte_range[2] += len(chunk)
+                    self.save_state()
+
+                chunk = downloader.read(self.chunk_size)
+
+        if byte_range[0] + byte_range[2] != end:
+            raise IOError(f"Incomplete download of bytes {start}-{end} of {self.download_file_path}")
+
+    def run(self) -> Optional[str]:
+        """
+        Download the blob, resuming a previous attempt if possible.
+
+        Returns:
+        Optional[str]: The SHA-256 checksum of the file if it was computed while downloading, None otherwise.
+        """
+        if not self.load_state():
+            self.ranges = self.split_ranges(self.properties.size, self.range_count)
+            with open(self.part_path, 'wb') as part_file:
+                part_file.truncate(self.properties.size)
+            self.save_state()
+
+        pending_ranges = [byte_range for byte_range in self.ranges if byte_range[0] + byte_range[2] < byte_range[1]]
+
+        # The checksum can only be streamed if the whole file is downloaded in order in this run
+        checksum = None
+        if len(self.ranges) == 1 and self.ranges[0][2] == 0:
+            checksum = hashlib.sha256()
+            self.download_range(self.ranges[0], checksum)
+        elif len(pending_ranges) == 1:
+            self.download_range(pending_ranges[0])
+        elif pending_ranges:
+            with ThreadPoolExecutor(max_workers=len(pending_ranges)) as executor:
+                for future in [executor.submit(self.download_range, byte_range) for byte_range in pending_ranges]:
+                    future.result()
+
+        os.replace(self.part_path, self.download_file_path)
+        os.remove(self.state_path)
+
+        return checksum.hexdigest() if checksum is not None else None
@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+
+
+class RowSampler:
+    """
+    Deterministic sampling of the rows of a table, 1 out of sampling_frequency.
+
+    Two methods are available:
+    - 'rows' keeps every sampling_frequency-th row of the file, like the historical CSV sampling.
+    - 'hash' keeps the rows whose SK_ID_CURR hashes below 1/sampling_frequency. The sample does not depend on the
+      order or the splitting of the file, the samples are nested (the 1/20 sample is included in the 1/10 sample)
+      and child tables can be sampled consistently with the applications by hashing their own SK_ID_CURR.
+
+    Both methods are vectorised, so their cost does not depend on the sampling frequency.
+
+    With a positive_sampling_frequency, the sampling is class-aware: the rows whose TARGET is 1 are kept 1 out of
+    positive_sampling_frequency and the others 1 out of sampling_frequency, e.g. all the defaulters and 1 out of 10 of
+    the other applications. Each row kept stands for as many rows as the frequency of its class, its weight. Only the
+    hash method is class-aware, so that the sample does not depend on the order of the rows of each class.
+    """
+
+    ROWS = 'rows'
+    HASH = 'hash'
+    METHODS = [ROWS, HASH]
+    ID_COLUMN = 'SK_ID_CURR'
+    TARGET_COLUMN = 'TARGET'
+    CSV_CHUNK_SIZE = 100_000
+
+    def __init__(self, sampling_frequency: int, method: str = HASH, ids = None, chunk_size: int = CSV_CHUNK_SIZE,
+                 positive_sampling_frequency: int = None) -> None:
+        """
+        Initializes a new instance of the RowSampler class.
+
+        Parameters:
+        sampling_frequency (int): The sampling frequency. 10 means 1 out of 10 rows will be kept.
+        method (str): The sampling method, 'rows' or 'hash'.
+        ids: If set, only the rows whose SK_ID_CURR is in these ids are kept, on top of the sampling.
+        chunk_size (int): The number of rows of each chunk read from a CSV file.
+        positive_sampling_frequency (int): If set, the sampling frequency of the rows whose TARGET is 1, sampling_frequency
+            being the one of the other rows. 1 keeps all of them.
+        """
+        if sampling_frequency < 1:
+            raise ValueError("sampling_frequency must be a positive integer.")
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown sampling method {method}. Expected one of {self.METHODS}.")
+        if positive_sampling_frequency is not None:
+            if positive_sampling_frequency < 1:
+                raise ValueError("positive_sampling_frequency must be a positive integer.")
+            if method != self.HASH:
+                raise ValueError(f"The class-aware sampling needs the {self.HASH} method.")
+
+        self.sampling_frequency = sampling_frequency
+        self.method = method
+        self.ids = None if ids is None else pd.Index(pd.unique(np.asarray(ids)))
+        self.chunk_size = chunk_size
+        self.positive_sampling_frequency = positive_sampling_frequency
+
+    @staticmethod
+    def hash_ids(ids) -> np.ndarray:
+        """
+        Hash integer ids with the splitmix64 finalizer.
+
+        Parameters:
+        ids: The ids to hash.
+
+        Returns:
+        np.ndarray: The uint64 hash of each id.
+        """
+        hashes = np.asarray(ids, dtype=np.int64).astype(np.uint64)
+
+        with np.errstate(over='ignore'):
+            hashes = hashes + np.uint64(0x9E3779B97F4A7C15)
+            hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            hashes = hashes ^ (hashes >> np.uint64(31))
+
+        return hashes
+
+    def id_mask(self, ids, frequencies = None) -> np.ndarray:
+        """
+        Get the ids kept by the hash sampling.
+
+        Parameters:
+        ids: The SK_ID_CURR values.
+        frequencies: The sampling frequency of each id. sampling_frequency for all of them if None.
+
+        Returns:
+        np.ndarray: True for each id in the sample.
+        """
+        if frequencies is None:
+            if self.sampling_frequency == 1:
+                return np.ones(len(ids), dtype=bool)
+            frequencies = self.sampling_frequency
+
+        # The thresholds of the frequencies are computed exactly with Python integers, once per frequency
+        frequencies = np.asarray(frequencies)
+        thresholds = {frequency: np.uint64((1 << 64) // int(frequency) - 1) for frequency in np.unique(frequencies)}
+        if len(thresholds) == 1:
+            threshold = next(iter(thresholds.values()))
+        else:
+            threshold = np.empty(len(frequencies), dtype=np.uint64)
+            for frequency, frequency_threshold in thresholds.items():
+                threshold[frequencies == frequency] = frequency_threshold
+
+        return self.hash_ids(ids) <= threshold
+
+    @property
+    def is_class_aware(self) -> bool:
+        """
+        Whether the rows of each class are sampled with their own frequency.
+        """
+        return self.positive_sampling_frequency is not None and self.positive_sampling_frequency != self.sampling_frequency
+
+    def get_frequencies(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Get the sampling frequency of each row, that of its class if the sampling is class-aware.
+
+        Parameters:
+        data (pd.DataFrame): A block of the table, with the TARGET column if the sampling is class-aware.
+
+        Returns:
+        np.ndarray: The frequency of each row.
+        """
+        if not self.is_class_aware:
+            return np.full(len(data), self.sampling_frequency)
+
+        return np.where(data[self.TARGET_COLUMN].to_numpy() == 1, self.positive_sampling_frequency, self.sampling_frequency)
+
+    def get_weights(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Get the weight of the sampled rows: the number of rows of the table each of them stands for.
+
+        Parameters:
+        data (pd.DataFrame): The sampled rows, with the TARGET column if the sampling is class-aware.
+
+        Returns:
+        np.ndarray: The float weight of each row, the frequency of its class.
+        """
+        return self.get_frequencies(data).astype('float64')
+
+    def mask(self, data: pd.DataFrame, start: int = 0) -> np.ndarray:
+        """
+        Get the rows of a block of a table kept by the sampling.
+
+        Parameters:
+        data (pd.DataFrame): A block of the table.
+        start (int): The position of the first row of the block in the table.
+
+        Returns:
+        np.ndarray: True for each row in the sample.
+        """
+        if self.is_class_aware:
+            mask = self.id_mask(data[self.ID_COLUMN].to_numpy(), self.get_frequencies(data))
+        elif self.sampling_frequency == 1:
+            mask = np.ones(len(data), dtype=bool)
+        elif self.method == self.HASH:
+            mask = self.id_mask(data[self.ID_COLUMN].to_numpy())
+        else:
+            # Same rows as skipping the CSV lines not divisible by the frequency, the header being line 0
+            positions = np.arange(start + 1, start + len(data) + 1)
+            mask = positions % self.sampling_frequency == 0
+
+        if self.ids is not None:
+            mask &= data[self.ID_COLUMN].isin(self.ids).to_numpy()
+
+        return mask
+
+    @property
+    def uses_id_column(self) -> bool:
+        """
+        Whether the SK_ID_CURR column is needed to compute the mask.
+        """
+        return self.ids is not None or self.is_class_aware or (self.method == self.HASH and self.sampling_frequency != 1)
+
+    @property
+    def uses_target_column(self) -> bool:
+        """
+        Whether the TARGET column is needed to compute the mask.
+        """
+        return self.is_class_aware
+
+    @property
+    def keeps_everything(self) -> bool:
+        """
+        Whether every row is kept.
+        """
+        return self.ids is None and self.sampling_frequency == 1 and not self.is_class_aware
+
+    def sample(self, data: pd.DataFrame, start: int = 0) -> pd.DataFrame:
+        """
+        Sample a block of a table.
+
+        Parameters:
+        data (pd.DataFrame): A block of the table.
+        start (int): The position of the first row of the block in the table.
+
+        Returns:
+        pd.DataFrame: The sampled rows, with a new index.
+        """
+        if self.keeps_everything:
+            return data
+
+        return data[self.mask(data, start)].reset_index(drop=True)
+
+    def get_read_columns(self, columns: list = None) -> list:
+        """
+        Get the columns to read to compute the mask and return the requested columns.
+
+        Parameters:
+        columns (list): The requested columns. All the columns if None.
+
+        Returns:
+        list: The columns to read. The same object as columns if no column has to be added.
+        """
+        if columns is None:
+            return columns
+
+        mask_columns = [self.ID_COLUMN] if self.uses_id_column else []
+        if self.uses_target_column:
+            mask_columns.append(self.TARGET_COLUMN)
+
+        missing_columns = [column for column in mask_columns if column not in columns]
+        if missing_columns:
+            return list(columns) + missing_columns
+
+        return columns
+
+    def read_csv(self, file_path: str, columns: list = None, **kwargs) -> pd.DataFrame:
+        """
+        Read a sample of a CSV file chunk by chunk, so that only the sample and one chunk are held in memory.
+        Each chunk is filtered on the ids, if any, while the file is read.
+
+        Parameters:
+        file_path (str): The path of the CSV file.
+        columns (list): The columns to read. All the columns are read if None.
+        kwargs: Other arguments given to pd.read_csv.
+
+        Returns:
+        pd.DataFrame: The sampled rows.
+        """
+        read_columns = self.get_read_columns(columns)
+
+        samples = []
+        start = 0
+        for chunk in pd.read_csv(file_path, usecols=read_columns, chunksize=self.chunk_size, **kwargs):
+            samples.append(chunk[self.mask(chunk, start)])
+            start += len(chunk)
+
+        if not samples:
+            return pd.read_csv(file_path, usecols=columns, nrows=0, **kwargs)
+
+        data = pd.concat(samples, ignore_index=True)
+
+        if read_columns is not columns:
+            data = data[columns]
+
+        return data
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+
+class SequenceAggregator:
+    """
+    Aggregation of the rows of each group taken in order, e.g. the installments of an application by DAYS_INSTALMENT.
+
+    The rows are sorted once by (group, order column), then every feature is computed for all the groups at once from
+    the sorted arrays and the boundaries of the groups, with NumPy reductions: no function is applied group by group.
+    Missing values are skipped, as with pandas aggregations, and rows whose order is missing come last.
+
+    Each feature applies a function to a column:
+    - first, last: the value of the first or last row whose value is not missing;
+    - diff_mean, diff_min, diff_max: the mean, min or max difference between consecutive rows;
+    - trend: the slope of the least squares line of the values by the order column, in units of the column per unit of order;
+    - mean, min, max, sum: over the rows, or over the last N rows of the group when the feature has "last": N.
+
+    Unlike PartialAggregator, the features depend on all the rows of a group, so each group must be aggregated at once.
+    """
+
+    FUNCTIONS = ['first', 'last', 'diff_mean', 'diff_min', 'diff_max', 'trend', 'mean', 'min', 'max', 'sum']
+    WINDOW_FUNCTIONS = ['mean', 'min', 'max', 'sum']
+
+    def __init__(self, order_col: str, features: dict, groupby_col: str = 'SK_ID_CURR') -> None:
+        """
+        Initializes a new instance of the SequenceAggregator class.
+
+        Parameters:
+        order_col (str): The column ordering the rows of a group, e.g. DAYS_INSTALMENT.
+        features (dict): The features by name, each a dict with a column, a function and optionally the number of last
+            rows it is computed over, e.g. {'PAYMENT_DELAY_LAST_3_MEAN': {'column': 'PAYMENT_DELAY', 'function': 'mean', 'last': 3}}.
+        groupby_col (str): The column to group by.
+        """
+        for name, feature_spec in features.items():
+            if feature_spec['function'] not in self.FUNCTIONS:
+                raise ValueError(f"Unknown function {feature_spec['function']} of {name}. Expected one of {self.FUNCTIONS}.")
+            if 'last' in feature_spec and (feature_spec['function'] not in self.WINDOW_FUNCTIONS or int(feature_spec['last']) < 1):
+                raise ValueError(f"{name} can not be computed over the last {feature_spec['last']} rows. Expected a positive number of rows and one of {self.WINDOW_FUNCTIONS}.")
+
+        self.order_col = order_col
+        self.features = features
+        self.groupby_col = groupby_col
+
+    def get_columns(self) -> list:
+        """
+        Get the columns the features use.
+
+        Returns:
+        list: The order column then the columns of the features, without duplicates.
+        """
+        return list(dict.fromkeys([self.order_col, *(feature_spec['column'] for feature_spec in self.features.values())]))
+
+    @staticmethod
+    def to_float(values: pd.Series) -> np.ndarray:
+        """
+        Get the values of a column as float64, missing values being NaN.
+
+        Parameters:
+        values (pd.Series): The values, of any numeric dtype, including nullable ones.
+
+        Returns:
+        np.ndarray: The values.
+        """
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+
+    @staticmethod
+    def reduce(values: np.ndarray, codes: np.ndarray, starts: np.ndarray, function: str) -> np.ndarray:
+        """
+        Reduce the values of each group, skipping missing values.
+
+        Parameters:
+        values (np.ndarray): The float values, sorted by group.
+        codes (np.ndarray): The group of each value, from 0.
+        starts (np.ndarray): The position of the first value of each group.
+        function (str): 'mean', 'min', 'max' or 'sum'.
+
+        Returns:
+        np.ndarray: The value of each group. NaN for the groups without values, 0 for their sum as with pandas.
+        """
+        if function == 'min':
+            return np.fmin.reduceat(values, starts)
+        if function == 'max':
+            return np.fmax.reduceat(values, starts)
+
+        valid = ~np.isnan(values)
+        sums = np.bincount(codes, weights=np.where(valid, values, 0.0), minlength=len(starts))
+        if function == 'sum':
+            return sums
+
+        counts = np.bincount(codes, weights=valid, minlength=len(starts))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    @staticmethod
+    def get_trend(values: np.ndarray, order: np.ndarray, codes: np.ndarray, nb_groups: int) -> np.ndarray:
+        """
+        Get the slope of the least squares line of the values of each group by their order, from centered sums.
+
+        Parameters:
+        values (np.ndarray): The float values, sorted by group.
+        order (np.ndarray): The float order of the values.
+        codes (np.ndarray): The group of each value, from 0.
+        nb_groups (int): The number of groups.
+
+        Returns:
+        np.ndarray: The slope of each group. NaN for the groups with less than 2 distinct orders.
+        """
+        valid = ~np.isnan(values) & ~np.isnan(order)
+        counts = np.bincount(codes, weights=valid, minlength=nb_groups)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            order_means = np.bincount(codes, weights=np.where(valid, order, 0.0), minlength=nb_groups) / counts
+            value_means = np.bincount(codes, weights=np.where(valid, values, 0.0), minlength=nb_groups) / counts
+            centered_order = np.where(valid, order - order_means[codes], 0.0)
+            centered_values = np.where(valid, values - value_means[codes], 0.0)
+
+            covariances = np.bincount(codes, weights=centered_order * centered_values, minlength=nb_groups)
+            variances = np.bincount(codes, weights=centered_order * centered_order, minlength=nb_groups)
+
+            return np.where(variances > 0, covariances / variances, np.nan)
+
+    @staticmethod
+    def get_first_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, last: bool = False) -> np.ndarray:
+        """
+        Get the first or last value of each group that is not missing.
+
+        Parameters:
+        values (np.ndarray): The float values, sorted by group.
+        starts (np.ndarray): The position of the first value of each group.
+        ends (np.ndarray): The position after the last value of each group.
+        last (bool): Whether to get the last value instead of the first.
+
+        Returns:
+        np.ndarray: The first or last value of each group. NaN for the groups whose values are all missing.
+        """
+        rows = np.arange(len(values))
+        valid = ~np.isnan(values)
+
+        if last:
+            positions = np.maximum.reduceat(np.where(valid, rows, -1), starts)
+            found = positions >= starts
+        else:
+            positions = np.minimum.reduceat(np.where(valid, rows, len(values)), starts)
+            found = positions < ends
+
+        return np.where(found, values[np.where(found, positions, starts)], np.nan)
+
+    def aggregate(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute the features of each group.
+
+        Parameters:
+        data (pd.DataFrame): The rows of the groups, in any order, with the groupby column, the order column and the
+            columns of the features.
+
+        Returns:
+        pd.DataFrame: The groupby column then one float64 column per feature, one row per group, sorted by group.
+        """
+        groups, codes = np.unique(data[self.groupby_col].to_numpy(), return_inverse=True)
+        order = self.to_float(data[self.order_col])
+
+        # Rows sorted by group then order, missing orders last, with the position of the first and last row of each group
+        positions = np.lexsort((order, codes))
+        codes = codes[positions]
+        order = order[positions]
+        nb_rows = len(codes)
+        starts = np.flatnonzero(np.diff(codes, prepend=-1)) if nb_rows else np.array([], dtype=np.int64)
+        ends = np.append(starts[1:], nb_rows)
+        rows_from_end = (ends - 1)[codes] - np.arange(nb_rows)
+
+        features = {self.groupby_col: groups}
+        for name, feature_spec in self.features.items():
+            function = feature_spec['function']
+            values = self.to_float(data[feature_spec['column']])[positions]
+
+            if not nb_rows:
+                features[name] = np.array([], dtype='float64')
+            elif function == 'first':
+                features[name] = self.get_first_valid(values, starts, ends)
+            elif function == 'last':
+                features[name] = self.get_first_valid(values, starts, ends, last=True)
+            elif function == 'trend':
+                features[name] = self.get_trend(values, order, codes, len(groups))
+            elif function.startswith('diff_'):
+                differences = np.diff(values, prepend=np.nan)
+                differences[starts] = np.nan
+                features[name] = self.reduce(differences, codes, starts, function[len('diff_'):])
+            else:
+                if 'last' in feature_spec:
+                    values = np.where(rows_from_end < int(feature_spec['last']), values, np.nan)
+                features[name] = self.reduce(values, codes, starts, function)
+
+        return pd.DataFrame(features)
@@ -1,8 +1,16 @@
+import hashlib
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
+import pandas as pd
 from dotenv import load_dotenv
+from backend.src.data_processing.clustered_table import ClusteredTable
+from backend.src.data_processing.download_manifest import DownloadManifest
 from backend.src.data_processing.load_data_abc import LoadData
+from backend.src.data_processing.range_download import RangeDownload
+from backend.src.data_processing.table_schema import TableSchema
+from backend.src.instrumentation.stage_profiler import StageProfiler
 from azure.storage.blob import BlobServiceClient
 
 class SimpleLoadData(LoadData):
@@ -10,33 +18,138 @@ class SimpleLoadData(LoadData):
     A concrete implementation of the LoadData abstract base class.
 
     This class provides functionality to load data from Azure Blob Storage and save it to a local directory.
-    The save method is not implemented and should be implemented in a subclass if needed.
+    The downloaded CSV files can then be converted to typed Parquet files, which the readers use in place of the CSV files.
     """
 
-    def __init__(self) -> None:
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+    DEFAULT_RANGE_THRESHOLD = 256 * 1024 * 1024
+
+    def __init__(self, max_workers: int = 1, chunk_size: int = None, container_client = None, range_threshold: int = None, range_workers: int = 4, profiler: StageProfiler = None) -> None:
         """
         Initializes a new instance of the SimpleLoadData class.
 
         The SimpleLoadData class provides functionality to load data from Azure Blob Storage and save it to a local directory.
 
         Args:
+            max_workers (int): The number of blobs downloaded at the same time.
+            chunk_size (int): The size in bytes of the chunks streamed to disk. If None, each blob is read whole in memory before being written.
+                Otherwise downloads are resumable: an interrupted download continues from its `.part` file on the next load.
+            container_client: A container client to use instead of the Azure one, e.g. a LocalBlobContainerClient to work offline.
+            range_threshold (int): The size in bytes above which a blob is downloaded as parallel byte ranges. If None, blobs are downloaded as a single range.
+                Only used when chunk_size is set.
+            range_workers (int): The number of parallel byte ranges of a blob larger than range_threshold.
+            profiler (StageProfiler): The profiler recording the stages of the loads. A new one if None.
+
+        Returns:
             None
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        if range_workers < 1:
+            raise ValueError("range_workers must be a positive integer.")
+
+        self.range_threshold = range_threshold
+        self.schema = None
+        self.range_workers = range_workers
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.container_client = container_client
+        self.profiler = profiler if profiler is not None else StageProfiler()
+
+        if container_client is None:
+            load_dotenv()
+            self.blob_service_client = BlobServiceClient.from_connection_string(os.getenv('AZURE_STORAGE_CONNECTION_STRING'))
+            self.container_name = os.getenv('AZURE_STORAGE_CONTAINER_NAME')
+
+    def get_container_client(self):
+        """
+        Get the container client the blobs are downloaded from.
+
+        Returns:
+            The injected container client, or the Azure container client.
+        """
+        if self.container_client is not None:
+            return self.container_client
+
+        return self.blob_service_client.get_container_client(container=self.container_name)
+
+    def download_file(self, container_client, blob_name: str, download_file_path: str, properties = None) -> tuple:
+        """
+        Download a single blob to a local file.
+
+        The blob is first written to a `.part` file, which is renamed once the download is complete,
+        so an interrupted download is never mistaken for a finished one.
+        If a chunk size is set, the blob is streamed to disk so that at most one chunk per range is held in memory,
+        and the download resumes from the `.part` file if it was interrupted.
+
+        Args:
+            container_client: The container client holding the blob.
+            blob_name (str): The name of the blob to download.
+            download_file_path (str): The local path of the downloaded file.
+            properties: The current properties of the blob. Fetched if None.
+
+        Returns:
+            tuple: The properties of the downloaded blob and the SHA-256 checksum of the file, or None if it was not computed during the download.
+        """
+        blob_client = container_client.get_blob_client(blob_name)
+
+        if self.chunk_size is None:
+            downloader = blob_client.download_blob()
+            content = downloader.readall()
+            part_path = f"{download_file_path}{RangeDownload.PART_SUFFIX}"
+            with open(part_path, "wb") as download_file:
+                download_file.write(content)
+            os.replace(part_path, download_file_path)
+
+            return downloader.properties, hashlib.sha256(content).hexdigest()
+
+        if properties is None:
+            properties = blob_client.get_blob_properties()
+
+        range_count = 1
+        if self.range_threshold is not None and properties.size > self.range_threshold:
+            range_count = self.range_workers
+
+        sha256 = RangeDownload(blob_client, properties, download_file_path, self.chunk_size, range_count).run()
+
+        return properties, sha256
+
+    def sync_file(self, container_client, manifest: DownloadManifest, blob_name: str, parent_stage: str = None) -> None:
+        """
+        Download a blob unless the manifest shows that the local copy is up to date.
+
+        Args:
+            container_client: The container client holding the blob.
+            manifest (DownloadManifest): The manifest of the download directory.
+            blob_name (str): The name of the blob to sync.
+            parent_stage (str): The stage the download is recorded in, when it runs in another thread. The stages of the current thread if None.
 
         Returns:
             None
         """
+        try:
+            properties = container_client.get_blob_client(blob_name).get_blob_properties()
+            if manifest.is_up_to_date(blob_name, properties):
+                return
 
-        load_dotenv()
-        self.blob_service_client = BlobServiceClient.from_connection_string(os.getenv('AZURE_STORAGE_CONNECTION_STRING'))
-        self.container_name = os.getenv('AZURE_STORAGE_CONTAINER_NAME')
+            manifest.remove(blob_name)
+            with self.profiler.stage('download', parent=parent_stage, table=blob_name) as record:
+                downloaded_properties, sha256 = self.download_file(container_client, blob_name, f"{manifest.download_path}/{blob_name}", properties)
+                record['bytes'] = downloaded_properties.size
+            manifest.record(blob_name, downloaded_properties, sha256)
+        except Exception as e:
+            logging.error(f"Failed to download {blob_name} from Azure Blob Storage: {e}")
 
     def load(self, file_names : list, download_path: str):
         """
         Load data from Azure Blob Storage and save it to a local directory.
 
+        Only the blobs that changed since the last sync, or whose local copy is missing or corrupt, are downloaded.
+        Up to max_workers blobs are downloaded concurrently. A failed download is logged and does not stop the others.
+
         Args:
-            blob_service_client: The BlobServiceClient instance.
-            container_name: The name of the container.
             file_names: The list of file names to download.
             download_path: The local path to download the files.
 
@@ -44,32 +157,106 @@ class SimpleLoadData(LoadData):
             None
         """
         try:
-            container_client = self.blob_service_client.get_container_client(container=self.container_name)
+            container_client = self.get_container_client()
 
             if not os.path.exists(download_path):
                 os.makedirs(download_path)
 
-            for blob_name in file_names:
-                download_file_path = f"{download_path}/{blob_name}"
-                if not os.path.exists(download_file_path):
-                    blob_client = container_client.get_blob_client(blob_name)
-                    with open(download_file_path, "wb") as download_file:
-                        download_file.write(blob_client.download_blob().readall())
+            manifest = DownloadManifest(download_path)
+
+            if self.max_workers == 1:
+                for blob_name in file_names:
+                    self.sync_file(container_client, manifest, blob_name)
+                return
+
+            parent_stage = self.profiler.get_current_stage()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for blob_name in file_names:
+                    executor.submit(self.sync_file, container_client, manifest, blob_name, parent_stage)
         except Exception as e:
             logging.error(f"Failed to load data from Azure Blob Storage: {e}")
 
-    def save(self, file_path, data):
+    def read_typed_csv(self, csv_path: str, file_name: str) -> pd.DataFrame:
         """
-        Save data to a file. This method is not implemented in this class and should be implemented in a subclass if needed.
+        Read a downloaded CSV file with the column types of the schema.
+
+        Integer columns holding missing values cannot be stored as integers and are kept as floats.
+
+        Args:
+            csv_path (str): The path of the CSV file.
+            file_name (str): The name of the table file, used to look up its schema.
+
+        Returns:
+            pd.DataFrame: The typed data.
+        """
+        if self.schema is None:
+            self.schema = TableSchema()
+
+        dtypes = self.schema.get_dtypes(file_name)
+        read_dtypes = {column: dtype for column, dtype in dtypes.items() if not dtype.startswith('int')}
+
+        data = pd.read_csv(csv_path, dtype=read_dtypes)
+
+        for column, dtype in dtypes.items():
+            if dtype.startswith('int') and column in data.columns and not data[column].isnull().any():
+                data[column] = data[column].astype(dtype)
+
+        return data
+
+    def convert_to_columnar(self, file_names: list, download_path: str) -> None:
+        """
+        Convert the downloaded CSV files to typed columnar files, read in place of the CSV files by the readers.
+
+        The child tables are also written sorted by their key, with a block index, see ClusteredTable, so that the rows of
+        some applications are read without scanning the whole table.
+
+        A file is only converted if its columnar or clustered copy is missing or older than the CSV file.
+        A failed conversion is logged and does not stop the others.
+
+        Args:
+            file_names: The list of CSV file names to convert.
+            download_path: The local path of the downloaded files.
+
+        Returns:
+            None
+        """
+        for file_name in file_names:
+            csv_path = f"{download_path}/{file_name}"
+            if not file_name.endswith('.csv') or not os.path.isfile(csv_path):
+                continue
+
+            columnar_path = TableSchema.get_columnar_path(download_path, file_name)
+            clustered = file_name in ClusteredTable.CLUSTER_KEYS
+            if columnar_path is not None and (not clustered or ClusteredTable.get_clustered_path(download_path, file_name) is not None):
+                continue
+
+            try:
+                with self.profiler.stage('convert_to_columnar', table=file_name) as record:
+                    if columnar_path is None:
+                        data = self.read_typed_csv(csv_path, file_name)
+                        self.save(f"{download_path}/{TableSchema.columnar_file_name(file_name)}", data)
+                    else:
+                        data = pd.read_parquet(columnar_path)
+                    self.profiler.record_data(record, data)
+
+                    if clustered:
+                        ClusteredTable.write(data, f"{download_path}/{ClusteredTable.clustered_file_name(file_name)}", ClusteredTable.CLUSTER_KEYS[file_name])
+            except Exception as e:
+                logging.error(f"Failed to convert {file_name} to a columnar file: {e}")
+
+    def save(self, file_path: str, data: pd.DataFrame) -> None:
+        """
+        Save data to a Parquet file.
+
+        The file is written under a temporary name and then renamed, so readers never see a partial file.
 
         Args:
             file_path: The path of the file to save.
             data: The data to save.
 
-        Raises:
-            NotImplementedError: The save method is not implemented in SimpleLoadData and should be implemented in a subclass if needed.
-
         Returns:
             None
         """
-        raise NotImplementedError("The save method is not implemented in SimpleLoadData and should be implemented in a subclass if needed.")
\ No newline at end of file
+        temp_path = f"{file_path}.tmp"
+        data.to_parquet(temp_path, index=False)
+        os.replace(temp_path, file_path)
\ No newline at end of file
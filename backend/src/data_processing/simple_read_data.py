@@ -1,15 +1,241 @@
+import itertools
 import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from backend.src.data_processing.bureau_balance_aggregator import BureauBalanceAggregator
+from backend.src.data_processing.clustered_table import ClusteredTable
+from backend.src.data_processing.data_structure_builder import DataStructureBuilder
+from backend.src.data_processing.feature_spec import AggregationPlan, FeatureSpec
+from backend.src.data_processing.feature_store import FeatureStore
+from backend.src.data_processing.partial_aggregator import PartialAggregator
 from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.data_processing.row_sampler import RowSampler
+from backend.src.data_processing.spill_store import SpillStore
+from backend.src.data_processing.table_schema import TableSchema
+from backend.src.instrumentation.stage_profiler import StageProfiler
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def limit_worker_memory(memory_limit: int) -> None:
+    """
+    Limit the address space of the current worker process. Allocations beyond the limit raise a MemoryError.
+
+    Parameters:
+    memory_limit (int): The limit in bytes. No limit is set if None or if the platform does not support it.
+    """
+    if memory_limit is not None and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def aggregate_table_to_file(reader: 'SimpleReadData', files_path: str, file_name: str, ids, output_path: str) -> tuple:
+    """
+    Aggregate a table in a worker process and write the result to an Arrow IPC (Feather) file.
+
+    The parent process reads the file back instead of receiving a pickled DataFrame.
+    The stages recorded in the worker are sent back with the path, to be added to the profiler of the parent process.
+
+    Parameters:
+    reader (SimpleReadData): The reader aggregating the table.
+    files_path (str): The path where the files are located.
+    file_name (str): The CSV file name of the table.
+    ids: The SK_ID_CURR of the applications to aggregate.
+    output_path (str): The path of the Feather file to write.
+
+    Returns:
+    tuple: The path of the written file and the records of the stages run by the worker.
+    """
+    # The profiler was copied with the reader, along with the records of the parent process
+    reader.profiler.reset()
+    with reader.profiler.stage('aggregate', table=file_name) as record:
+        data = reader.aggregate_table(files_path, file_name, ids)
+        reader.profiler.record_data(record, data)
+    data.to_feather(output_path)
+
+    return output_path, reader.profiler.get_report()['stages']
+
 
 class SimpleReadData(ReadDataABC):
     """
     Simple implementation of the ReadDataABC abstract base class.
 
-    This class provides a simple way to read data from CSV files.
+    This class provides a simple way to read data from CSV files, or from their typed Parquet copies when available.
     """
 
+    # Version of the aggregation code, part of the fingerprint of the stored features. Increase it when an aggregation changes.
+    FEATURES_VERSION = 5
+    MODEL_DATA_FEATURES = 'model_data'
+
+    # Number of applications each sampled application stands for, when the sampling is class-aware
+    SAMPLE_WEIGHT_COLUMN = 'SAMPLE_WEIGHT'
+
+    # Tables read along with an aggregated table, e.g. bureau links bureau_balance to the applications
+    LINKED_TABLES = {
+        ReadDataABC.BUREAU_BALANCE_NAME: [ReadDataABC.BUREAU_NAME],
+    }
+
+    CSV_FORMAT = '.csv'
+    PARQUET_FORMAT = '.parquet'
+    FEATHER_FORMAT = '.feather'
+    DATA_FORMATS = [CSV_FORMAT, PARQUET_FORMAT, FEATHER_FORMAT]
+
+    STRUCTURE_CACHE_SUFFIX = '.structure.json'
+
+    JOIN_LEFT = 'left'
+    JOIN_INNER = 'inner'
+    JOIN_OUTER = 'outer'
+    JOIN_METHODS = [JOIN_LEFT, JOIN_INNER, JOIN_OUTER]
+
+    # Rows of a table read to estimate the memory of its rows, and how many times the rows read are held at once while the
+    # table is aggregated: the rows, their derived columns and the grouped or sorted copies
+    MEMORY_SAMPLE_ROWS = 1000
+    AGGREGATION_MEMORY_FACTOR = 3
+
+    # Most partitions the applications are split into to stay within a memory budget. Each partition of each table is
+    # spilled in one file per chunk and merged and joined on its own, so smaller budgets are rejected
+    MAX_SPILL_PARTITIONS = 64
+
+    # The aggregations of the tables are described in shared_config/feature_spec.json, see FeatureSpec
+
+    def __init__(self, sampling_method: str = RowSampler.HASH, chunk_size: int = RowSampler.CSV_CHUNK_SIZE, compact_dtypes: bool = False,
+                 max_workers: int = 1, worker_memory_limit: int = None, join: str = JOIN_LEFT, feature_store_path: str = None,
+                 profiler: StageProfiler = None, features: list = None, memory_budget: int = None, spill_path: str = None) -> None:
+        """
+        Initializes a new instance of the SimpleReadData class.
+
+        Parameters:
+        sampling_method (str): How rows are sampled, see RowSampler.
+        chunk_size (int): The number of rows of each chunk when a CSV file is read and filtered chunk by chunk.
+        compact_dtypes (bool): Whether to read the aggregated tables with the compact dtypes of shared_config/columns_info.json
+            (downcast integers, float32, categories) and only the columns used by their aggregation.
+        max_workers (int): The number of worker processes reading and aggregating the tables in parallel. 1 aggregates them in this process.
+        worker_memory_limit (int): The memory limit in bytes of each worker process. Ignored on platforms without the resource module.
+        join (str): How the aggregated tables are joined to the applications, 'left', 'inner' or 'outer'. See join_tables.
+        feature_store_path (str): If set, the directory where the aggregated data of each table and the joined data are stored,
+            so that they are only recomputed when their inputs change.
+        profiler (StageProfiler): The profiler recording the stages of the reads, per table. A new one if None.
+        features (list): If set, only these aggregated features are computed, and only the columns they need are read.
+            See FeatureSpec.compile.
+        memory_budget (int): If set, the memory in bytes retrieve_data should stay within, unless it is given another.
+            When the tables would not be aggregated within it, their aggregated data is spilled to disk and joined one
+            partition of the applications at a time, see retrieve_data_with_spill. No limit if None.
+        spill_path (str): The local directory the spilled data is written to. The default temporary directory if None.
+        """
+        if sampling_method not in RowSampler.METHODS:
+            raise ValueError(f"Unknown sampling method {sampling_method}. Expected one of {RowSampler.METHODS}.")
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+        if join not in self.JOIN_METHODS:
+            raise ValueError(f"Unknown join method {join}. Expected one of {self.JOIN_METHODS}.")
+
+        self.sampling_method = sampling_method
+        self.chunk_size = chunk_size
+        self.compact_dtypes = compact_dtypes
+        self.max_workers = max_workers
+        self.worker_memory_limit = worker_memory_limit
+        self.join = join
+        self.feature_store = FeatureStore(feature_store_path) if feature_store_path is not None else None
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        self.features = features
+        self.memory_budget = memory_budget
+        self.spill_path = spill_path
+        self.schema = None
+        self.feature_spec = None
+        self.plans = {}
+
+    def get_schema(self) -> TableSchema:
+        """
+        Get the schema of the tables, loaded on first use.
+
+        Returns:
+        TableSchema: The schema of the tables.
+        """
+        if self.schema is None:
+            self.schema = TableSchema()
+
+        return self.schema
+
+    def get_feature_spec(self) -> FeatureSpec:
+        """
+        Get the feature spec of the tables, loaded on first use.
+
+        Returns:
+        FeatureSpec: The feature spec of the tables.
+        """
+        if self.feature_spec is None:
+            self.feature_spec = FeatureSpec(schema=self.get_schema())
+
+        return self.feature_spec
+
+    def get_plan(self, file_name: str) -> AggregationPlan:
+        """
+        Get the aggregation plan of a table, compiled from the feature spec on first use.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        AggregationPlan: The plan. None if the table is not in the feature spec.
+        """
+        if file_name not in self.plans:
+            self.plans[file_name] = self.get_feature_spec().compile(file_name, self.features)
+
+        return self.plans[file_name]
+
+    def get_aggregation_spec(self, file_name: str) -> tuple:
+        """
+        Get the columns a table is aggregated from.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        tuple: The one-hot encoded columns, the aggregations and the other used columns. None if the table is not aggregated.
+        """
+        if file_name == ReadDataABC.BUREAU_BALANCE_NAME:
+            # The per credit aggregations, see BureauBalanceAggregator. Their aggregations per application are in the fingerprint.
+            return (['STATUS'], BureauBalanceAggregator.BALANCE_AGGREGATIONS, [BureauBalanceAggregator.ID_COLUMN, 'MONTHS_BALANCE'])
+
+        plan = self.get_plan(file_name)
+        if plan is None:
+            return None
+
+        return (plan.categorical_columns, plan.aggregations, plan.get_extra_columns())
+
+    def get_aggregation_columns(self, file_name: str) -> list:
+        """
+        Get the columns of a table used by its aggregation.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        list: The columns to read, in the order of the file. None if the table is not aggregated or not in the schema.
+        """
+        schema_columns = [column['fieldname'] for column in self.get_schema().get_columns(file_name)]
+        if not schema_columns:
+            return None
+
+        if file_name != ReadDataABC.BUREAU_BALANCE_NAME:
+            plan = self.get_plan(file_name)
+            return None if plan is None else plan.read_columns
+
+        # bureau_balance is aggregated through bureau, see BureauBalanceAggregator
+        one_hot_columns, aggregations, extra_columns = self.get_aggregation_spec(file_name)
+        used_columns = {'SK_ID_CURR', *one_hot_columns, *aggregations, *extra_columns}
+
+        return [column for column in schema_columns if column in used_columns]
+
     def one_hot_encode(self, data: pd.DataFrame, columns_names: list) -> pd.DataFrame:
         """
         One-hot encode the categorical columns in the data.
@@ -75,213 +301,770 @@ class SimpleReadData(ReadDataABC):
 
         return aggregated_data
 
-    def get_aggregated_bureau_data(self, bureau_data: pd.DataFrame) -> pd.DataFrame:
+    def count_categories(self, data: pd.DataFrame, columns_names: list, groupby_col: str, groups: pd.Index) -> pd.DataFrame:
         """
-        Aggregate the data from bureau_balance.
+        Count the occurrences of each value of the categorical columns in each group.
+
+        The counts are computed from the category codes with a single bincount per column, without building
+        the one-hot encoded columns. Missing values are not counted, as with one_hot_encode. See PartialAggregator.count_categories.
 
         Parameters:
-        bureau_data (pd.DataFrame): The data from the bureau_balance table.
+        data (pd.DataFrame): The data to count.
+        columns_names (list): The names of the categorical columns.
+        groupby_col (str): The column to group by.
+        groups (pd.Index): The groups, in the order of the result.
 
         Returns:
-        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR. 
+        pd.DataFrame: One <column>_<value>_sum column per value of each column, indexed like groups.
         """
+        counts = PartialAggregator.count_categories(data, columns_names, groupby_col, groups)
+        counts.columns = [f"{column}_{level}_sum" for column, level in counts.columns]
 
-        # Calculate the mean difference between previous credits
-        bureau_data_days_credit = bureau_data['DAYS_CREDIT'].sort_values()
-        bureau_data_days_credit_diff = bureau_data_days_credit.diff()
-        bureau_data_days_credit_diff_mean = bureau_data_days_credit_diff.mean()            
-
-        # Calculte the duration of the credit
-        # We either use the factual end date or the expected end date (if credit is not closed)
-        bureau_data = bureau_data.assign(
-            CREDIT_DURATION = np.where(
-                bureau_data['DAYS_ENDDATE_FACT'].isnull(),
-                bureau_data['DAYS_CREDIT_ENDDATE'],
-                bureau_data['DAYS_ENDDATE_FACT']
-            )
-            - bureau_data['DAYS_CREDIT'] 
-        )
-        bureau_data['CREDIT_DURATION'] = bureau_data['CREDIT_DURATION'].fillna(0).astype('int64')
-
-        one_hot_encoding_columns = [
-            'CREDIT_ACTIVE',
-            'CREDIT_CURRENCY',
-            'CREDIT_TYPE'
-        ]
-
-        bureau_data = self.one_hot_encode(bureau_data, one_hot_encoding_columns)
-
-        aggregation_dict = {
-            'DAYS_CREDIT': ['max', 'min'],
-            'CREDIT_DAY_OVERDUE': ['max', 'min', 'mean'],
-            'CREDIT_DURATION': ['max', 'min', 'mean'],
-            'AMT_CREDIT_MAX_OVERDUE': ['max', 'min', 'mean'],
-            'CNT_CREDIT_PROLONG': ['max', 'min', 'mean'],
-            'AMT_CREDIT_SUM': ['max', 'min', 'mean'],
-            'AMT_CREDIT_SUM_DEBT': ['max', 'min', 'mean'],
-            'AMT_CREDIT_SUM_LIMIT': ['max', 'min', 'mean'],
-            'AMT_CREDIT_SUM_OVERDUE': ['max', 'min', 'mean'],
-            'DAYS_CREDIT_UPDATE': ['min'],
-            'AMT_ANNUITY': ['max', 'min', 'mean'],
-        }
+        return counts
+
+    def aggregate_categorical_data(self, data: pd.DataFrame, aggregation_dict: dict, categorical_columns: list, groupby_col: str) -> pd.DataFrame:
+        """
+        Aggregate the data, counting the values of the categorical columns.
+
+        The result is the same as one_hot_encode followed by aggregate_data, without materialising the one-hot encoded columns.
+        The aggregations are computed as mergeable partial states, see PartialAggregator.
+
+        Parameters:
+        data (pd.DataFrame): The data to aggregate.
+        aggregation_dict (dict): The aggregation dictionary to use for the other columns.
+        categorical_columns (list): The categorical columns whose values are counted.
+        groupby_col (str): The column to group by.
 
-        aggregated_bureau_data = self.aggregate_data(bureau_data, aggregation_dict, one_hot_encoding_columns, 'SK_ID_CURR')
-        aggregated_bureau_data['DAYS_CREDIT_DIFF_MEAN'] = bureau_data_days_credit_diff_mean
+        Returns:
+        pd.DataFrame: The aggregated data.
+        """
+        return PartialAggregator(aggregation_dict, categorical_columns, groupby_col).aggregate([data])
+
+    def get_aggregated_bureau_data(self, bureau_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregate the data from bureau.
 
-        return aggregated_bureau_data
+        The duration of each credit (CREDIT_DURATION) and the mean difference between the consecutive credits of each
+        application (DAYS_CREDIT_DIFF_MEAN) are computed as described in the feature spec.
+
+        Parameters:
+        bureau_data (pd.DataFrame): The data from the bureau table, or its chunks, see aggregate_table.
+
+        Returns:
+        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR. 
+        """
+        return self.get_plan(ReadDataABC.BUREAU_NAME).aggregate(bureau_data)
     
     def get_aggregated_credit_card_balance_data(self, credit_card_balance_data: pd.DataFrame) -> pd.DataFrame:
         """
         Aggregate the data from credit_card_balance.
 
         Parameters:
-        credit_card_balance_data (pd.DataFrame): The data from the credit_card_balance table.
+        credit_card_balance_data (pd.DataFrame): The data from the credit_card_balance table, or its chunks, see aggregate_table.
 
         Returns:
         pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
         """
+        return self.get_plan(ReadDataABC.CREDIT_CARD_BALANCE_NAME).aggregate(credit_card_balance_data)
+
+    def get_aggregated_installments_payments_data(self, installments_payments_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregate the data from installments_payments.
+
+        Parameters:
+        installments_payments_data (pd.DataFrame): The data from the installments_payments table, or its chunks, see aggregate_table.
 
-        # One-hot encoding on NAME_CONTRACT_STATUS
-        credit_card_balance_data = self.one_hot_encode(credit_card_balance_data, ['NAME_CONTRACT_STATUS'])
+        Returns:
+        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
+        """
+        return self.get_plan(ReadDataABC.INSTALLMENTS_PAYMENTS_NAME).aggregate(installments_payments_data)
     
-        aggregate_dict = {
-            'MONTHS_BALANCE': ['max', 'min'],
-            'AMT_BALANCE': ['max', 'min', 'mean'],
-            'AMT_CREDIT_LIMIT_ACTUAL': ['max', 'min', 'mean'],
-            'AMT_DRAWINGS_ATM_CURRENT': ['max', 'min', 'mean'],
-            'AMT_DRAWINGS_CURRENT': ['max', 'min', 'mean'],
-            'AMT_DRAWINGS_OTHER_CURRENT': ['max', 'min', 'mean'],
-            'AMT_DRAWINGS_POS_CURRENT': ['max', 'min', 'mean'],
-            'AMT_INST_MIN_REGULARITY': ['max', 'min', 'mean'],
-            'AMT_PAYMENT_CURRENT': ['max', 'min', 'mean'],
-            'AMT_PAYMENT_TOTAL_CURRENT': ['max', 'min', 'mean'],
-            'AMT_RECEIVABLE_PRINCIPAL': ['max', 'min', 'mean'],
-            'AMT_RECIVABLE': ['max', 'min', 'mean'],
-            'AMT_TOTAL_RECEIVABLE': ['max', 'min', 'mean'],
-            'CNT_DRAWINGS_ATM_CURRENT': ['max', 'min', 'mean'],
-            'CNT_DRAWINGS_CURRENT': ['max', 'min', 'mean'],
-            'CNT_DRAWINGS_OTHER_CURRENT': ['max', 'min', 'mean'],
-            'CNT_DRAWINGS_POS_CURRENT': ['max', 'min', 'mean'],
-            'CNT_INSTALMENT_MATURE_CUM': ['max', 'min', 'mean'],
-            'SK_DPD': ['max', 'min', 'mean'],
-            'SK_DPD_DEF': ['max', 'min', 'mean']
-        }
+    def get_aggregated_previous_application_data(self, previous_application_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregate the data from previous_application.
 
-        aggregated_credit_card_balance_data = self.aggregate_data(credit_card_balance_data, aggregate_dict, ['NAME_CONTRACT_STATUS'], 'SK_ID_CURR')
+        Parameters:
+        previous_application_data (pd.DataFrame): The data from the previous_application table, or its chunks, see aggregate_table.
 
-        return aggregated_credit_card_balance_data
+        Returns:
+        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
+        """
+        return self.get_plan(ReadDataABC.PREVIOUS_APPLICATION_NAME).aggregate(previous_application_data)
 
-    def get_aggregated_installments_payments_data(self, installments_payments_data: pd.DataFrame) -> pd.DataFrame:
+    def get_aggregated_pos_cash_balance_data(self, pos_cash_balance_data: pd.DataFrame) -> pd.DataFrame:
         """
-        Aggregate the data from installments_payments.
+        Aggregate the data from pos_cash_balance.
 
         Parameters:
-        installments_payments_data (pd.DataFrame): The data from the installments_payments table.
+        pos_cash_balance_data (pd.DataFrame): The data from the pos_cash_balance table, or its chunks, see aggregate_table.
 
         Returns:
         pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
         """
+        return self.get_plan(ReadDataABC.POS_CASH_BALANCE_NAME).aggregate(pos_cash_balance_data)
+    
+    @staticmethod
+    def get_clustered_path(files_path: str, file_name: str, sampler: RowSampler):
+        """
+        Get the path of the clustered copy of a table if the rows to read can be read from it.
 
-        aggregate_dict = {
-            'NUM_INSTALMENT_VERSION': ['max', 'min', 'mean'],
-            'NUM_INSTALMENT_NUMBER': ['max', 'min', 'mean'],
-            'DAYS_INSTALMENT': ['max', 'min'],
-            'DAYS_ENTRY_PAYMENT': ['max', 'min'],
-            'AMT_INSTALMENT': ['max', 'min', 'mean'],
-            'AMT_PAYMENT': ['max', 'min', 'mean']
-        }
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        sampler (RowSampler): The sampling of the rows to read.
 
-        aggregated_installments_payments_data = self.aggregate_data(installments_payments_data, aggregate_dict, [], 'SK_ID_CURR')
+        Returns:
+        The path of the clustered copy, or None if the rows are not filtered on SK_ID_CURR, the table is not clustered by
+        SK_ID_CURR, its copy is not up to date, or the sampling depends on the order of the rows.
+        """
+        if sampler.ids is None or ClusteredTable.CLUSTER_KEYS.get(file_name) != RowSampler.ID_COLUMN:
+            return None
+        if sampler.sampling_frequency != 1 and sampler.method != RowSampler.HASH:
+            return None
 
-        return aggregated_installments_payments_data
-    
-    def get_aggregated_previous_application_data(self, previous_application_data: pd.DataFrame) -> pd.DataFrame:
+        return ClusteredTable.get_clustered_path(files_path, file_name)
+
+    def read_table(self, files_path: str, file_name: str, columns: list = None, sampling_frequency: int = 1, ids = None, compact: bool = False,
+                   positive_sampling_frequency: int = None) -> pd.DataFrame:
         """
-        Aggregate the data from previous_application.
+        Read a table, preferring its typed columnar copy over the CSV file when it is up to date.
+
+        When rows are filtered, the CSV file is read chunk by chunk and each chunk is filtered while the file is read,
+        and the columnar file is filtered by pyarrow while it is scanned, so the memory used scales with the rows kept.
+        The rows of some ids are read from the clustered copy of the table when it is up to date, see ClusteredTable, which
+        only reads the blocks holding them, unless the 'rows' sampling, which depends on the order of the file, is used.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        columns (list): The columns to read. All the columns are read if None.
+        sampling_frequency (int): The sampling frequency to use when reading the data. 10 means 1 out of 10 rows will be read.
+            The rows are chosen with the sampling method of the reader.
+        ids: If set, only the rows whose SK_ID_CURR is in these ids are read.
+        compact (bool): Whether to convert the columns to the compact dtypes of the schema.
+        positive_sampling_frequency (int): If set, the sampling frequency of the rows whose TARGET is 1, see RowSampler.
+
+        Returns:
+        pd.DataFrame: The data of the table.
+        """
+        columnar_path = TableSchema.get_columnar_path(files_path, file_name)
+        sampler = RowSampler(sampling_frequency, self.sampling_method, ids, self.chunk_size, positive_sampling_frequency)
+        clustered_path = self.get_clustered_path(files_path, file_name, sampler)
+
+        if clustered_path is not None:
+            read_columns = sampler.get_read_columns(columns)
+
+            data = sampler.sample(ClusteredTable(clustered_path).read(sampler.ids, read_columns))
+            if read_columns is not columns:
+                data = data[columns]
+        elif columnar_path is None:
+            dtypes = self.get_schema().get_compact_dtypes(file_name) if compact else None
+            if sampler.keeps_everything:
+                data = pd.read_csv(f"{files_path}/{file_name}", usecols=columns, dtype=dtypes)
+            else:
+                data = sampler.read_csv(f"{files_path}/{file_name}", columns=columns, dtype=dtypes)
+        else:
+            read_columns = sampler.get_read_columns(columns)
+            filters = None if sampler.ids is None else [(RowSampler.ID_COLUMN, 'in', sampler.ids.tolist())]
+
+            data = sampler.sample(pd.read_parquet(columnar_path, columns=read_columns, filters=filters))
+            if read_columns is not columns:
+                data = data[columns]
+
+        if compact:
+            data = self.get_schema().compact(data, file_name)
+
+        return data
+
+    def iter_table(self, files_path: str, file_name: str, columns: list = None, ids = None, compact: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Read a table chunk by chunk, from the same file as read_table.
+
+        The CSV and columnar files are read chunk_size rows at a time and the clustered copy block by block, each chunk
+        being filtered on the ids while the file is read, so only one chunk is held in memory.
 
         Parameters:
-        previous_application_data (pd.DataFrame): The data from the previous_application table.
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        columns (list): The columns to read. All the columns are read if None.
+        ids: If set, only the rows whose SK_ID_CURR is in these ids are read.
+        compact (bool): Whether to convert the columns of each chunk to the compact dtypes of the schema.
+
+        Returns:
+        Iterator[pd.DataFrame]: The chunks holding some rows. A single empty chunk if no row is read.
+        """
+        columnar_path = TableSchema.get_columnar_path(files_path, file_name)
+        sampler = RowSampler(1, self.sampling_method, ids, self.chunk_size)
+        clustered_path = self.get_clustered_path(files_path, file_name, sampler)
+
+        if clustered_path is not None:
+            chunks = ClusteredTable(clustered_path).iter_batches(sampler.ids, columns)
+        elif columnar_path is None:
+            dtypes = self.get_schema().get_compact_dtypes(file_name) if compact else None
+            read_columns = sampler.get_read_columns(columns)
+            mask_columns = [] if read_columns is columns else [column for column in read_columns if column not in columns]
+            csv_chunks = pd.read_csv(f"{files_path}/{file_name}", usecols=read_columns, dtype=dtypes, chunksize=self.chunk_size)
+            chunks = (sampler.sample(chunk).drop(columns=mask_columns) for chunk in csv_chunks)
+        else:
+            read_filter = None if sampler.ids is None else ds.field(RowSampler.ID_COLUMN).isin(sampler.ids.to_numpy())
+            batches = ds.dataset(columnar_path, format='parquet').to_batches(columns=columns, filter=read_filter, batch_size=self.chunk_size)
+            chunks = (batch.to_pandas() for batch in batches)
+
+        empty_chunk = None
+        nb_chunks = 0
+        for chunk in chunks:
+            if chunk.empty:
+                empty_chunk = chunk if empty_chunk is None else empty_chunk
+                continue
+
+            nb_chunks += 1
+            yield self.get_schema().compact(chunk, file_name) if compact else chunk
+
+        if nb_chunks == 0 and empty_chunk is not None:
+            yield self.get_schema().compact(empty_chunk, file_name) if compact else empty_chunk
+        elif nb_chunks == 0:
+            # The clustered copy gives no chunk when no block holds the ids, and is read without reading any block then
+            yield self.read_table(files_path, file_name, columns, ids=ids, compact=compact)
+
+    def get_aggregated_bureau_balance_data(self, files_path: str, ids) -> pd.DataFrame:
+        """
+        Aggregate the data from bureau_balance through bureau.
+
+        The monthly balances are reduced per SK_ID_BUREAU while bureau_balance is read chunk by chunk, keeping only the credits
+        of the given applications, then rolled up per SK_ID_CURR. See BureauBalanceAggregator.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        ids: The SK_ID_CURR of the applications to aggregate.
 
         Returns:
         pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
         """
+        aggregator = BureauBalanceAggregator(self.chunk_size)
 
-        # One-hot encoding of categorical columns
-        categorical_columns = [
-            'NAME_CONTRACT_TYPE',
-            'WEEKDAY_APPR_PROCESS_START',
-            'FLAG_LAST_APPL_PER_CONTRACT',
-            'NFLAG_LAST_APPL_IN_DAY',
-            'NAME_CASH_LOAN_PURPOSE',
-            'NAME_CONTRACT_STATUS',
-            'NAME_PAYMENT_TYPE',
-            'CODE_REJECT_REASON',
-            'NAME_TYPE_SUITE',
-            'NAME_CLIENT_TYPE',
-            'NAME_GOODS_CATEGORY',
-            'NAME_PORTFOLIO',
-            'NAME_PRODUCT_TYPE',
-            'CHANNEL_TYPE',
-            'NAME_SELLER_INDUSTRY',
-            'NAME_YIELD_GROUP',
-            'PRODUCT_COMBINATION',
-            'NFLAG_INSURED_ON_APPROVAL'
-        ]
-
-        previous_application_data['NFLAG_INSURED_ON_APPROVAL'] = previous_application_data['NFLAG_INSURED_ON_APPROVAL'].fillna(0).astype('int64')
-        previous_application_data = self.one_hot_encode(previous_application_data, categorical_columns)
-        
-        aggregate_dict = {
-            'AMT_ANNUITY': ['max', 'min', 'mean'],
-            'AMT_APPLICATION': ['max', 'min', 'mean'],
-            'AMT_CREDIT': ['max', 'min', 'mean'],
-            'AMT_DOWN_PAYMENT': ['max', 'min', 'mean'],
-            'AMT_GOODS_PRICE': ['max', 'min', 'mean'],
-            'HOUR_APPR_PROCESS_START': ['max', 'min', 'mean'],
-            'RATE_DOWN_PAYMENT': ['max', 'min', 'mean'],
-            'RATE_INTEREST_PRIMARY': ['max', 'min', 'mean'],
-            'RATE_INTEREST_PRIVILEGED': ['max', 'min', 'mean'],
-            'DAYS_DECISION': ['max', 'min', 'mean'],
-            'SELLERPLACE_AREA': ['max', 'min', 'mean'],
-            'CNT_PAYMENT': ['max', 'min', 'mean'],
-            'DAYS_FIRST_DRAWING': ['max', 'min', 'mean'],
-            'DAYS_FIRST_DUE': ['max', 'min', 'mean'],
-            'DAYS_LAST_DUE_1ST_VERSION': ['max', 'min', 'mean'],
-            'DAYS_LAST_DUE': ['max', 'min', 'mean'],
-            'DAYS_TERMINATION': ['max', 'min', 'mean'],
+        bureau_data = self.read_table(files_path, ReadDataABC.BUREAU_NAME, columns=['SK_ID_CURR', 'SK_ID_BUREAU'], ids=ids)
+        balance_data = aggregator.aggregate_balance(files_path, ReadDataABC.BUREAU_BALANCE_NAME, bureau_data['SK_ID_BUREAU'])
+
+        return aggregator.aggregate(bureau_data, balance_data)
+
+    def get_aggregation_methods(self) -> dict:
+        """
+        Get the aggregation method of each aggregated table.
+
+        The method of bureau_balance takes the files path and the ids of the applications instead of the data, see aggregate_table.
+
+        Returns:
+        dict: The aggregation method of each table, by CSV file name, in the order the tables are merged.
+        """
+        return {
+            ReadDataABC.BUREAU_NAME: self.get_aggregated_bureau_data,
+            ReadDataABC.CREDIT_CARD_BALANCE_NAME: self.get_aggregated_credit_card_balance_data,
+            ReadDataABC.INSTALLMENTS_PAYMENTS_NAME: self.get_aggregated_installments_payments_data,
+            ReadDataABC.PREVIOUS_APPLICATION_NAME: self.get_aggregated_previous_application_data,
+            ReadDataABC.POS_CASH_BALANCE_NAME: self.get_aggregated_pos_cash_balance_data,
+            ReadDataABC.BUREAU_BALANCE_NAME: self.get_aggregated_bureau_balance_data
         }
 
-        aggregated_previous_application_data = self.aggregate_data(previous_application_data, aggregate_dict, categorical_columns, 'SK_ID_CURR')
+    def aggregate_table(self, files_path: str, file_name: str, ids) -> pd.DataFrame:
+        """
+        Read a table and aggregate it by SK_ID_CURR, chunk by chunk.
 
-        return aggregated_previous_application_data
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        ids: The SK_ID_CURR of the applications to aggregate.
 
-    def get_aggregated_pos_cash_balance_data(self, pos_cash_balance_data: pd.DataFrame) -> pd.DataFrame:
+        Returns:
+        pd.DataFrame: The aggregated data.
         """
-        Aggregate the data from pos_cash_balance.
+        if file_name == ReadDataABC.BUREAU_BALANCE_NAME:
+            # Linked to the applications through bureau, and aggregated while it is read
+            return self.get_aggregated_bureau_balance_data(files_path, ids)
+
+        # Only the rows of the sampled applications and the columns of the plan are kept while the table is read, and each
+        # chunk is reduced to its partial states before the next one is read, see AggregationPlan.aggregate
+        columns = self.get_aggregation_columns(file_name)
+        chunks = self.iter_table(files_path, file_name, columns=columns, ids=ids, compact=self.compact_dtypes)
+
+        return self.get_aggregation_methods()[file_name](chunks)
+
+    def aggregate_tables_in_parallel(self, files_path: str, file_names: list, ids) -> dict:
+        """
+        Read and aggregate tables in parallel worker processes.
+
+        Each worker writes its result to a Feather file that is read back here, which avoids pickling large DataFrames.
+        The stages recorded by the workers are added to the profiler.
 
         Parameters:
-        pos_cash_balance_data (pd.DataFrame): The data from the pos_cash_balance table.
+        files_path (str): The path where the files are located.
+        file_names (list): The CSV file names of the tables.
+        ids: The SK_ID_CURR of the applications to aggregate.
 
         Returns:
-        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
+        dict: The aggregated data of each table, by CSV file name.
         """
-        
-        # One-hot encoding of categorical columns
-        pos_cash_balance_data = self.one_hot_encode(pos_cash_balance_data, ['NAME_CONTRACT_STATUS'])
-
-        aggregate_dict = {
-            'MONTHS_BALANCE': ['max', 'min'],
-            'CNT_INSTALMENT': ['max', 'min', 'mean'],
-            'CNT_INSTALMENT_FUTURE': ['max', 'min', 'mean'],
-            'SK_DPD': ['max', 'min', 'mean'],
-            'SK_DPD_DEF': ['max', 'min', 'mean']
+        ids = np.asarray(ids)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(file_names)), initializer=limit_worker_memory, initargs=(self.worker_memory_limit,)) as executor:
+                futures = {
+                    file_name: executor.submit(aggregate_table_to_file, self, files_path, file_name, ids, os.path.join(output_dir, f"{file_name}.feather"))
+                    for file_name in file_names
+                }
+
+                aggregated_tables = {}
+                for file_name, future in futures.items():
+                    output_path, records = future.result()
+                    self.profiler.add_records(records)
+                    aggregated_tables[file_name] = pd.read_feather(output_path)
+
+                return aggregated_tables
+
+    @staticmethod
+    def resolve_column_names(columns_lists: list) -> list:
+        """
+        Get the column names that merging the tables one after the other would give.
+
+        As with pd.merge, when a table has a column already present in the merged tables, the existing column is suffixed with '_x'
+        and the new one with '_y'.
+
+        Parameters:
+        columns_lists (list): The columns of each table, without the join key, in the order the tables are merged.
+
+        Returns:
+        list: The resolved columns of each table.
+        """
+        resolved_columns = [list(columns) for columns in columns_lists]
+
+        for i in range(1, len(resolved_columns)):
+            merged_columns = {column for columns in resolved_columns[:i] for column in columns}
+            overlap = merged_columns.intersection(resolved_columns[i])
+            if not overlap:
+                continue
+
+            for j in range(i):
+                resolved_columns[j] = [f"{column}_x" if column in overlap else column for column in resolved_columns[j]]
+            resolved_columns[i] = [f"{column}_y" if column in overlap else column for column in resolved_columns[i]]
+
+        return resolved_columns
+
+    def join_tables(self, data: pd.DataFrame, aggregated_tables: list, on: str, how: str = JOIN_LEFT) -> pd.DataFrame:
+        """
+        Join aggregated tables to the data in a single aligned concatenation.
+
+        Every table is indexed on the key once and aligned on the index of the result, instead of being merged one after the other,
+        which would copy the growing result at each merge. Columns are named as with successive merges.
+
+        Parameters:
+        data (pd.DataFrame): The main data. Its key must be unique.
+        aggregated_tables (list): The tables to join. Their key must be unique.
+        on (str): The key column.
+        how (str): 'left' keeps the rows of the data, 'inner' the rows whose key is in every table and 'outer' the rows whose key is in any table.
+
+        Returns:
+        pd.DataFrame: The joined data.
+        """
+        if how not in self.JOIN_METHODS:
+            raise ValueError(f"Unknown join method {how}. Expected one of {self.JOIN_METHODS}.")
+
+        tables = [data.set_index(on)] + [table.set_index(on) for table in aggregated_tables]
+
+        if how == self.JOIN_LEFT:
+            index = tables[0].index
+        elif how == self.JOIN_INNER:
+            index = tables[0].index
+            for table in tables[1:]:
+                index = index[index.isin(table.index)]
+        else:
+            index = tables[0].index
+            for table in tables[1:]:
+                index = index.union(table.index)
+
+        resolved_columns = self.resolve_column_names([table.columns for table in tables])
+        aligned_tables = []
+        for table, columns in zip(tables, resolved_columns):
+            table = table.set_axis(columns, axis=1)
+            aligned_tables.append(table if table.index.equals(index) else table.reindex(index))
+
+        joined_data = pd.concat(aligned_tables, axis=1)
+        joined_data.index.name = on
+        joined_data.reset_index(inplace=True)
+
+        # Keep the key at its position in the data
+        key_position = list(data.columns).index(on)
+        columns = list(joined_data.columns[1:])
+        columns.insert(key_position, on)
+
+        return joined_data[columns]
+
+    def sample_table(self, files_path: str, file_name: str, columns: list = None) -> tuple:
+        """
+        Read the first rows of a table and estimate its number of rows, without reading it.
+
+        The number of rows is read from the metadata of the columnar copy of the table when it is up to date, and estimated
+        from the size of the CSV file and the length of its first lines otherwise.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        columns (list): The columns to read. All the columns are read if None.
+
+        Returns:
+        tuple: The first MEMORY_SAMPLE_ROWS rows and the number of rows of the table.
+        """
+        columnar_path = TableSchema.get_columnar_path(files_path, file_name)
+        if columnar_path is not None:
+            parquet_file = pq.ParquetFile(columnar_path)
+            batch = next(parquet_file.iter_batches(batch_size=self.MEMORY_SAMPLE_ROWS, columns=columns), None)
+            sample = batch.to_pandas() if batch is not None else pd.DataFrame(columns=columns)
+            return sample, parquet_file.metadata.num_rows
+
+        file_path = f"{files_path}/{file_name}"
+        with open(file_path, 'rb') as f:
+            lines = list(itertools.islice(f, self.MEMORY_SAMPLE_ROWS + 1))
+        sample = pd.read_csv(file_path, usecols=columns, nrows=self.MEMORY_SAMPLE_ROWS)
+        if len(lines) <= self.MEMORY_SAMPLE_ROWS:
+            return sample, len(sample)
+
+        sample_bytes = sum(len(line) for line in lines[1:])
+
+        return sample, round((os.path.getsize(file_path) - len(lines[0])) * len(sample) / sample_bytes)
+
+    def estimate_table_memory(self, files_path: str, file_name: str) -> int:
+        """
+        Estimate the memory of the columns of a table read by its aggregation, for all its rows.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        int: The estimated memory in bytes, from the memory of its first rows, with the compact dtypes if the reader uses them.
+        """
+        sample, nb_rows = self.sample_table(files_path, file_name, self.get_aggregation_columns(file_name))
+        if sample.empty:
+            return 0
+
+        if self.compact_dtypes:
+            sample = self.get_schema().compact(sample, file_name)
+
+        return int(nb_rows * sample.memory_usage(deep=True).sum() / len(sample))
+
+    def estimate_memory(self, files_path: str, file_names: list, nb_applications: int) -> dict:
+        """
+        Estimate the memory used to aggregate each table for some of the applications.
+
+        The rows of the tables read are assumed to be in proportion to the applications. bureau_balance is not estimated,
+        as it is aggregated chunk by chunk, see BureauBalanceAggregator.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_names (list): The CSV file names of the tables.
+        nb_applications (int): The number of applications the tables are aggregated for.
+
+        Returns:
+        dict: The estimated memory in bytes of each table, by CSV file name.
+        """
+        _, total_applications = self.sample_table(files_path, ReadDataABC.APPLICATION_TRAIN_NAME, ['SK_ID_CURR'])
+        fraction = min(nb_applications / total_applications, 1.0) if total_applications else 1.0
+
+        return {
+            file_name: int(self.AGGREGATION_MEMORY_FACTOR * fraction * self.estimate_table_memory(files_path, file_name))
+            for file_name in file_names if file_name != ReadDataABC.BUREAU_BALANCE_NAME
         }
 
-        aggregated_pos_cash_balance_data = self.aggregate_data(pos_cash_balance_data, aggregate_dict, ['NAME_CONTRACT_STATUS'], 'SK_ID_CURR')
+    def get_nb_partitions(self, files_path: str, file_names: list, train_data: pd.DataFrame, memory_budget: int = None) -> int:
+        """
+        Get the number of partitions of the applications the tables are aggregated in, to stay within the memory budget.
 
-        return aggregated_pos_cash_balance_data
-    
-    def retrieve_data(self, files_path: str, sampling_frequency: int) -> pd.DataFrame:
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_names (list): The CSV file names of the tables to aggregate.
+        train_data (pd.DataFrame): The applications.
+        memory_budget (int): The memory budget in bytes. The one of the reader if None.
+
+        Returns:
+        int: 1 if there is no memory budget or the tables are expected to be aggregated within it, see retrieve_data.
+            Otherwise, enough partitions for the largest table to be aggregated within half of the budget, the other half
+            being left to the applications and the joined data.
+
+        Raises:
+        ValueError: If the budget needs more than MAX_SPILL_PARTITIONS partitions.
+        """
+        memory_budget = self.memory_budget if memory_budget is None else memory_budget
+        if memory_budget is None or not file_names:
+            return 1
+
+        with self.profiler.stage('estimate_memory') as record:
+            tables_memory = sorted(self.estimate_memory(files_path, file_names, len(train_data)).values(), reverse=True)
+            # Up to max_workers tables are aggregated at once
+            estimated_memory = int(train_data.memory_usage(deep=True).sum()) + sum(tables_memory[:self.max_workers])
+
+            nb_partitions = 1
+            if estimated_memory > memory_budget:
+                nb_partitions = int(max(np.ceil(2 * tables_memory[0] / memory_budget), 2))
+
+            record.update(estimated_memory=estimated_memory, memory_budget=memory_budget, partitions=nb_partitions)
+
+        if nb_partitions > self.MAX_SPILL_PARTITIONS:
+            raise ValueError(f"The memory budget of {memory_budget} bytes is too small: the tables would be aggregated in {nb_partitions} "
+                             f"partitions, at most {self.MAX_SPILL_PARTITIONS} are supported. Expected a budget of at least "
+                             f"{int(np.ceil(2 * tables_memory[0] / self.MAX_SPILL_PARTITIONS))} bytes.")
+
+        return min(nb_partitions, max(len(train_data), 2))
+
+    def get_spilled_columns(self, file_name: str, column_lists: list) -> list:
+        """
+        Get the columns the aggregated data of a table would have if it was aggregated at once, from those of its partitions.
+
+        Each partition only counts the values of the categorical columns found in its rows. The values counted are those
+        of the categories, found in every partition, or those found, sorted, see PartialAggregator.get_levels.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        column_lists (list): The columns of the aggregated data of each partition.
+
+        Returns:
+        list: The columns of the aggregated data.
+        """
+        columns = list(dict.fromkeys(column for partition_columns in column_lists for column in partition_columns))
+        plan = self.get_plan(file_name)
+        if plan is None or all(len(partition_columns) == len(columns) for partition_columns in column_lists):
+            return columns
+
+        ordered_columns = [plan.groupby_col] + [f"{column}_{function}" for column, functions in plan.aggregations.items() for function in functions]
+        sequence_columns = list(plan.sequences.get('features', {}))
+        counted_columns = [column for column in columns if column not in ordered_columns and column not in sequence_columns]
+
+        # The longest names first, so that the values of a column whose name starts with another one are not taken by it
+        level_columns = {}
+        for column in sorted(plan.categorical_columns, key=len, reverse=True):
+            level_columns[column] = [name for name in counted_columns if name.startswith(f"{column}_") and name.endswith('_sum')]
+            counted_columns = [name for name in counted_columns if name not in level_columns[column]]
+
+        for column in plan.categorical_columns:
+            if any(set(level_columns[column]) - set(partition_columns) for partition_columns in column_lists):
+                level_columns[column].sort(key=lambda name: name[len(column) + 1:-len('_sum')])
+            ordered_columns += level_columns[column]
+
+        return ordered_columns + counted_columns + sequence_columns
+
+    def get_spilled_schema(self, spill_store: SpillStore, file_name: str) -> pa.Schema:
+        """
+        Get the schema the spilled partitions of the aggregated data of a table are read with.
+
+        Parameters:
+        spill_store (SpillStore): The store of the partitions.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        pa.Schema: The columns of the aggregated data, see get_spilled_columns, and their types.
+        """
+        schema = spill_store.get_schema(file_name)
+        columns = self.get_spilled_columns(file_name, spill_store.get_columns(file_name))
+
+        return pa.schema([schema.field(column) for column in columns])
+
+    def read_spilled_table(self, spill_store: SpillStore, file_name: str, schema: pa.Schema, partition: int = None) -> pd.DataFrame:
+        """
+        Read the aggregated data of a table spilled partition by partition.
+
+        Parameters:
+        spill_store (SpillStore): The store of the partitions.
+        file_name (str): The CSV file name of the table.
+        schema (pa.Schema): The schema of the aggregated data, see get_spilled_schema.
+        partition (int): The partition to read. All of them, sorted by SK_ID_CURR, if None.
+
+        Returns:
+        pd.DataFrame: The aggregated data.
+        """
+        if partition is None:
+            data = spill_store.concat(file_name, schema).sort_values('SK_ID_CURR', ignore_index=True)
+        else:
+            data = spill_store.read(file_name, partition, schema)
+
+        # The values of a categorical column that a partition does not have are counted 0 times in it
+        for field in schema:
+            if pa.types.is_integer(field.type) and data[field.name].isna().any():
+                data[field.name] = data[field.name].fillna(0).astype(field.type.to_pandas_dtype())
+
+        return data
+
+    @staticmethod
+    def spill_table(spill_store: SpillStore, file_name: str, table: pd.DataFrame, partition_ids: list) -> None:
+        """
+        Spill the aggregated data of a table computed at once, one partition of the applications per file.
+
+        Parameters:
+        spill_store (SpillStore): The store of the partitions.
+        file_name (str): The CSV file name of the table.
+        table (pd.DataFrame): The aggregated data.
+        partition_ids (list): The SK_ID_CURR of each partition, see SpillStore.partition_ids.
+        """
+        for partition, ids in enumerate(partition_ids):
+            spill_store.write(file_name, partition, table[table['SK_ID_CURR'].isin(ids)])
+
+    def spill_aggregated_table(self, spill_store: SpillStore, files_path: str, file_name: str, ids, nb_partitions: int) -> None:
+        """
+        Aggregate a table in a single pass over its file and spill its aggregated data, one partition of the applications per file.
+
+        Each chunk of the table is reduced to its partial states, which are split by partition and spilled along with the
+        columns of the sequence features, see AggregationPlan.aggregate. Then the states of each partition are merged and
+        finalized with the values of the categorical columns counted in any partition, so that every partition has the
+        columns the table would have if it was aggregated at once. Only a chunk, or the states and sequence rows of a
+        partition, are held in memory. bureau_balance, aggregated per credit while it is read, is aggregated at once.
+
+        Parameters:
+        spill_store (SpillStore): The store of the partitions.
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        ids: The SK_ID_CURR of the applications to aggregate.
+        nb_partitions (int): The number of partitions.
+        """
+        plan = self.get_plan(file_name) if file_name != ReadDataABC.BUREAU_BALANCE_NAME else None
+        if plan is None:
+            self.spill_table(spill_store, file_name, self.aggregate_table(files_path, file_name, ids), SpillStore.partition_ids(ids, nb_partitions))
+            return
+
+        aggregator = plan.get_aggregator()
+        sequence_aggregator = plan.get_sequence_aggregator()
+        sequence_columns = [plan.groupby_col, *sequence_aggregator.get_columns()] if sequence_aggregator is not None else []
+        states_name, sequences_name = f"{file_name}.states", f"{file_name}.sequences"
+
+        # The states are spilled with positional column names, their (column, state) columns being kept for each chunk
+        state_columns = []
+        dtypes = {}
+        chunks = self.iter_table(files_path, file_name, columns=self.get_aggregation_columns(file_name), ids=ids, compact=self.compact_dtypes)
+        for part, chunk in enumerate(chunks):
+            chunk = plan.prepare(chunk)
+            for column in [*aggregator.aggregations, *aggregator.categorical_columns]:
+                dtypes[column] = aggregator.merge_dtypes(dtypes.get(column), chunk[column].dtype)
+
+            states = aggregator.partial(chunk)
+            state_columns.append(list(states.columns))
+            if part == 0:
+                empty_states, empty_rows = states.iloc[:0], chunk[sequence_columns].iloc[:0]
+            # Converted to Arrow once, then sliced for each partition
+            state_partitions = SpillStore.get_partition(states.index, nb_partitions)
+            states = pa.Table.from_pandas(states.set_axis([str(position) for position in range(len(states.columns))], axis=1).reset_index(), preserve_index=False)
+            rows = pa.Table.from_pandas(chunk[sequence_columns], preserve_index=False) if sequence_columns else None
+            row_partitions = SpillStore.get_partition(chunk[plan.groupby_col], nb_partitions) if sequence_columns else None
+            for partition in np.unique(state_partitions):
+                spill_store.write(states_name, partition, states.filter(state_partitions == partition), part)
+                if sequence_columns:
+                    spill_store.write(sequences_name, partition, rows.filter(row_partitions == partition), part)
+            del chunk, states, rows
+
+        # The values counted in any partition, in the order they would have if the table was aggregated at once
+        counted_states = pd.DataFrame(columns=pd.MultiIndex.from_tuples(list(dict.fromkeys(column for columns in state_columns for column in columns))))
+        levels = {column: PartialAggregator.get_levels(counted_states, column, dtypes.get(column)) for column in aggregator.categorical_columns}
+        aggregator = plan.get_aggregator(levels)
+
+        for partition in range(nb_partitions):
+            with self.profiler.stage('merge', table=file_name, partition=partition) as record:
+                partials = []
+                for part in spill_store.get_parts(states_name, partition):
+                    states = spill_store.read(states_name, partition, part=part).set_index(plan.groupby_col)
+                    partials.append(states.set_axis(pd.MultiIndex.from_tuples(state_columns[part]), axis=1))
+                table = aggregator.finalize(aggregator.merge(partials or [empty_states]), dtypes)
+
+                if sequence_aggregator is not None:
+                    rows = [spill_store.read(sequences_name, partition, part=part) for part in spill_store.get_parts(sequences_name, partition)]
+                    rows = pd.concat(rows, ignore_index=True) if rows else empty_rows
+                    table = table.merge(sequence_aggregator.aggregate(rows), on=plan.groupby_col, how='left')
+
+                spill_store.write(file_name, partition, table)
+                self.profiler.record_data(record, table)
+                del partials, table
+
+    def retrieve_data_with_spill(self, files_path: str, file_names: list, train_data: pd.DataFrame, aggregated_tables: dict,
+                                 nb_partitions: int, fingerprints: dict = None) -> pd.DataFrame:
+        """
+        Aggregate the tables and join them to the applications one partition of the applications at a time, spilling
+        the aggregated data and the joined partitions to disk.
+
+        The applications are split by a hash of SK_ID_CURR, see SpillStore, and the tables are aggregated one after the
+        other in this process, each in a single pass over its file: the partial states of each chunk are spilled by
+        partition, then merged one partition at a time, see spill_aggregated_table. Then each partition of the
+        applications is joined to the aggregated data of its partition of every table and written to disk, and the
+        joined partitions are read back as a single frame, in the order of the applications.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_names (list): The CSV file names of the tables, in the order they are joined.
+        train_data (pd.DataFrame): The applications.
+        aggregated_tables (dict): The aggregated data of the tables loaded from the feature store, by CSV file name. They are
+            removed from the dict once spilled. The other tables are aggregated.
+        nb_partitions (int): The number of partitions.
+        fingerprints (dict): The fingerprint of each table, to save the aggregated tables to the feature store, if any.
+
+        Returns:
+        pd.DataFrame: The joined data, as retrieve_data returns it.
+        """
+        partition_ids = SpillStore.partition_ids(train_data['SK_ID_CURR'], nb_partitions)
+
+        with SpillStore(self.spill_path) as spill_store:
+            schemas = {}
+            for file_name in file_names:
+                stored_table = aggregated_tables.pop(file_name, None)
+
+                if stored_table is not None:
+                    self.spill_table(spill_store, file_name, stored_table, partition_ids)
+                else:
+                    with self.profiler.stage('aggregate', table=file_name, partitions=nb_partitions):
+                        self.spill_aggregated_table(spill_store, files_path, file_name, train_data['SK_ID_CURR'], nb_partitions)
+
+                schemas[file_name] = self.get_spilled_schema(spill_store, file_name)
+                if stored_table is None and self.feature_store is not None:
+                    self.feature_store.save(file_name, fingerprints[file_name], self.read_spilled_table(spill_store, file_name, schemas[file_name]))
+                del stored_table
+
+            with self.profiler.stage('join') as record:
+                for partition, ids in enumerate(partition_ids):
+                    tables = [self.read_spilled_table(spill_store, file_name, schemas[file_name], partition) for file_name in file_names]
+                    partition_data = self.join_tables(train_data[train_data['SK_ID_CURR'].isin(ids)], tables, on='SK_ID_CURR', how=self.join)
+                    spill_store.write(self.MODEL_DATA_FEATURES, partition, partition_data)
+                    del tables, partition_data
+
+                data = spill_store.concat(self.MODEL_DATA_FEATURES)
+                positions = pd.Index(train_data['SK_ID_CURR']).get_indexer(data['SK_ID_CURR'])
+                data = data.take(np.argsort(positions, kind='stable')).reset_index(drop=True)
+                self.profiler.record_data(record, data)
+
+        return data
+
+    def get_table_fingerprint(self, files_path: str, file_name: str, sampling_frequency: int, positive_sampling_frequency: int = None) -> str:
+        """
+        Get the fingerprint of the inputs of the aggregated data of a table.
+
+        The aggregated data depends on the table, on the sampled applications and on how the table is read and aggregated.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        sampling_frequency (int): The sampling frequency of the applications.
+        positive_sampling_frequency (int): The sampling frequency of the applications whose TARGET is 1, if it is another one.
+
+        Returns:
+        str: The fingerprint of the aggregated data.
+        """
+        return FeatureStore.fingerprint(
+            version=self.FEATURES_VERSION,
+            table=FeatureStore.source_fingerprint(files_path, file_name),
+            linked_tables=[FeatureStore.source_fingerprint(files_path, linked_file_name) for linked_file_name in self.LINKED_TABLES.get(file_name, [])],
+            applications=FeatureStore.source_fingerprint(files_path, ReadDataABC.APPLICATION_TRAIN_NAME),
+            aggregation=self.get_aggregation_spec(file_name),
+            bureau_aggregation=BureauBalanceAggregator.BUREAU_AGGREGATIONS if file_name == ReadDataABC.BUREAU_BALANCE_NAME else None,
+            feature_spec=self.get_feature_spec().get_table_spec(file_name),
+            features=self.features,
+            sampling_frequency=sampling_frequency,
+            positive_sampling_frequency=positive_sampling_frequency,
+            sampling_method=self.sampling_method,
+            compact_dtypes=self.compact_dtypes
+        )
+
+    def retrieve_data(self, files_path: str, sampling_frequency: int, positive_sampling_frequency: int = None,
+                      memory_budget: int = None) -> pd.DataFrame:
         """
         Read data from a list of CSV files.
 
@@ -291,54 +1074,161 @@ class SimpleReadData(ReadDataABC):
         Parameters:
         files_path (str): The path where the files are located.
         sampling_frequency (int): The sampling frequency to use when reading the data. 10 means 1 out of 10 rows will be read.
+        positive_sampling_frequency (int): If set, the sampling frequency of the applications whose TARGET is 1, e.g. 1 to
+            keep all of them, sampling_frequency being the one of the others. The data then has a SAMPLE_WEIGHT column, the
+            number of applications each sampled one stands for, see RowSampler. Only the rows of the child tables of the
+            sampled applications are read.
+        memory_budget (int): The memory in bytes the read should stay within, e.g. the budget of a request. The one of
+            the reader if None.
+
+        When there is a memory budget and the tables to aggregate are expected to go over it, see get_nb_partitions,
+        they are aggregated and joined partition by partition, spilling to disk, see retrieve_data_with_spill.
 
         Returns:
         pd.DataFrame: The data read from the files as a pandas DataFrame.
         """
+        file_names = list(self.get_aggregation_methods())
+
+        if self.feature_store is not None:
+            fingerprints = {
+                file_name: self.get_table_fingerprint(files_path, file_name, sampling_frequency, positive_sampling_frequency)
+                for file_name in file_names
+            }
+            data_fingerprint = FeatureStore.fingerprint(tables=fingerprints, join=self.join)
+
+            # Nothing changed since the last run, e.g. only the model settings did
+            stored_data = self.feature_store.load(self.MODEL_DATA_FEATURES, data_fingerprint)
+            if stored_data is not None:
+                return stored_data
+
         # Initialize an empty list to store the data from each file
         data = []
 
-        train_data = pd.read_csv(f"{files_path}/{ReadDataABC.APPLICATION_TRAIN_NAME}", skiprows=lambda i: i % sampling_frequency != 0)
+        with self.profiler.stage('read_table', table=ReadDataABC.APPLICATION_TRAIN_NAME) as record:
+            train_data = self.read_table(files_path, ReadDataABC.APPLICATION_TRAIN_NAME, sampling_frequency=sampling_frequency,
+                                         positive_sampling_frequency=positive_sampling_frequency)
+            self.profiler.record_data(record, train_data)
+
+        sampler = RowSampler(sampling_frequency, self.sampling_method, positive_sampling_frequency=positive_sampling_frequency)
+        if sampler.is_class_aware:
+            train_data[self.SAMPLE_WEIGHT_COLUMN] = sampler.get_weights(train_data)
 
         data = train_data
-        
-        data_files = {
-            ReadDataABC.BUREAU_NAME: self.get_aggregated_bureau_data,
-            ReadDataABC.CREDIT_CARD_BALANCE_NAME: self.get_aggregated_credit_card_balance_data,
-            ReadDataABC.INSTALLMENTS_PAYMENTS_NAME: self.get_aggregated_installments_payments_data,
-            ReadDataABC.PREVIOUS_APPLICATION_NAME: self.get_aggregated_previous_application_data,
-            ReadDataABC.POS_CASH_BALANCE_NAME: self.get_aggregated_pos_cash_balance_data
-        }
 
-        for file_name, aggregation_method in data_files.items():
-            temp_data = pd.read_csv(f"{files_path}/{file_name}")
-            temp_data = temp_data[temp_data['SK_ID_CURR'].isin(train_data['SK_ID_CURR'])]
-            aggregated_data = aggregation_method(temp_data)
-            data = pd.merge(data, aggregated_data, on="SK_ID_CURR", how="outer")
-     
-        # Concatenate all the data into a single DataFrame
+        aggregated_tables = {}
+        if self.feature_store is not None:
+            for file_name in file_names:
+                stored_table = self.feature_store.load(file_name, fingerprints[file_name])
+                if stored_table is not None:
+                    aggregated_tables[file_name] = stored_table
+
+        # Only the tables whose inputs changed are aggregated
+        missing_file_names = [file_name for file_name in file_names if file_name not in aggregated_tables]
+
+        # Over the memory budget, the tables are aggregated and joined partition by partition, spilling to disk
+        nb_partitions = self.get_nb_partitions(files_path, missing_file_names, train_data, memory_budget)
+        if nb_partitions > 1:
+            data = self.retrieve_data_with_spill(files_path, file_names, train_data, aggregated_tables, nb_partitions,
+                                                 fingerprints if self.feature_store is not None else None)
+            if self.feature_store is not None:
+                self.feature_store.save(self.MODEL_DATA_FEATURES, data_fingerprint, data)
+            return data
+
+        if self.max_workers > 1 and len(missing_file_names) > 1:
+            computed_tables = self.aggregate_tables_in_parallel(files_path, missing_file_names, train_data['SK_ID_CURR'])
+        else:
+            computed_tables = {}
+            for file_name in missing_file_names:
+                with self.profiler.stage('aggregate', table=file_name) as record:
+                    computed_tables[file_name] = self.aggregate_table(files_path, file_name, train_data['SK_ID_CURR'])
+                    self.profiler.record_data(record, computed_tables[file_name])
+
+        if self.feature_store is not None:
+            for file_name, computed_table in computed_tables.items():
+                self.feature_store.save(file_name, fingerprints[file_name], computed_table)
+
+        aggregated_tables.update(computed_tables)
+
+        # Join all the data into a single DataFrame
+        with self.profiler.stage('join') as record:
+            data = self.join_tables(data, [aggregated_tables[file_name] for file_name in file_names], on="SK_ID_CURR", how=self.join)
+            self.profiler.record_data(record, data)
+
+        if self.feature_store is not None:
+            self.feature_store.save(self.MODEL_DATA_FEATURES, data_fingerprint, data)
+
         return data
-    
-    def write_data_for_model(self, files_path : str, filename: str, sampling_frequency: int = 1):
+
+    @classmethod
+    def get_data_format(cls, filename: str) -> str:
+        """
+        Get the format of a data file from its extension. Files with another extension are CSV files.
+
+        Parameters:
+        filename (str): The name of the file.
+
+        Returns:
+        str: The extension of the format, one of DATA_FORMATS.
+        """
+        extension = os.path.splitext(filename)[1].lower()
+
+        return extension if extension in cls.DATA_FORMATS else cls.CSV_FORMAT
+
+    def write_data_for_model(self, files_path : str, filename: str, sampling_frequency: int = 1, positive_sampling_frequency: int = None,
+                             memory_budget: int = None) -> pd.DataFrame:
         """
         Write the data for the model.
         It is a merge of the training data and the aggregated data from the other tables.
 
+        The format depends on the extension of the file: CSV, or Parquet and Feather which keep the dtypes and are much faster
+        to write and read back. Binary files are written to a temporary file first so that an interrupted write never leaves
+        a partial file.
+
         Parameters:
         files_path (str): The path where the file are located.
         filename (str): The name of the file to write.
+        sampling_frequency (int): The sampling frequency of the applications, see retrieve_data.
+        positive_sampling_frequency (int): The sampling frequency of the applications whose TARGET is 1, see retrieve_data.
+        memory_budget (int): The memory in bytes the read should stay within, see retrieve_data. The one of the reader if None.
+
+        Returns:
+        pd.DataFrame: The data written, so that it can be used without reading the file back. Unlike the file, it has the
+            SAMPLE_WEIGHT column when the applications are sampled by class, see retrieve_data.
         """
+        data_format = self.get_data_format(filename)
         
-        data = self.retrieve_data(files_path, sampling_frequency=sampling_frequency)
-    
-        data.to_csv(f"{files_path}/{filename}", index=False)
+        with self.profiler.stage('retrieve_data') as record:
+            data = self.retrieve_data(files_path, sampling_frequency=sampling_frequency, positive_sampling_frequency=positive_sampling_frequency,
+                                      memory_budget=memory_budget)
+            self.profiler.record_data(record, data)
+
+        # The sample weights are only used to train the model, they are not a feature of the loans, see /generate_structure
+        weights = data.pop(self.SAMPLE_WEIGHT_COLUMN) if self.SAMPLE_WEIGHT_COLUMN in data.columns else None
+
+        try:
+            with self.profiler.stage('write_data_for_model', format=data_format):
+                if data_format == self.CSV_FORMAT:
+                    data.to_csv(f"{files_path}/{filename}", index=False)
+                    return data
+
+                temp_path = f"{files_path}/{filename}.tmp"
+                if data_format == self.PARQUET_FORMAT:
+                    data.to_parquet(temp_path, index=False)
+                else:
+                    data.to_feather(temp_path)
+                os.replace(temp_path, f"{files_path}/{filename}")
+        finally:
+            if weights is not None:
+                data[self.SAMPLE_WEIGHT_COLUMN] = weights
+
+        return data
 
     def read_data(self, file_path: str, filename: str):
         """
-        Read data from a CSV file.
+        Read data from a file.
 
         This method reads the file specified by filename from the directory specified by file_path.
-        It assumes that the file is in CSV format.
+        Its format is given by its extension, see write_data_for_model.
 
         Parameters:
         file_path (str): The path where the file is located.
@@ -347,8 +1237,15 @@ class SimpleReadData(ReadDataABC):
         Returns:
         pd.DataFrame: The data read from the file as a pandas DataFrame.
         """
+        data_format = self.get_data_format(filename)
+
         # Read the data from the file
-        data = pd.read_csv(f"{file_path}/{filename}")
+        if data_format == self.PARQUET_FORMAT:
+            data = pd.read_parquet(f"{file_path}/{filename}")
+        elif data_format == self.FEATHER_FORMAT:
+            data = pd.read_feather(f"{file_path}/{filename}")
+        else:
+            data = pd.read_csv(f"{file_path}/{filename}")
 
         # Return the data
         return data
@@ -360,28 +1257,83 @@ class SimpleReadData(ReadDataABC):
         This method writes the data structure to a JSON file.
         It assumes that the file is in JSON format.
 
+        The structure is built in a single pass, see DataStructureBuilder.
+
         Parameters:
+        data (pd.DataFrame): The data whose structure is written.
         file_path (str): The path where the file is located.
         filename (str): The name of the file to write.
         """
     
-        schema = {}
-        for col in data.columns:
-            # Determine the datatype of the column
-            dtype = str(data[col].dtype)
-
-            # If the datatype is numerical or there are too many unique values, skip the values list
-            if (dtype.startswith('int') and data[col].nunique() > 2 ) or dtype.startswith('float') :
-                schema[col] = {'type': dtype}
-            else:
-                # For non-numerical types
-                unique_values = data[col].dropna().unique()
-               
-                schema[col] = {
-                    'type': dtype,
-                    'values': unique_values.tolist()
-                }
+        schema = DataStructureBuilder().build(data)
 
         with open(f"{file_path}/{filename}", 'w') as f:
             json.dump(schema, f, indent=4)
 
+    def read_data_batches(self, file_path: str, filename: str, batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Read data from a file batch by batch.
+
+        Parquet files are read by batches of rows. The other formats are read at once, in a single batch.
+
+        Parameters:
+        file_path (str): The path where the file is located.
+        filename (str): The name of the file to read.
+        batch_size (int): The number of rows of each batch.
+
+        Returns:
+        Iterator[pd.DataFrame]: The batches of the data.
+        """
+        if self.get_data_format(filename) == self.PARQUET_FORMAT:
+            for batch in pq.ParquetFile(f"{file_path}/{filename}").iter_batches(batch_size=batch_size):
+                yield batch.to_pandas()
+        else:
+            yield self.read_data(file_path, filename)
+
+    def write_data_file_structure_json(self, data_path: str, data_filename: str, file_path: str, filename: str) -> bool:
+        """
+        Write the data structure of a data file to a JSON file, reusing the last structure built if the data file did not change.
+
+        The structure is built batch by batch from the data file and cached next to it, along with the size and modification time
+        of the data file.
+
+        Parameters:
+        data_path (str): The path where the data file is located.
+        data_filename (str): The name of the data file.
+        file_path (str): The path where the JSON file is located.
+        filename (str): The name of the JSON file to write.
+
+        Returns:
+        bool: True if the cached structure was used, False if it was built.
+        """
+        stat = os.stat(f"{data_path}/{data_filename}")
+        data_fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        cache_path = f"{data_path}/{data_filename}{self.STRUCTURE_CACHE_SUFFIX}"
+
+        cache = None
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, 'r') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = None
+
+        is_cached = cache is not None and cache.get('data') == data_fingerprint
+        if is_cached:
+            schema = cache['structure']
+        else:
+            builder = DataStructureBuilder()
+            for batch in self.read_data_batches(data_path, data_filename, DataStructureBuilder.BATCH_SIZE):
+                builder.update(batch)
+            schema = builder.get_structure()
+
+            temp_path = f"{cache_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'data': data_fingerprint, 'structure': schema}, f)
+            os.replace(temp_path, cache_path)
+
+        with open(f"{file_path}/{filename}", 'w') as f:
+            json.dump(schema, f, indent=4)
+
+        return is_cached
+
@@ -0,0 +1,248 @@
+import os
+import shutil
+import tempfile
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from backend.src.data_processing.row_sampler import RowSampler
+
+
+class SpillStore:
+    """
+    Temporary store on local disk for the frames of a run that do not fit in memory at once.
+
+    The applications are split into partitions by a hash of SK_ID_CURR, so that a partition holds every row of its
+    applications in every table, and each frame computed for a partition, e.g. the aggregated data of a table, is
+    written to an Arrow IPC (Feather) file as soon as it is computed. A frame can also be written in parts, e.g. one per
+    chunk of a table. The frames of a name are read back one partition at a time, or all at once with concat. The files
+    are removed when the store is closed.
+    """
+
+    EXTENSION = '.feather'
+
+    def __init__(self, spill_path: str = None) -> None:
+        """
+        Create the temporary directory of the store.
+
+        Parameters:
+        spill_path (str): The directory the temporary directory is created in, e.g. on a local disk with enough space.
+            The default temporary directory if None.
+        """
+        if spill_path is not None:
+            os.makedirs(spill_path, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix='spill_', dir=spill_path)
+
+    def __enter__(self) -> 'SpillStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Remove the files of the store.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def get_partition(ids, nb_partitions: int) -> np.ndarray:
+        """
+        Get the partition of ids from their hash, independently of their order and of the other ids.
+
+        Parameters:
+        ids: The SK_ID_CURR, e.g. those of the rows of a table.
+        nb_partitions (int): The number of partitions.
+
+        Returns:
+        np.ndarray: The partition of each id.
+        """
+        return (RowSampler.hash_ids(np.asarray(ids)) % np.uint64(nb_partitions)).astype('int64')
+
+    @classmethod
+    def partition_ids(cls, ids, nb_partitions: int) -> List[np.ndarray]:
+        """
+        Split ids into partitions by their hash, see get_partition.
+
+        Parameters:
+        ids: The SK_ID_CURR to split.
+        nb_partitions (int): The number of partitions.
+
+        Returns:
+        List[np.ndarray]: The ids of each partition, in the order they were given.
+        """
+        ids = np.asarray(ids)
+        partitions = cls.get_partition(ids, nb_partitions)
+
+        return [ids[partitions == partition] for partition in range(nb_partitions)]
+
+    def get_path(self, name: str, partition: int, part: int = None) -> str:
+        """
+        Get the path of the frame of a partition.
+
+        Parameters:
+        name (str): The name of the frames, e.g. the CSV file name of a table.
+        partition (int): The partition.
+        part (int): The part of the frame, if it is written in parts.
+
+        Returns:
+        str: The path of the file.
+        """
+        part_suffix = '' if part is None else f".{part}"
+
+        return os.path.join(self.path, f"{name}.{partition}{part_suffix}{self.EXTENSION}")
+
+    def write(self, name: str, partition: int, data: Union[pd.DataFrame, pa.Table], part: int = None) -> None:
+        """
+        Write the frame of a partition, or one of its parts.
+
+        Parameters:
+        name (str): The name of the frames.
+        partition (int): The partition.
+        data (Union[pd.DataFrame, pa.Table]): The frame, or its Arrow table, e.g. a slice of a table converted once for
+            all the partitions. The index of a frame is not kept.
+        part (int): The part of the frame, e.g. the chunk of the table it is computed from. The whole frame if None.
+        """
+        if isinstance(data, pa.Table):
+            feather.write_feather(data, self.get_path(name, partition, part))
+        else:
+            data.reset_index(drop=True).to_feather(self.get_path(name, partition, part))
+
+    def get_parts(self, name: str, partition: int) -> List[int]:
+        """
+        Get the parts written for the frame of a partition.
+
+        Parameters:
+        name (str): The name of the frames.
+        partition (int): The partition.
+
+        Returns:
+        List[int]: The parts, sorted.
+        """
+        prefix = f"{name}.{partition}."
+
+        return sorted(
+            int(file_name[len(prefix):-len(self.EXTENSION)]) for file_name in os.listdir(self.path)
+            if file_name.startswith(prefix) and file_name.endswith(self.EXTENSION) and file_name[len(prefix):-len(self.EXTENSION)].isdigit()
+        )
+
+    def get_partitions(self, name: str) -> List[int]:
+        """
+        Get the partitions written for a name.
+
+        Parameters:
+        name (str): The name of the frames.
+
+        Returns:
+        List[int]: The partitions, sorted.
+        """
+        prefix = f"{name}."
+
+        return sorted(
+            int(file_name[len(prefix):-len(self.EXTENSION)]) for file_name in os.listdir(self.path)
+            if file_name.startswith(prefix) and file_name.endswith(self.EXTENSION) and file_name[len(prefix):-len(self.EXTENSION)].isdigit()
+        )
+
+    def read_schema(self, name: str, partition: int) -> pa.Schema:
+        """
+        Read the schema of the frame of a partition from the footer of its file, without reading its data.
+
+        Parameters:
+        name (str): The name of the frames.
+        partition (int): The partition.
+
+        Returns:
+        pa.Schema: The schema of the frame.
+        """
+        with pa.memory_map(self.get_path(name, partition)) as source:
+            return pa.ipc.open_file(source).schema
+
+    def get_columns(self, name: str) -> List[List[str]]:
+        """
+        Get the columns of the frame of each partition of a name, without reading their data.
+
+        Parameters:
+        name (str): The name of the frames.
+
+        Returns:
+        List[List[str]]: The columns of each partition, see get_partitions.
+        """
+        return [self.read_schema(name, partition).names for partition in self.get_partitions(name)]
+
+    def get_schema(self, name: str) -> pa.Schema:
+        """
+        Get the schema the frames of all the partitions of a name can be read with, without reading their data.
+
+        Parameters:
+        name (str): The name of the frames.
+
+        Returns:
+        pa.Schema: The columns of all the partitions, in the order they first appear, with the types they are promoted
+            to, e.g. a column of integers in a partition and floats in another is read as floats.
+        """
+        schemas = [self.read_schema(name, partition) for partition in self.get_partitions(name)]
+
+        return pa.unify_schemas(schemas, promote_options='permissive').remove_metadata()
+
+    @staticmethod
+    def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+        """
+        Give a table the columns and types of a schema.
+
+        Parameters:
+        table (pa.Table): The table.
+        schema (pa.Schema): The columns and types. The columns the table does not have are missing.
+
+        Returns:
+        pa.Table: The table, with the columns of the schema only, in its order.
+        """
+        # Looking the columns up by name scans the schema, once per column of wide frames
+        table_columns = dict(zip(table.column_names, table.columns))
+        columns = [
+            table_columns[field.name].cast(field.type) if field.name in table_columns else pa.nulls(len(table), field.type)
+            for field in schema
+        ]
+
+        return pa.Table.from_arrays(columns, schema=schema)
+
+    def read(self, name: str, partition: int, schema: pa.Schema = None, part: int = None) -> pd.DataFrame:
+        """
+        Read the frame of a partition, or one of its parts.
+
+        Parameters:
+        name (str): The name of the frames.
+        partition (int): The partition.
+        schema (pa.Schema): If set, the columns and types to read the frame with. The columns the partition does not have
+            are missing.
+        part (int): The part of the frame to read, see get_parts. The whole frame if None.
+
+        Returns:
+        pd.DataFrame: The frame.
+        """
+        table = feather.read_table(self.get_path(name, partition, part))
+        if schema is not None:
+            table = self.conform(table, schema)
+
+        return table.to_pandas()
+
+    def concat(self, name: str, schema: pa.Schema = None) -> pd.DataFrame:
+        """
+        Read the frames of all the partitions of a name as a single frame.
+
+        The partitions are converted to pandas one column block at a time, releasing the Arrow memory as they are
+        converted, so that the data is only held about once.
+
+        Parameters:
+        name (str): The name of the frames.
+        schema (pa.Schema): The columns and types to read the frames with. See get_schema by default.
+
+        Returns:
+        pd.DataFrame: The frames, one partition after the other.
+        """
+        schema = self.get_schema(name) if schema is None else schema
+        table = pa.concat_tables([self.conform(feather.read_table(self.get_path(name, partition)), schema) for partition in self.get_partitions(name)])
+
+        return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,403 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from backend.src.data_processing.bureau_balance_aggregator import BureauBalanceAggregator
+from backend.src.data_processing.feature_store import FeatureStore
+from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.data_processing.row_sampler import RowSampler
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.spill_store import SpillStore
+from backend.src.data_processing.table_schema import TableSchema
+
+
+def quote(identifier: str) -> str:
+    """
+    Quote an SQL identifier.
+
+    Parameters:
+    identifier (str): The name of a table or a column.
+
+    Returns:
+    str: The quoted identifier.
+    """
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteReadData(SimpleReadData):
+    """
+    Implementation of the ReadDataABC abstract base class backed by a local SQLite database.
+
+    The tables are ingested once into the database, chunk by chunk, with indexes on SK_ID_CURR and SK_ID_BUREAU,
+    and ingested again only when their file changes. The applications are sampled and the other tables aggregated
+    by SQL queries, so that only the sampled applications and the aggregated rows are held in memory. The data
+    retrieved is the same as with SimpleReadData, column for column.
+    """
+
+    METADATA_TABLE = 'ingested_tables'
+    ID_COLUMNS = ['SK_ID_CURR', 'SK_ID_BUREAU']
+    SQL_TYPES = {'int': 'INTEGER', 'float': 'REAL', 'bool': 'INTEGER'}
+    SQL_AGGREGATIONS = {'min': 'MIN', 'max': 'MAX', 'mean': 'AVG'}
+
+    def __init__(self, database_path: str, **kwargs) -> None:
+        """
+        Initializes a new instance of the SqliteReadData class.
+
+        Parameters:
+        database_path (str): The path of the SQLite database. Created on the first ingestion.
+        kwargs: The other arguments of SimpleReadData.
+        """
+        super().__init__(**kwargs)
+        self.database_path = database_path
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a connection to the database. A connection is opened for each operation, so that the reader can be used by worker processes.
+
+        Returns:
+        sqlite3.Connection: The connection.
+        """
+        return sqlite3.connect(self.database_path)
+
+    @staticmethod
+    def get_table_name(file_name: str) -> str:
+        """
+        Get the name of the table of a file, e.g. 'bureau' for 'bureau.csv'.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        str: The name of the table.
+        """
+        return os.path.splitext(file_name)[0]
+
+    def read_file_chunks(self, files_path: str, file_name: str) -> Iterator[pd.DataFrame]:
+        """
+        Read a table file chunk by chunk, from its columnar copy if it is up to date or from the CSV file.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        Iterator[pd.DataFrame]: The chunks of the table.
+        """
+        columnar_path = TableSchema.get_columnar_path(files_path, file_name)
+
+        if columnar_path is None:
+            object_columns = [column for column, dtype in self.get_schema().get_dtypes(file_name).items() if dtype == 'object']
+            yield from pd.read_csv(f"{files_path}/{file_name}", dtype={column: 'str' for column in object_columns}, chunksize=self.chunk_size)
+        else:
+            for batch in pq.ParquetFile(columnar_path).iter_batches(batch_size=self.chunk_size):
+                yield batch.to_pandas()
+
+    def get_sql_type(self, file_name: str, column: str, dtype) -> str:
+        """
+        Get the SQL type of a column, from the schema or else from the dtype it was read with.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        column (str): The name of the column.
+        dtype: The dtype of the column in the first chunk.
+
+        Returns:
+        str: The SQL type of the column.
+        """
+        dtype = self.get_schema().get_dtypes(file_name).get(column, str(dtype))
+        for prefix, sql_type in self.SQL_TYPES.items():
+            if dtype.startswith(prefix):
+                return sql_type
+
+        return 'TEXT'
+
+    def ingest_table(self, connection: sqlite3.Connection, files_path: str, file_name: str) -> None:
+        """
+        Load a table file into the database, replacing the previous version of the table, and index its id columns.
+
+        Parameters:
+        connection (sqlite3.Connection): The connection to the database.
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        """
+        table_name = quote(self.get_table_name(file_name))
+        connection.execute(f"DROP TABLE IF EXISTS {table_name}")
+
+        columns = None
+        for chunk in self.read_file_chunks(files_path, file_name):
+            if columns is None:
+                columns = list(chunk.columns)
+                column_definitions = ', '.join(f"{quote(column)} {self.get_sql_type(file_name, column, chunk[column].dtype)}" for column in columns)
+                connection.execute(f"CREATE TABLE {table_name} ({column_definitions})")
+
+            chunk.to_sql(self.get_table_name(file_name), connection, if_exists='append', index=False)
+
+        for column in self.ID_COLUMNS:
+            if columns is not None and column in columns:
+                index_name = quote(f"{self.get_table_name(file_name)}_{column}")
+                connection.execute(f"CREATE INDEX {index_name} ON {table_name} ({quote(column)})")
+
+    def ingest(self, files_path: str, file_names: list) -> list:
+        """
+        Load the tables into the database, skipping the ones whose file did not change since they were loaded.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_names (list): The CSV file names of the tables.
+
+        Returns:
+        list: The CSV file names of the tables that were loaded.
+        """
+        ingested_file_names = []
+
+        with closing(self.connect()) as connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.METADATA_TABLE} (name TEXT PRIMARY KEY, fingerprint TEXT)")
+            fingerprints = dict(connection.execute(f"SELECT name, fingerprint FROM {self.METADATA_TABLE}").fetchall())
+
+            for file_name in file_names:
+                fingerprint = json.dumps(FeatureStore.source_fingerprint(files_path, file_name), sort_keys=True)
+                if fingerprints.get(file_name) == fingerprint:
+                    continue
+
+                with connection:
+                    self.ingest_table(connection, files_path, file_name)
+                    connection.execute(f"INSERT OR REPLACE INTO {self.METADATA_TABLE} (name, fingerprint) VALUES (?, ?)", (file_name, fingerprint))
+                ingested_file_names.append(file_name)
+
+        return ingested_file_names
+
+    def create_ids_table(self, connection: sqlite3.Connection, ids) -> None:
+        """
+        Create a temporary table holding the SK_ID_CURR of the applications to read or aggregate.
+
+        Parameters:
+        connection (sqlite3.Connection): The connection to the database.
+        ids: The SK_ID_CURR of the applications.
+        """
+        connection.execute("DROP TABLE IF EXISTS temp.sampled_ids")
+        connection.execute("CREATE TEMP TABLE sampled_ids (SK_ID_CURR INTEGER PRIMARY KEY)")
+        connection.executemany("INSERT OR IGNORE INTO temp.sampled_ids VALUES (?)", ((int(id),) for id in np.asarray(ids)))
+
+    def read_table(self, files_path: str, file_name: str, columns: list = None, sampling_frequency: int = 1, ids = None, compact: bool = False,
+                   positive_sampling_frequency: int = None) -> pd.DataFrame:
+        """
+        Read a table from the database.
+
+        The rows are sampled as with SimpleReadData: the SK_ID_CURR, position and, for a class-aware sampling, TARGET of
+        every row are read to compute the sample, then only the sampled rows are read.
+
+        Parameters:
+        files_path (str): The path where the files are located. Not used, the table must have been ingested.
+        file_name (str): The CSV file name of the table.
+        columns (list): The columns to read. All the columns are read if None.
+        sampling_frequency (int): The sampling frequency to use when reading the data. 10 means 1 out of 10 rows will be read.
+        ids: If set, only the rows whose SK_ID_CURR is in these ids are read.
+        compact (bool): Whether to convert the columns to the compact dtypes of the schema.
+        positive_sampling_frequency (int): If set, the sampling frequency of the rows whose TARGET is 1, see RowSampler.
+
+        Returns:
+        pd.DataFrame: The data of the table.
+        """
+        sampler = RowSampler(sampling_frequency, self.sampling_method, positive_sampling_frequency=positive_sampling_frequency)
+        table_name = quote(self.get_table_name(file_name))
+        select_columns = '*' if columns is None else ', '.join(quote(column) for column in columns)
+
+        with closing(self.connect()) as connection:
+            query = f"SELECT {select_columns} FROM {table_name}"
+
+            if ids is not None:
+                self.create_ids_table(connection, ids)
+                query += f" WHERE {quote(RowSampler.ID_COLUMN)} IN (SELECT SK_ID_CURR FROM temp.sampled_ids)"
+
+            if not sampler.keeps_everything:
+                mask_columns = ''.join(f", {quote(column)}" for column in sampler.get_read_columns([]))
+                rows = pd.read_sql_query(f"SELECT rowid AS row_id{mask_columns} FROM {table_name} ORDER BY rowid", connection)
+
+                connection.execute("DROP TABLE IF EXISTS temp.sampled_rows")
+                connection.execute("CREATE TEMP TABLE sampled_rows (row_id INTEGER PRIMARY KEY)")
+                connection.executemany("INSERT INTO temp.sampled_rows VALUES (?)", ((int(row_id),) for row_id in rows['row_id'][sampler.mask(rows)]))
+                query += " AND" if ids is not None else " WHERE"
+                query += " rowid IN (SELECT row_id FROM temp.sampled_rows)"
+
+            data = pd.read_sql_query(f"{query} ORDER BY rowid", connection)
+
+        # Missing values are read as None, pandas reads them as NaN
+        for column in data.columns[data.dtypes == object]:
+            if data[column].isnull().all():
+                data[column] = data[column].astype('float64')
+            elif data[column].isnull().any():
+                data[column] = data[column].where(data[column].notnull(), np.nan)
+
+        if compact:
+            data = self.get_schema().compact(data, file_name)
+
+        return data
+
+    def get_data_query(self, file_name: str) -> str:
+        """
+        Build the common table expression selecting the rows of the sampled applications of a table, as 'data'.
+
+        The columns, including the derived ones, are those of the aggregation plan of the table, see FeatureSpec.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        str: The WITH clause.
+        """
+        plan = self.get_plan(file_name)
+
+        data_columns = ', '.join(f"{expression} AS {quote(column)}" for column, expression in plan.get_sql_columns(quote, 't').items())
+
+        return (
+            f"WITH data AS (SELECT t.{quote('SK_ID_CURR')} AS {quote('SK_ID_CURR')}, {data_columns}"
+            f" FROM {quote(self.get_table_name(file_name))} t JOIN temp.sampled_ids s ON t.{quote('SK_ID_CURR')} = s.SK_ID_CURR)"
+        )
+
+    def get_aggregation_query(self, connection: sqlite3.Connection, file_name: str) -> tuple:
+        """
+        Build the query aggregating a table by SK_ID_CURR, as the get_aggregated_* method of the table does.
+
+        The values of the categorical columns are counted with one sum per value, the values being those found in the
+        rows of the sampled applications.
+
+        Parameters:
+        connection (sqlite3.Connection): The connection to the database, with the temporary table of the sampled ids.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        tuple: The query and its parameters.
+        """
+        plan = self.get_plan(file_name)
+        one_hot_columns, aggregations = plan.categorical_columns, plan.aggregations
+        data_query = self.get_data_query(file_name)
+
+        selections = []
+        parameters = []
+        for column, functions in aggregations.items():
+            for function in functions:
+                selections.append(f"{self.SQL_AGGREGATIONS[function]}({quote(column)}) AS {quote(f'{column}_{function}')}")
+
+        for column in one_hot_columns:
+            levels = [row[0] for row in connection.execute(f"{data_query} SELECT DISTINCT {quote(column)} FROM data WHERE {quote(column)} IS NOT NULL ORDER BY {quote(column)}")]
+            for level in levels:
+                selections.append(f"SUM(CASE WHEN {quote(column)} = ? THEN 1 ELSE 0 END) AS {quote(f'{column}_{level}_sum')}")
+                parameters.append(level)
+
+        query = f"{data_query} SELECT {quote('SK_ID_CURR')}, {', '.join(selections)} FROM data GROUP BY {quote('SK_ID_CURR')} ORDER BY {quote('SK_ID_CURR')}"
+
+        return query, parameters
+
+    def aggregate_table(self, files_path: str, file_name: str, ids) -> pd.DataFrame:
+        """
+        Aggregate a table by SK_ID_CURR with an SQL query.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        ids: The SK_ID_CURR of the applications to aggregate.
+
+        Returns:
+        pd.DataFrame: The aggregated data.
+        """
+        if file_name == ReadDataABC.BUREAU_BALANCE_NAME:
+            return self.get_aggregated_bureau_balance_data(files_path, ids)
+
+        with closing(self.connect()) as connection:
+            self.create_ids_table(connection, ids)
+
+            query, parameters = self.get_aggregation_query(connection, file_name)
+            aggregated_data = pd.read_sql_query(query, connection, params=parameters)
+
+            # The sequence features, e.g. DAYS_CREDIT_DIFF_MEAN, are computed from the rows of the applications, as in SimpleReadData
+            sequence_aggregator = self.get_plan(file_name).get_sequence_aggregator()
+            if sequence_aggregator is not None:
+                sequence_columns = ', '.join(quote(column) for column in sequence_aggregator.get_columns())
+                rows = pd.read_sql_query(f"{self.get_data_query(file_name)} SELECT {quote('SK_ID_CURR')}, {sequence_columns} FROM data", connection)
+                aggregated_data = aggregated_data.merge(sequence_aggregator.aggregate(rows), on='SK_ID_CURR', how='left')
+
+        return aggregated_data
+
+    def spill_aggregated_table(self, spill_store: SpillStore, files_path: str, file_name: str, ids, nb_partitions: int) -> None:
+        """
+        Aggregate a table with an SQL query and spill its aggregated data, one partition of the applications per file.
+
+        The database aggregates the table in a single pass, without holding its rows in memory, so only the aggregated
+        data, one row per application, is split into the partitions.
+
+        Parameters:
+        spill_store (SpillStore): The store of the partitions.
+        files_path (str): The path where the files are located.
+        file_name (str): The CSV file name of the table.
+        ids: The SK_ID_CURR of the applications to aggregate.
+        nb_partitions (int): The number of partitions.
+        """
+        self.spill_table(spill_store, file_name, self.aggregate_table(files_path, file_name, ids), SpillStore.partition_ids(ids, nb_partitions))
+
+    def get_aggregated_bureau_balance_data(self, files_path: str, ids) -> pd.DataFrame:
+        """
+        Aggregate the data from bureau_balance through bureau with an SQL query, as BureauBalanceAggregator does.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        ids: The SK_ID_CURR of the applications to aggregate.
+
+        Returns:
+        pd.DataFrame: The aggregated data. Grouped by SK_ID_CURR.
+        """
+        # The days past due are floats, as the unknown ones are missing
+        dpd = ' '.join(f"WHEN '{status}' THEN {float(days)}" for status, days in BureauBalanceAggregator.DPD_BY_STATUS.items())
+        balance_selections = [
+            'MIN("MONTHS_BALANCE") AS "MONTHS_BALANCE_min"',
+            'MAX("MONTHS_BALANCE") AS "MONTHS_BALANCE_max"',
+            'COUNT(*) AS "MONTHS_BALANCE_size"',
+            f'MAX(CASE "STATUS" {dpd} END) AS "DPD_max"',
+        ]
+        balance_selections += [f"SUM(CASE WHEN \"STATUS\" = '{value}' THEN 1 ELSE 0 END) AS \"STATUS_{value}_sum\"" for value in BureauBalanceAggregator.STATUS_VALUES]
+
+        sql_aggregations = dict(self.SQL_AGGREGATIONS, sum='SUM')
+        aggregations = dict(BureauBalanceAggregator.BUREAU_AGGREGATIONS)
+        aggregations.update({f"STATUS_{value}_sum": ['sum'] for value in BureauBalanceAggregator.STATUS_VALUES})
+        selections = [
+            f"{sql_aggregations[function]}({quote(column)}) AS {quote(f'{column}_{function}')}"
+            for column, functions in aggregations.items() for function in functions
+        ]
+
+        query = (
+            'WITH credits AS (SELECT b."SK_ID_CURR", b."SK_ID_BUREAU" FROM "bureau" b JOIN temp.sampled_ids s ON b."SK_ID_CURR" = s.SK_ID_CURR),'
+            f' balance AS (SELECT "SK_ID_BUREAU", {", ".join(balance_selections)} FROM "bureau_balance"'
+            ' WHERE "SK_ID_BUREAU" IN (SELECT "SK_ID_BUREAU" FROM credits) GROUP BY "SK_ID_BUREAU")'
+            f' SELECT credits."SK_ID_CURR", {", ".join(selections)} FROM credits JOIN balance ON credits."SK_ID_BUREAU" = balance."SK_ID_BUREAU"'
+            ' GROUP BY credits."SK_ID_CURR" ORDER BY credits."SK_ID_CURR"'
+        )
+
+        with closing(self.connect()) as connection:
+            self.create_ids_table(connection, ids)
+            aggregated_data = pd.read_sql_query(query, connection)
+
+        return aggregated_data
+
+    def retrieve_data(self, files_path: str, sampling_frequency: int, positive_sampling_frequency: int = None,
+                      memory_budget: int = None) -> pd.DataFrame:
+        """
+        Read data from the database, ingesting first the tables whose file changed.
+
+        Parameters:
+        files_path (str): The path where the files are located.
+        sampling_frequency (int): The sampling frequency to use when reading the data. 10 means 1 out of 10 rows will be read.
+        positive_sampling_frequency (int): If set, the sampling frequency of the applications whose TARGET is 1, see SimpleReadData.retrieve_data.
+        memory_budget (int): The memory in bytes the read should stay within, see SimpleReadData.retrieve_data.
+
+        Returns:
+        pd.DataFrame: The data read from the database as a pandas DataFrame.
+        """
+        with self.profiler.stage('ingest') as record:
+            record['tables'] = self.ingest(files_path, [ReadDataABC.APPLICATION_TRAIN_NAME] + list(self.get_aggregation_methods()))
+
+        return super().retrieve_data(files_path, sampling_frequency, positive_sampling_frequency, memory_budget)
@@ -0,0 +1,310 @@
+import os
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.data_processing.table_schema import TableSchema
+
+
+class SyntheticDataGenerator:
+    """
+    Generator of synthetic Home Credit tables, so that the pipeline can be run and measured without the private data.
+
+    The columns of each table are those of shared_config/columns_info.json. The columns with listed values take these
+    values, the first ones more often, and the other columns are drawn from ranges chosen from their name, e.g. negative
+    days for DAYS_ columns. The child tables have, per parent row, a geometric number of rows whose mean is the one of
+    the real data, so some applicants have no credit while others have many. The MONTHS_BALANCE and NUM_INSTALMENT_NUMBER
+    of the rows of a parent follow each other.
+
+    The scale is relative to the size of the real data: 1 writes about 307,511 applications and 27 million bureau balances,
+    0.01 about 3,075 applications. For a given seed, the tables are the same whatever the tables written.
+    """
+
+    # Number of applications of the real data
+    APPLICATIONS_SIZES = {
+        ReadDataABC.APPLICATION_TRAIN_NAME: 307_511,
+        ReadDataABC.APPLICATION_TEST_NAME: 48_744
+    }
+
+    # Parent table and mean number of rows per parent row of the real data, in the order the tables are generated.
+    # None is the parent of the tables linked to all the applications, train and test.
+    CHILD_TABLES = {
+        ReadDataABC.BUREAU_NAME: (None, 4.82),
+        ReadDataABC.BUREAU_BALANCE_NAME: (ReadDataABC.BUREAU_NAME, 15.9),
+        ReadDataABC.PREVIOUS_APPLICATION_NAME: (None, 4.69),
+        ReadDataABC.POS_CASH_BALANCE_NAME: (ReadDataABC.PREVIOUS_APPLICATION_NAME, 5.99),
+        ReadDataABC.INSTALLMENTS_PAYMENTS_NAME: (ReadDataABC.PREVIOUS_APPLICATION_NAME, 8.15),
+        ReadDataABC.CREDIT_CARD_BALANCE_NAME: (ReadDataABC.PREVIOUS_APPLICATION_NAME, 2.3)
+    }
+
+    # Identifier of the rows of each table and its first value
+    ID_COLUMNS = {
+        ReadDataABC.APPLICATION_TRAIN_NAME: 'SK_ID_CURR',
+        ReadDataABC.BUREAU_NAME: 'SK_ID_BUREAU',
+        ReadDataABC.PREVIOUS_APPLICATION_NAME: 'SK_ID_PREV'
+    }
+    FIRST_IDS = {'SK_ID_CURR': 100_002, 'SK_ID_BUREAU': 5_000_000, 'SK_ID_PREV': 1_000_000}
+
+    # Columns numbering the rows of a parent: MONTHS_BALANCE goes back from 0, NUM_INSTALMENT_NUMBER counts from 1
+    SEQUENCE_COLUMNS = {'MONTHS_BALANCE': -1, 'NUM_INSTALMENT_NUMBER': 1}
+
+    TARGET_COLUMN = 'TARGET'
+    TARGET_RATE = 0.08
+
+    # Ranges of the columns that are not drawn from the ranges of their prefix or suffix
+    COLUMN_RANGES = {
+        'DAYS_BIRTH': (-25_000, -7_500),
+        'DAYS_EMPLOYED': (-15_000, 0),
+        'DAYS_CREDIT_ENDDATE': (-3_000, 3_000),
+        'HOUR_APPR_PROCESS_START': (0, 23),
+        'SELLERPLACE_AREA': (-1, 5_000)
+    }
+    DAYS_RANGE = (-3_000, 0)
+
+    # Columns holding ratios or normalized scores, between 0 and 1
+    RATIO_PREFIXES = ('EXT_SOURCE', 'RATE_', 'REGION_POPULATION')
+    RATIO_SUFFIXES = ('_AVG', '_MODE', '_MEDI')
+
+    # Log-normal amounts, around exp(11) = 60,000
+    AMOUNT_MEAN = 11
+    AMOUNT_SIGMA = 1
+
+    MISSING_RATE = 0.1
+
+    # Number of values of the string columns whose values are not listed
+    UNLISTED_VALUES = 20
+
+    BATCH_SIZE = 100_000
+
+    def __init__(self, scale: float = 1, seed: int = 0, schema: TableSchema = None, batch_size: int = BATCH_SIZE) -> None:
+        """
+        Initializes a new instance of the SyntheticDataGenerator class.
+
+        Parameters:
+        scale (float): The size of the tables relative to the real data, e.g. 10, 1 or 0.01.
+        seed (int): The seed of the random generators.
+        schema (TableSchema): The schema of the tables. The one of shared_config/columns_info.json if None.
+        batch_size (int): The number of parent rows whose child rows are generated and written at once.
+        """
+        if scale <= 0:
+            raise ValueError("scale must be positive.")
+
+        self.scale = scale
+        self.seed = seed
+        self.schema = schema if schema is not None else TableSchema()
+        self.batch_size = batch_size
+
+    def get_rng(self, file_name: str, stream: int) -> np.random.Generator:
+        """
+        Get a random generator of a table.
+
+        Each table has its own generators so that a table does not depend on the tables written before it.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        stream (int): 0 for the generator of the number of rows, 1 for the generator of the values.
+
+        Returns:
+        np.random.Generator: The generator.
+        """
+        return np.random.default_rng([self.seed, ReadDataABC.FILES_NAMES.index(file_name), stream])
+
+    def get_applications_sizes(self) -> dict:
+        """
+        Get the number of applications of each application table at the scale of the generator.
+
+        Returns:
+        dict: The number of rows, by CSV file name. At least 1.
+        """
+        return {file_name: max(1, round(size * self.scale)) for file_name, size in self.APPLICATIONS_SIZES.items()}
+
+    @staticmethod
+    def choose_values(values: list, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Draw listed values, the first ones more often, as in the real data where the frequent values come first.
+
+        Parameters:
+        values (list): The values.
+        size (int): The number of values to draw.
+        rng (np.random.Generator): The random generator.
+
+        Returns:
+        np.ndarray: The values drawn.
+        """
+        weights = 1 / np.arange(1, len(values) + 1)
+
+        return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+    def generate_column(self, column: dict, size: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        Generate the values of a column that is neither an identifier nor a sequence.
+
+        Parameters:
+        column (dict): The fieldname, type and values of the column, as in columns_info.json.
+        size (int): The number of rows.
+        rng (np.random.Generator): The random generator.
+
+        Returns:
+        np.ndarray: The values of the column. Float columns have missing values.
+        """
+        name, dtype = column['fieldname'], column['type']
+
+        if name == self.TARGET_COLUMN:
+            return (rng.random(size) < self.TARGET_RATE).astype('int64')
+
+        if column['values'] is not None:
+            values = self.choose_values(column['values'], size, rng)
+        elif dtype == 'object':
+            values = self.choose_values([f"{name} {i}" for i in range(self.UNLISTED_VALUES)], size, rng)
+        elif name.startswith(self.RATIO_PREFIXES) or name.endswith(self.RATIO_SUFFIXES):
+            values = rng.random(size).round(6)
+        elif name.startswith('AMT_'):
+            values = rng.lognormal(self.AMOUNT_MEAN, self.AMOUNT_SIGMA, size).round(2)
+        elif name in self.COLUMN_RANGES or name.startswith('DAYS_'):
+            low, high = self.COLUMN_RANGES.get(name, self.DAYS_RANGE)
+            values = rng.integers(low, high, size, endpoint=True)
+        else:
+            # Counts, days past due, instalment versions...: mostly small
+            values = rng.geometric(0.5, size) - 1
+
+        if dtype.startswith('int'):
+            return values.astype(dtype)
+        if dtype.startswith('float'):
+            values = values.astype(dtype)
+            values[rng.random(size) < self.MISSING_RATE] = np.nan
+
+        return values
+
+    def generate_table(self, file_name: str, keys: dict, size: int, rng: np.random.Generator) -> pd.DataFrame:
+        """
+        Generate rows of a table.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+        keys (dict): The values of the identifier and sequence columns, by column name.
+        size (int): The number of rows.
+        rng (np.random.Generator): The random generator of the values.
+
+        Returns:
+        pd.DataFrame: The rows, with the columns of the schema in their order.
+        """
+        return pd.DataFrame({
+            column['fieldname']: keys[column['fieldname']] if column['fieldname'] in keys else self.generate_column(column, size, rng)
+            for column in self.schema.get_columns(file_name)
+        })
+
+    def generate_applications_keys(self) -> dict:
+        """
+        Get the SK_ID_CURR of each application table. The ids of the test applications follow those of the train applications.
+
+        Returns:
+        dict: The ids, by CSV file name.
+        """
+        keys = {}
+        first_id = self.FIRST_IDS['SK_ID_CURR']
+        for file_name, size in self.get_applications_sizes().items():
+            keys[file_name] = np.arange(first_id, first_id + size, dtype='int64')
+            first_id += size
+
+        return keys
+
+    def generate_child_keys(self, file_name: str, parent_keys: dict) -> Iterator[dict]:
+        """
+        Generate the identifier and sequence columns of a child table, batch of parent rows by batch of parent rows.
+
+        Parameters:
+        file_name (str): The CSV file name of the child table.
+        parent_keys (dict): The identifiers of the parent rows, by column name, e.g. SK_ID_CURR and SK_ID_BUREAU.
+
+        Returns:
+        Iterator[dict]: The keys of each batch, by column name.
+        """
+        parent_size = len(next(iter(parent_keys.values())))
+        _, mean_size = self.CHILD_TABLES[file_name]
+        counts = self.get_rng(file_name, 0).geometric(1 / (mean_size + 1), parent_size) - 1
+        first_id = self.FIRST_IDS.get(self.ID_COLUMNS.get(file_name))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        for start in range(0, parent_size, self.batch_size):
+            batch_counts = counts[start:start + self.batch_size]
+            size = int(batch_counts.sum())
+            keys = {column: np.repeat(ids[start:start + self.batch_size], batch_counts) for column, ids in parent_keys.items()}
+
+            # Position of each row among the rows of its parent
+            positions = np.arange(size) - np.repeat(offsets[start:start + len(batch_counts)] - offsets[start], batch_counts)
+            for column, step in self.SEQUENCE_COLUMNS.items():
+                keys[column] = positions * step + max(step, 0)
+
+            if first_id is not None:
+                keys[self.ID_COLUMNS[file_name]] = np.arange(first_id + offsets[start], first_id + offsets[start] + size, dtype='int64')
+
+            yield keys
+
+    @staticmethod
+    def append_csv(data: pd.DataFrame, path: str, header: bool) -> None:
+        """
+        Write rows to a CSV file, after its existing rows.
+
+        Parameters:
+        data (pd.DataFrame): The rows.
+        path (str): The path of the CSV file.
+        header (bool): Whether to write the header first, which replaces the file.
+        """
+        data.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+
+    def write(self, files_path: str, file_names: List[str] = ReadDataABC.FILES_NAMES) -> dict:
+        """
+        Write synthetic tables to CSV files.
+
+        The child tables are generated and written batch by batch, so the memory used does not grow with the scale
+        beyond the identifiers of the parent tables.
+
+        Parameters:
+        files_path (str): The directory of the CSV files. Created if needed.
+        file_names (List[str]): The CSV file names of the tables to write. All the tables by default.
+
+        Returns:
+        dict: The number of rows written, by CSV file name.
+        """
+        os.makedirs(files_path, exist_ok=True)
+        sizes = {}
+
+        applications_keys = self.generate_applications_keys()
+        for file_name, ids in applications_keys.items():
+            if file_name in file_names:
+                data = self.generate_table(file_name, {'SK_ID_CURR': ids}, len(ids), self.get_rng(file_name, 1))
+                data.to_csv(f"{files_path}/{file_name}", index=False)
+                sizes[file_name] = len(data)
+
+        # Identifiers of the tables that have child tables
+        parents_keys = {None: {'SK_ID_CURR': np.concatenate(list(applications_keys.values()))}}
+
+        for file_name, (parent_name, _) in self.CHILD_TABLES.items():
+            is_parent = file_name in self.ID_COLUMNS
+            if not is_parent and file_name not in file_names:
+                continue
+
+            rng = self.get_rng(file_name, 1)
+            table_keys = []
+            sizes[file_name] = 0
+
+            for batch_keys in self.generate_child_keys(file_name, parents_keys[parent_name]):
+                size = len(next(iter(batch_keys.values())))
+                if is_parent:
+                    table_keys.append({column: batch_keys[column] for column in ['SK_ID_CURR', self.ID_COLUMNS[file_name]]})
+
+                if file_name in file_names:
+                    self.append_csv(self.generate_table(file_name, batch_keys, size, rng), f"{files_path}/{file_name}", header=sizes[file_name] == 0)
+                    sizes[file_name] += size
+
+            if is_parent:
+                parents_keys[file_name] = {column: np.concatenate([keys[column] for keys in table_keys]) for column in table_keys[0]}
+            if file_name not in file_names:
+                del sizes[file_name]
+            elif sizes[file_name] == 0:
+                # No row at all: only the header
+                self.generate_table(file_name, {}, 0, rng).to_csv(f"{files_path}/{file_name}", index=False)
+
+        return sizes
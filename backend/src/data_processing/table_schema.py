@@ -0,0 +1,172 @@
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.src.data_processing.read_data_abc import ReadDataABC
+
+DEFAULT_COLUMNS_INFO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir, 'shared_config', 'columns_info.json')
+
+
+class TableSchema:
+    """
+    Schema of the Home Credit tables, as described in shared_config/columns_info.json.
+
+    The file lists, for each table, the name, type and (for low-cardinality columns) the values of every column.
+    Tables are keyed by the name of the matching ReadDataABC constant, e.g. BUREAU_NAME for bureau.csv.
+    """
+
+    COLUMNAR_EXTENSION = '.parquet'
+    # Amounts reach millions with cents, more digits than float32 keeps, so they stay float64
+    FLOAT64_PREFIXES = ('AMT_',)
+    # Beyond 2 ** 24, float32 no longer holds every integer
+    FLOAT32_MAX_MAGNITUDE = 2 ** 24
+
+    def __init__(self, columns_info_path: str = DEFAULT_COLUMNS_INFO_PATH) -> None:
+        """
+        Load the schema.
+
+        Parameters:
+        columns_info_path (str): The path of the columns_info.json file.
+        """
+        with open(columns_info_path, 'r') as f:
+            self.tables = json.load(f)['tables']
+
+        self.table_keys = {
+            getattr(ReadDataABC, attribute): attribute
+            for attribute in dir(ReadDataABC)
+            if attribute.endswith('_NAME') and isinstance(getattr(ReadDataABC, attribute), str)
+        }
+
+    def get_columns(self, file_name: str) -> List[dict]:
+        """
+        Get the description of the columns of a table.
+
+        Parameters:
+        file_name (str): The CSV file name of the table, e.g. 'bureau.csv'.
+
+        Returns:
+        List[dict]: The fieldname, type and values of each column. Empty if the table is unknown.
+        """
+        return self.tables.get(self.table_keys.get(file_name), [])
+
+    def get_dtypes(self, file_name: str) -> dict:
+        """
+        Get the pandas dtype of each column of a table.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        dict: The dtype of each column, by column name.
+        """
+        return {column['fieldname']: column['type'] for column in self.get_columns(file_name)}
+
+    def get_compact_dtypes(self, file_name: str) -> dict:
+        """
+        Get the compact pandas dtype of the float and string columns of a table, to use when reading it.
+
+        Floats are read as float32, except the amounts (see FLOAT64_PREFIXES), and strings as categories. Integers
+        are not listed: they are downcast once read, since reading them with a smaller type would silently overflow.
+
+        Parameters:
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        dict: The compact dtype of each float or string column, by column name.
+        """
+        compact_dtypes = {}
+        for column, dtype in self.get_dtypes(file_name).items():
+            if dtype.startswith('float') and not column.startswith(self.FLOAT64_PREFIXES):
+                compact_dtypes[column] = 'float32'
+            elif dtype == 'object':
+                compact_dtypes[column] = 'category'
+
+        return compact_dtypes
+
+    def compact(self, data: pd.DataFrame, file_name: str) -> pd.DataFrame:
+        """
+        Convert the columns of a table to their compact dtype.
+
+        Integers are downcast to the smallest type holding their values, floats are converted to float32
+        unless they are amounts or their values are too large for float32 to keep their precision, and strings
+        to categories without unused values.
+
+        Parameters:
+        data (pd.DataFrame): The data of the table. It is modified in place.
+        file_name (str): The CSV file name of the table.
+
+        Returns:
+        pd.DataFrame: The compacted data.
+        """
+        for column, dtype in self.get_dtypes(file_name).items():
+            if column not in data.columns:
+                continue
+
+            if pd.api.types.is_integer_dtype(data[column].dtype):
+                data[column] = pd.to_numeric(data[column], downcast='integer')
+            elif dtype.startswith('float') or pd.api.types.is_float_dtype(data[column].dtype):
+                if self.fits_float32(data[column]) and not column.startswith(self.FLOAT64_PREFIXES):
+                    data[column] = data[column].astype('float32')
+            elif dtype == 'object':
+                if isinstance(data[column].dtype, pd.CategoricalDtype):
+                    data[column] = data[column].cat.remove_unused_categories()
+                else:
+                    data[column] = data[column].astype('category')
+
+        return data
+
+    @classmethod
+    def fits_float32(cls, values: pd.Series) -> bool:
+        """
+        Check whether float values keep their precision as float32, i.e. whether they are all below FLOAT32_MAX_MAGNITUDE.
+
+        Parameters:
+        values (pd.Series): The values. Missing values are ignored.
+
+        Returns:
+        bool: True if the values can be converted to float32.
+        """
+        magnitude = np.nanmax(np.abs(values.to_numpy(dtype='float64'))) if values.notna().any() else 0
+
+        return bool(magnitude < cls.FLOAT32_MAX_MAGNITUDE)
+
+    @classmethod
+    def columnar_file_name(cls, file_name: str) -> str:
+        """
+        Get the name of the columnar copy of a CSV file, e.g. 'bureau.parquet' for 'bureau.csv'.
+
+        Parameters:
+        file_name (str): The CSV file name.
+
+        Returns:
+        str: The columnar file name.
+        """
+        return f"{os.path.splitext(file_name)[0]}{cls.COLUMNAR_EXTENSION}"
+
+    @classmethod
+    def get_columnar_path(cls, files_path: str, file_name: str) -> Optional[str]:
+        """
+        Get the path of the columnar copy of a CSV file if it can be used in place of the CSV.
+
+        The copy is used if it exists and is not older than the CSV file.
+
+        Parameters:
+        files_path (str): The directory of the files.
+        file_name (str): The CSV file name.
+
+        Returns:
+        Optional[str]: The path of the columnar file, or None if the CSV must be read.
+        """
+        columnar_path = f"{files_path}/{cls.columnar_file_name(file_name)}"
+        csv_path = f"{files_path}/{file_name}"
+
+        if not os.path.isfile(columnar_path):
+            return None
+
+        if os.path.isfile(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(columnar_path):
+            return None
+
+        return columnar_path
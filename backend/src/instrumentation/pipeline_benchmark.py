@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from backend.src.data_processing.local_blob_container import LocalBlobContainerClient
+from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.data_processing.simple_load_data import SimpleLoadData
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.synthetic_data_generator import SyntheticDataGenerator
+from backend.src.instrumentation.stage_profiler import StageProfiler
+from backend.src.models.random_forest_loan_predictor import RandomForestLoanPredictor
+
+
+def get_commit() -> str:
+    """
+    Get the git commit of the code being benchmarked.
+
+    Returns:
+    str: The hash of the commit, or None outside of a git repository.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_environment() -> dict:
+    """
+    Get the versions and the machine the benchmark runs on, which should be the same for the runs compared.
+
+    Returns:
+    dict: The versions of Python and of the main libraries, the platform and the number of CPUs.
+    """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+class PipelineBenchmark:
+    """
+    Benchmark of the pipeline of /train on synthetic data, see SyntheticDataGenerator.
+
+    At each scale, the tables are generated in a local blob container, then the stages of /train are run and profiled: the
+    download of the tables and their conversion to Parquet, the reads, aggregations and join of write_data_for_model, and
+    the training. The evaluation and the prediction of single loans are profiled too. It runs offline, and the data and the
+    model are seeded, so that the run records of two commits can be compared with compare_runs.
+    """
+
+    DEFAULT_SCALES = [0.01]
+    BENCHMARKS_FOLDER = 'benchmarks'
+    DATA_FILE_MODEL = 'data_for_model.parquet'
+    TARGET_VARIABLE = 'TARGET'
+
+    # Number of loans predicted one by one
+    PREDICTED_LOANS = 100
+
+    def __init__(self, scales: List[float] = DEFAULT_SCALES, seed: int = 0, sampling_frequency: int = 1,
+                 max_workers: int = 1, trace_memory: bool = False) -> None:
+        """
+        Initializes a new instance of the PipelineBenchmark class.
+
+        Parameters:
+        scales (List[float]): The scales of the synthetic data, relative to the size of the real data.
+        seed (int): The seed of the synthetic data.
+        sampling_frequency (int): The sampling frequency of write_data_for_model.
+        max_workers (int): The number of worker processes of the reader.
+        trace_memory (bool): Whether to trace the memory allocated by each stage, see StageProfiler.
+        """
+        self.scales = scales
+        self.seed = seed
+        self.sampling_frequency = sampling_frequency
+        self.max_workers = max_workers
+        self.trace_memory = trace_memory
+
+    def run_scale(self, scale: float, work_path: str) -> dict:
+        """
+        Generate the data at a scale and profile the pipeline on it.
+
+        Parameters:
+        scale (float): The scale of the synthetic data.
+        work_path (str): The directory where the blob container and the downloaded data are written.
+
+        Returns:
+        dict: The parameters of the run, the number of rows of each table, and the report of the profiler.
+        """
+        container_path = os.path.join(work_path, 'container')
+        files_path = os.path.join(work_path, 'data')
+        os.makedirs(files_path)
+
+        generation_start = time.perf_counter()
+        sizes = SyntheticDataGenerator(scale=scale, seed=self.seed).write(container_path)
+        generation_time = time.perf_counter() - generation_start
+
+        profiler = StageProfiler(trace_memory=self.trace_memory)
+        # The peak memory of each scale is measured from the start of its run
+        profiler.reset()
+        loader = SimpleLoadData(max_workers=4, chunk_size=SimpleLoadData.DEFAULT_CHUNK_SIZE, container_client=LocalBlobContainerClient(container_path),
+                                range_threshold=SimpleLoadData.DEFAULT_RANGE_THRESHOLD, profiler=profiler)
+        reader = SimpleReadData(compact_dtypes=True, max_workers=self.max_workers, profiler=profiler)
+        predictor = RandomForestLoanPredictor(profiler=profiler)
+        # The forest is seeded too, so that the training does the same work at every run
+        predictor.model.set_params(random_state=predictor.random_state)
+
+        with profiler.stage('load'):
+            loader.load(ReadDataABC.FILES_NAMES, files_path)
+            loader.convert_to_columnar(ReadDataABC.FILES_NAMES, files_path)
+
+        loans = reader.write_data_for_model(files_path, self.DATA_FILE_MODEL, self.sampling_frequency)
+
+        with profiler.stage('train'):
+            predictor.train(loans, self.TARGET_VARIABLE)
+
+        with profiler.stage('evaluate'):
+            predictor.evaluate()
+
+        # Preprocessed loans, as predict does not fill the missing values
+        loans = predictor.X_test.head(self.PREDICTED_LOANS)
+        with profiler.stage('predict', rows=len(loans)):
+            for i in range(len(loans)):
+                predictor.predict(loans.iloc[[i]])
+
+        return {
+            'scale': scale,
+            'seed': self.seed,
+            'sampling_frequency': self.sampling_frequency,
+            'max_workers': self.max_workers,
+            'tables': sizes,
+            'generation_time': generation_time,
+            'peak_memory': profiler.get_peak_memory(),
+            **profiler.get_report()
+        }
+
+    def run(self, output_path: str = BENCHMARKS_FOLDER) -> List[str]:
+        """
+        Run the benchmark at each scale and write a run record per scale.
+
+        Parameters:
+        output_path (str): The directory of the run records. Created if needed.
+
+        Returns:
+        List[str]: The paths of the run records.
+        """
+        commit = get_commit()
+        environment = get_environment()
+        run_paths = []
+
+        for scale in self.scales:
+            with tempfile.TemporaryDirectory() as work_path:
+                result = self.run_scale(scale, work_path)
+
+            run_record = {'commit': commit, 'environment': environment, **result}
+            date = datetime.now(timezone.utc)
+            run_record = {'date': date.isoformat(), **run_record}
+            run_path = os.path.join(output_path, f"benchmark_{scale:g}_{(commit or 'nocommit')[:12]}_{date.strftime('%Y%m%dT%H%M%S%fZ')}.json")
+            os.makedirs(output_path, exist_ok=True)
+            with open(run_path, 'w') as f:
+                json.dump(run_record, f, indent=4, default=str)
+
+            run_paths.append(run_path)
+
+        return run_paths
+
+
+def get_stage_times(run_record: dict) -> pd.DataFrame:
+    """
+    Get the wall time, CPU time and peak RSS increase of each stage of a run record.
+
+    Stages run several times, e.g. once per table, are told apart by their table.
+
+    Parameters:
+    run_record (dict): The run record.
+
+    Returns:
+    pd.DataFrame: The times and memory of each stage, indexed by stage and table.
+    """
+    stages = pd.DataFrame(run_record['stages'])
+    if 'table' not in stages.columns:
+        stages['table'] = None
+    stages['table'] = stages['table'].fillna('')
+
+    columns = [column for column in ['wall_time', 'cpu_time', 'peak_rss_increase'] if column in stages.columns]
+
+    return stages.groupby(['stage', 'table'], sort=False)[columns].sum()
+
+
+def compare_runs(baseline_path: str, candidate_path: str) -> pd.DataFrame:
+    """
+    Compare the stages of two run records, e.g. of the same scale at two commits.
+
+    Parameters:
+    baseline_path (str): The path of the run record of reference.
+    candidate_path (str): The path of the run record to compare to it.
+
+    Returns:
+    pd.DataFrame: The wall time of each stage in both runs, and the ratio of the candidate to the baseline.
+    """
+    with open(baseline_path) as f:
+        baseline = get_stage_times(json.load(f))
+    with open(candidate_path) as f:
+        candidate = get_stage_times(json.load(f))
+
+    comparison = baseline[['wall_time']].join(candidate[['wall_time']], how='outer', lsuffix='_baseline', rsuffix='_candidate')
+    comparison['ratio'] = comparison['wall_time_candidate'] / comparison['wall_time_baseline']
+
+    return comparison
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Run the benchmark, or compare two run records, from the command line.
+
+    Parameters:
+    argv (List[str]): The arguments. Those of the command line if None.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the loan score pipeline on synthetic data.")
+    parser.add_argument('--scales', type=float, nargs='+', default=PipelineBenchmark.DEFAULT_SCALES, help="Scales of the data, e.g. 0.01 1 10.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sampling-frequency', type=int, default=1)
+    parser.add_argument('--max-workers', type=int, default=1)
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument('--output', default=PipelineBenchmark.BENCHMARKS_FOLDER, help="Directory of the run records.")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'), help="Compare two run records instead of running.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_runs(*args.compare).to_string())
+        return
+
+    benchmark = PipelineBenchmark(args.scales, args.seed, args.sampling_frequency, args.max_workers, args.trace_memory)
+    for run_path in benchmark.run(args.output):
+        print(run_path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
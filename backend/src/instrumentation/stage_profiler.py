@@ -0,0 +1,291 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+PROC_STATUS_PATH = '/proc/self/status'
+PROC_CLEAR_REFS_PATH = '/proc/self/clear_refs'
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak resident set size of the current process to its current RSS, so that get_peak_rss measures from now on.
+
+    Returns:
+    bool: Whether the peak RSS was reset. Only Linux supports it.
+    """
+    try:
+        # Writing 5 resets the high-water mark of the RSS, see proc(5)
+        with open(PROC_CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+
+    return True
+
+
+def get_peak_rss() -> Optional[int]:
+    """
+    Get the peak resident set size of the current process since it started, or since reset_peak_rss was last called.
+
+    Returns:
+    Optional[int]: The peak RSS in bytes, or None on platforms without /proc or the resource module.
+    """
+    try:
+        with open(PROC_STATUS_PATH) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux and cannot be reset
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageProfiler:
+    """
+    Records the cost of the named stages of the data pipeline.
+
+    For each stage it records the wall time, the CPU time of the process, the peak RSS of the process at the end of
+    the stage and how much the stage raised it, and optionally the peak memory allocated during the stage as traced by
+    tracemalloc. The rows and columns of the data produced can be added to the record of a stage.
+
+    Stages can be nested: the name of a stage is prefixed by the names of the stages it runs in. Stages run in
+    different threads are recorded separately, and records made in worker processes can be merged with add_records.
+
+    Resetting the profiler at the start of a run also resets the peak RSS of the process where supported, so that
+    get_peak_memory reports the peak of that run only, not of the lifetime of a long-running server.
+    """
+
+    RUNS_FOLDER = 'runs'
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """
+        Initializes a new instance of the StageProfiler class.
+
+        Parameters:
+        trace_memory (bool): Whether to trace the memory allocated by each stage with tracemalloc. It slows down allocations.
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+        self.peak_rss_reset = False
+        self.peak_rss_workers = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __getstate__(self) -> dict:
+        # Locks and thread-local stacks cannot be sent to worker processes
+        state = self.__dict__.copy()
+        del state['_lock'], state['_local']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get_stack(self) -> list:
+        """
+        Get the names of the stages running in the current thread.
+
+        Returns:
+        list: The names of the stages, outermost first.
+        """
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+
+        return self._local.stack
+
+    def get_current_stage(self) -> str:
+        """
+        Get the full name of the innermost stage running in the current thread, to pass as the parent of the stages run by other threads.
+
+        Returns:
+        str: The name of the stage, empty if no stage is running.
+        """
+        return '/'.join(self.get_stack())
+
+    def get_traced_peaks(self) -> list:
+        """
+        Get the peak traced memory of the stages running in the current thread, as far as their nested stages reset it.
+
+        Returns:
+        list: The peak traced memory in bytes of each stage, outermost first.
+        """
+        if not hasattr(self._local, 'traced_peaks'):
+            self._local.traced_peaks = []
+
+        return self._local.traced_peaks
+
+    def reset(self) -> None:
+        """
+        Forget the stages recorded so far and reset the peak RSS of the process, to measure the next run only.
+        """
+        with self._lock:
+            self.records = []
+        self.reset_peak_memory()
+
+    def reset_peak_memory(self) -> None:
+        """
+        Reset the peak RSS of the process and of its workers, keeping the stages recorded, to measure a part of a run.
+        The peak RSS of a run measured across this call is lost, as the one of the process can only be reset as a whole.
+        """
+        with self._lock:
+            self.peak_rss_workers = None
+            self.peak_rss_reset = reset_peak_rss()
+
+    @contextmanager
+    def stage(self, name: str, parent: str = None, **details) -> Iterator[dict]:
+        """
+        Record a stage.
+
+        Parameters:
+        name (str): The name of the stage.
+        parent (str): The full name of the stage this one runs in, see get_current_stage. The stages running in the current thread if None.
+        A thread pool has no stack of its own, so the caller passes the stage submitting the work.
+        details: Other fields to add to the record of the stage, e.g. the name of the table.
+
+        Returns:
+        Iterator[dict]: The record of the stage, which can be completed while it runs, see record_data.
+        """
+        stack = self.get_stack()
+        saved_stack = None
+        if parent is not None:
+            saved_stack = stack[:]
+            stack[:] = parent.split('/') if parent else []
+        record = {'stage': '/'.join(stack + [name]), **details}
+
+        stack.append(name)
+        peak_rss_before = get_peak_rss()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        traced_peaks = self.get_traced_peaks()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            # Resetting the peak for this stage would lose the one of the stage it runs in, which is kept until it ends
+            if traced_peaks:
+                traced_peaks[-1] = max(traced_peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if self.trace_memory:
+            traced_peaks.append(0)
+        traced_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - wall_start
+            record['cpu_time'] = time.process_time() - cpu_start
+
+            peak_rss = get_peak_rss()
+            if peak_rss is not None:
+                record['peak_rss'] = peak_rss
+                record['peak_rss_increase'] = peak_rss - peak_rss_before
+
+            if self.trace_memory:
+                traced_peak = max(tracemalloc.get_traced_memory()[1], traced_peaks.pop())
+                record['traced_memory_peak'] = traced_peak - traced_before
+                if traced_peaks:
+                    traced_peaks[-1] = max(traced_peaks[-1], traced_peak)
+                if tracing:
+                    tracemalloc.stop()
+
+            stack.pop()
+            if saved_stack is not None:
+                stack[:] = saved_stack
+            with self._lock:
+                self.records.append(record)
+
+    @staticmethod
+    def record_data(record: dict, data: pd.DataFrame) -> None:
+        """
+        Add the number of rows and columns of a DataFrame to the record of a stage.
+
+        Parameters:
+        record (dict): The record of the stage.
+        data (pd.DataFrame): The data produced by the stage.
+        """
+        record['rows'] = len(data)
+        record['columns'] = len(data.columns)
+
+    def add_records(self, records: List[dict], prefix: str = None) -> None:
+        """
+        Add records made by another profiler, e.g. in a worker process.
+
+        Parameters:
+        records (List[dict]): The records.
+        prefix (str): The stage the records ran in. By default, the stage running in the current thread.
+        """
+        if prefix is None:
+            prefix = '/'.join(self.get_stack())
+
+        with self._lock:
+            for record in records:
+                # The workers are processes of the run, so their peak RSS is the peak of the run
+                if record.get('peak_rss') is not None:
+                    self.peak_rss_workers = max(self.peak_rss_workers or 0, record['peak_rss'])
+                self.records.append({**record, 'stage': f"{prefix}/{record['stage']}" if prefix else record['stage']})
+
+    def get_peak_memory(self) -> dict:
+        """
+        Get the peak RSS of the run, e.g. at its end: of the current process since the profiler was reset, and of the
+        largest of the worker processes whose records were added.
+
+        Returns:
+        dict: The peak RSS in bytes of the process and of its workers. The former is None if the peak RSS of the process
+        could not be reset, as it would be the peak of its lifetime, the latter if no worker recorded it.
+        """
+        with self._lock:
+            peak_rss_workers = self.peak_rss_workers
+            peak_rss_reset = self.peak_rss_reset
+
+        return {'peak_rss': get_peak_rss() if peak_rss_reset else None, 'peak_rss_workers': peak_rss_workers}
+
+    def get_report(self) -> dict:
+        """
+        Get the report of the recorded stages.
+
+        Returns:
+        dict: The records of the stages, in the order they ended.
+        """
+        with self._lock:
+            return {'stages': [dict(record) for record in self.records]}
+
+    def write_run_record(self, runs_path: str, **run_details) -> str:
+        """
+        Write the report of the recorded stages to a JSON file, so that runs can be compared.
+
+        Parameters:
+        runs_path (str): The directory of the run records. Created if needed.
+        run_details: Other fields describing the run, e.g. its parameters.
+
+        Returns:
+        str: The path of the run record.
+        """
+        os.makedirs(runs_path, exist_ok=True)
+
+        date = datetime.now(timezone.utc)
+        run_record = {'date': date.isoformat(), **run_details, **self.get_report()}
+        run_path = os.path.join(runs_path, f"run_{date.strftime('%Y%m%dT%H%M%S%fZ')}.json")
+
+        with open(run_path, 'w') as f:
+            json.dump(run_record, f, indent=4, default=str)
+
+        return run_path
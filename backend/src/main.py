@@ -1,18 +1,32 @@
 from flask import Flask, request, jsonify
 from backend.src.data_processing.simple_load_data import SimpleLoadData
 from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.online_feature_service import OnlineFeatureService
 from backend.src.models.random_forest_loan_predictor import RandomForestLoanPredictor
+from backend.src.models.sampling_planner import SamplingPlanner
+from backend.src.instrumentation.stage_profiler import StageProfiler
+import os
+import time
 import pandas as pd
 
-app = Flask(__name__)
-predictor = RandomForestLoanPredictor()
-loader = SimpleLoadData()
-reader = SimpleReadData()
-
 FILES_FOLDER = 'data'
-DATA_FILE_MODEL = 'data_for_model.csv'
+FEATURES_FOLDER = os.path.join(FILES_FOLDER, 'features')
+ONLINE_FEATURES_FOLDER = os.path.join(FILES_FOLDER, 'online_features')
+SPILL_FOLDER = os.path.join(FILES_FOLDER, 'spill')
+DATA_FILE_MODEL = 'data_for_model.parquet'
 COMMON_STRUCTURE_PATH = 'shared_config'
 JSON_FILE_STRUCTURE = 'data_structure.json'
+RUNS_FOLDER = os.path.join(FILES_FOLDER, StageProfiler.RUNS_FOLDER)
+
+app = Flask(__name__)
+profiler = StageProfiler()
+predictor = RandomForestLoanPredictor(profiler=profiler)
+loader = SimpleLoadData(max_workers=4, chunk_size=SimpleLoadData.DEFAULT_CHUNK_SIZE, range_threshold=SimpleLoadData.DEFAULT_RANGE_THRESHOLD, profiler=profiler)
+reader = SimpleReadData(compact_dtypes=True, max_workers=min(5, os.cpu_count() or 1), feature_store_path=FEATURES_FOLDER, profiler=profiler,
+                        spill_path=SPILL_FOLDER)
+features = OnlineFeatureService(ONLINE_FEATURES_FOLDER, reader)
+# The probes of the planner do not replace the stored features of the runs
+planner = SamplingPlanner(SimpleReadData(compact_dtypes=True, max_workers=min(5, os.cpu_count() or 1), profiler=profiler))
 
 @app.route('/test', methods=['GET'])
 def test():
@@ -21,20 +35,61 @@ def test():
 @app.route('/train', methods=['POST'])
 def train():
     data = request.get_json()
-    sampling_frequency = int(data['sampling_frequency'])
     target_variable = data['target_variable']
-    
-    loader.load(SimpleReadData.FILES_NAMES, FILES_FOLDER)
-    write_model_data(sampling_frequency)
+    # Optional: the sampling frequency of the defaulters, e.g. 1 to keep all of them while the others are downsampled
+    positive_sampling_frequency = int(data['positive_sampling_frequency']) if data.get('positive_sampling_frequency') is not None else None
+    # Instead of a sampling frequency, a budget of wall-clock seconds and/or bytes the frequency is chosen from.
+    # Where the planner can not fit the memory budget, it also bounds the aggregation of the tables, see SimpleReadData.
+    time_budget = float(data['time_budget']) if data.get('time_budget') is not None else None
+    memory_budget = int(data['memory_budget']) if data.get('memory_budget') is not None else None
+    if data.get('sampling_frequency') is None and time_budget is None and memory_budget is None:
+        return jsonify({'message': 'sampling_frequency, time_budget or memory_budget is required'}), 400
+
+    # Only the stages and the peak memory of this run are reported
+    profiler.reset()
+    start = time.perf_counter()
+
+    with profiler.stage('load'):
+        loader.load(SimpleReadData.FILES_NAMES, FILES_FOLDER)
+        loader.convert_to_columnar(SimpleReadData.FILES_NAMES, FILES_FOLDER)
+
+    sampling_plan = None
+    if data.get('sampling_frequency') is not None:
+        sampling_frequency = int(data['sampling_frequency'])
+    else:
+        # The time already spent loading the files is part of the budget
+        with profiler.stage('plan_sampling'):
+            remaining_time = None if time_budget is None else time_budget - (time.perf_counter() - start)
+            sampling_plan = planner.plan(FILES_FOLDER, target_variable, remaining_time, memory_budget, positive_sampling_frequency)
+        sampling_frequency = sampling_plan['sampling_frequency']
+
+    # The data is kept for /generate_structure but not read back.
+    # The planned sample fits the memory budget of the request as it is read in memory. Otherwise, as for a given sampling
+    # frequency, the tables are aggregated partition by partition and spilled to disk over the budget.
+    spill_budget = memory_budget if sampling_plan is None or not sampling_plan['fits_budget'] else None
+    loans = reader.write_data_for_model(FILES_FOLDER, DATA_FILE_MODEL, sampling_frequency, positive_sampling_frequency, memory_budget=spill_budget)
+    with profiler.stage('train'):
+        predictor.train(loans, target_variable, weight_column=SimpleReadData.SAMPLE_WEIGHT_COLUMN)
+
+    # Only the tables whose inputs changed are aggregated again
+    with profiler.stage('build_online_features'):
+        features.build(FILES_FOLDER)
 
-    loans = reader.read_data(FILES_FOLDER, DATA_FILE_MODEL)
-    predictor.train(loans, target_variable)
-    return jsonify({'message': 'Model trained successfully'}), 200
+    # The peak RSS of the process and of its workers during this run, as the memory the run needed at most.
+    # The probes of the planner reset it, so it then covers the run from the last probe on.
+    peak_memory = profiler.get_peak_memory()
+    profiler.write_run_record(RUNS_FOLDER, sampling_frequency=sampling_frequency, positive_sampling_frequency=positive_sampling_frequency,
+                              target_variable=target_variable, sampling_plan=sampling_plan, memory_budget=memory_budget, peak_memory=peak_memory)
+    return jsonify({'message': 'Model trained successfully', 'sampling_plan': sampling_plan, 'peak_memory': peak_memory, 'report': profiler.get_report()}), 200
 
 @app.route('/predict', methods=['POST'])
 def predict():
     data = request.get_json()
-    loan = pd.DataFrame(data['loan'], index=[0])
+    if 'sk_id_curr' in data:
+        # The aggregated features are looked up, the loan only has the fields of the application
+        loan = features.get_features(int(data['sk_id_curr']), data.get('loan'), predictor.X_train.columns)
+    else:
+        loan = pd.DataFrame(data['loan'], index=[0])
     prediction = predictor.predict(loan)
     return jsonify({'prediction': prediction}), 200
 
@@ -57,8 +112,7 @@ def write_model_data(frequency: int):
 
 @app.route('/generate_structure', methods=['GET'])
 def generate_structure():
-    data = reader.read_data(FILES_FOLDER, DATA_FILE_MODEL)
-    reader.write_data_structure_json(data, COMMON_STRUCTURE_PATH, JSON_FILE_STRUCTURE)
+    reader.write_data_file_structure_json(FILES_FOLDER, DATA_FILE_MODEL, COMMON_STRUCTURE_PATH, JSON_FILE_STRUCTURE)
     return jsonify({'message': 'Structure generated successfully'}), 200
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ from sklearn.preprocessing import LabelEncoder
 import pandas as pd
 
 from .loan_predictor_abc import LoanPredictor
+from ..instrumentation.stage_profiler import StageProfiler
 
 class RandomForestLoanPredictor(LoanPredictor):
     """
@@ -16,13 +17,22 @@ class RandomForestLoanPredictor(LoanPredictor):
     and evaluate the performance of the model.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, profiler: StageProfiler = None) -> None:
+        """
+        Initializes a new instance of the RandomForestLoanPredictor class.
+
+        Args:
+            profiler (StageProfiler): The profiler recording the stages of the training. A new one if None.
+        """
+        self.profiler = profiler if profiler is not None else StageProfiler()
         self.model = RandomForestClassifier()
         self.label_encoders = {}
         self.X_train = None
         self.X_test = None
         self.y_train = None
         self.y_test = None
+        self.weights_train = None
+        self.weights_test = None
         self.random_state = 42
         self.test_size = 0.2
 
@@ -52,26 +62,44 @@ class RandomForestLoanPredictor(LoanPredictor):
 
         return new_data
 
-    def train(self, loans: pd.DataFrame, target_variable: str) -> None:
+    def train(self, loans: pd.DataFrame, target_variable: str, weight_column: str = None) -> None:
         """
         Train the predictor on a DataFrame of loans.
 
         Args:
             loans (pd.DataFrame): The DataFrame of loans to train the predictor on.
             target_variable (str): The name of the target variable in the DataFrame.
+            weight_column (str): The column holding the weight of each loan, e.g. the number of loans it stands for when the
+                classes were sampled with different frequencies. It is not a feature: the model is fitted and evaluated with
+                these weights, so that it is corrected for the sampling. Ignored if the DataFrame does not have it.
 
         Returns:
             None
         """
         try:
+            has_weights = weight_column is not None and weight_column in loans.columns
+
             # Drop the target variable from the training data
-            X = loans.drop(columns=[target_variable])
-            X = self.preprocess_data(X)
+            X = loans.drop(columns=[target_variable, weight_column] if has_weights else [target_variable])
+            with self.profiler.stage('preprocess_data') as record:
+                X = self.preprocess_data(X)
+                self.profiler.record_data(record, X)
 
             y = loans[target_variable]
-            self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(X, y, test_size=self.test_size, random_state=self.random_state)
-
-            self.model.fit(self.X_train, self.y_train)
+            if has_weights:
+                self.X_train, self.X_test, self.y_train, self.y_test, self.weights_train, self.weights_test = train_test_split(
+                    X, y, loans[weight_column], test_size=self.test_size, random_state=self.random_state
+                )
+            else:
+                self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(X, y, test_size=self.test_size, random_state=self.random_state)
+                self.weights_train, self.weights_test = None, None
+
+            with self.profiler.stage('fit') as record:
+                if has_weights:
+                    self.model.fit(self.X_train, self.y_train, sample_weight=self.weights_train)
+                else:
+                    self.model.fit(self.X_train, self.y_train)
+                self.profiler.record_data(record, self.X_train)
         except Exception as e:
             logging.error(f"Failed to train the model: {e}")
 
@@ -80,11 +108,15 @@ class RandomForestLoanPredictor(LoanPredictor):
         Evaluate the performance of the predictor.
 
         Returns:
-            float: The accuracy of the model.
+            float: The accuracy of the model, weighted by the weights of the loans if it was trained with some, so that it
+                estimates the accuracy on the loans before they were sampled.
         """
         try:
             y_pred = self.model.predict(self.X_test)
-            accuracy = accuracy_score(self.y_test, y_pred)
+            if self.weights_test is not None:
+                accuracy = accuracy_score(self.y_test, y_pred, sample_weight=self.weights_test)
+            else:
+                accuracy = accuracy_score(self.y_test, y_pred)
             return accuracy
         except Exception as e:
             logging.error(f"Failed to evaluate the model: {e}")
@@ -106,6 +138,9 @@ class RandomForestLoanPredictor(LoanPredictor):
                 if ordered_loan[column].dtype == 'object':
                     ordered_loan[column] = self.label_encoders[column].transform(ordered_loan[column])
 
+            # Fill NaN values, as in preprocess_data. The features of an application without credits are NaN
+            ordered_loan = ordered_loan.fillna(0)
+
             return int(self.model.predict(ordered_loan))
         except Exception as e:
             logging.error(f"Failed to predict the outcome for the loan: {e}")
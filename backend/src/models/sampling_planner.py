@@ -0,0 +1,246 @@
+import time
+import tracemalloc
+from typing import Callable, List
+
+import numpy as np
+
+from ..data_processing.simple_read_data import SimpleReadData
+from .random_forest_loan_predictor import RandomForestLoanPredictor
+
+
+class SamplingPlanner:
+    """
+    Chooses the sampling frequency of the training data from a wall-clock time or memory budget.
+
+    The model is trained on a few small nested samples of the applications (the hash sampling keeps the 1/64 sample in the
+    1/32 one, and so on). Each probe reads the data and trains the model, measuring its time, peak memory and accuracy. Then:
+    - the time and memory of a run are fitted as a + b * rows, with a, b >= 0. The fixed cost covers the scans of whole files.
+    - the error rate is fitted as a power law of the rows, error = c * rows ** -d, with d >= 0 (a learning curve).
+
+    The frequency chosen is the smallest one, i.e. the largest sample, whose expected time and memory fit the budget. The
+    time spent on the probes is taken from the time budget. The memory is the peak RSS of the process and of the worker
+    processes of the reader, as a run reports it, see StageProfiler.get_peak_memory. Where the peak RSS can not be reset,
+    the probe is run once more to trace the memory allocated in this process with tracemalloc, without the workers.
+
+    The reader must not have a feature store: the probes would replace the stored features of the runs, and the time
+    spent saving them would be counted in the probes.
+    """
+
+    DEFAULT_PROBE_FREQUENCIES = [64, 32, 16]
+    MAX_FREQUENCY = 1000
+
+    def __init__(self, reader: SimpleReadData, predictor_factory: Callable[[], RandomForestLoanPredictor] = RandomForestLoanPredictor,
+                 probe_frequencies: List[int] = None) -> None:
+        """
+        Initializes a new instance of the SamplingPlanner class.
+
+        Args:
+            reader (SimpleReadData): The reader of the training data, configured as the one of the run but without a
+                feature store.
+            predictor_factory (Callable[[], RandomForestLoanPredictor]): Creates the predictors trained on the probes, so that
+                the predictor of the run is not modified.
+            probe_frequencies (List[int]): The sampling frequencies of the probes, at least 2 of them. Larger frequencies
+                give smaller samples and faster probes.
+        """
+        if reader.feature_store is not None:
+            raise ValueError("The reader of the probes must not have a feature store.")
+
+        probe_frequencies = sorted(set(probe_frequencies or self.DEFAULT_PROBE_FREQUENCIES), reverse=True)
+        if len(probe_frequencies) < 2 or probe_frequencies[-1] < 1:
+            raise ValueError("At least 2 positive probe frequencies are needed to fit the curves.")
+
+        self.reader = reader
+        self.predictor_factory = predictor_factory
+        self.probe_frequencies = probe_frequencies
+
+    def run_probe(self, files_path: str, target_variable: str, sampling_frequency: int, positive_sampling_frequency: int = None) -> tuple:
+        """
+        Read a sample of the data and train a model on it.
+
+        Args:
+            files_path (str): The path where the files are located.
+            target_variable (str): The name of the target variable.
+            sampling_frequency (int): The sampling frequency of the probe.
+            positive_sampling_frequency (int): The sampling frequency of the applications whose target is 1, see SimpleReadData.retrieve_data.
+
+        Returns:
+            tuple: The data read and the accuracy of the model.
+        """
+        loans = self.reader.retrieve_data(files_path, sampling_frequency, positive_sampling_frequency)
+        predictor = self.predictor_factory()
+        predictor.train(loans, target_variable, weight_column=SimpleReadData.SAMPLE_WEIGHT_COLUMN)
+
+        return loans, predictor.evaluate()
+
+    def probe(self, files_path: str, target_variable: str, sampling_frequency: int, positive_sampling_frequency: int = None) -> dict:
+        """
+        Measure the time, memory and accuracy of a run on a sample of the data.
+
+        The memory is the peak RSS of the process during the probe, plus the largest peak RSS of the worker processes for
+        each worker of the reader, as they may all run at once. The peak RSS of the process is reset by the probe, see
+        StageProfiler.reset_peak_memory. Where it can not be, the memory is traced in a second run, as tracing slows every
+        allocation down.
+
+        Args:
+            files_path (str): The path where the files are located.
+            target_variable (str): The name of the target variable.
+            sampling_frequency (int): The sampling frequency of the probe.
+            positive_sampling_frequency (int): The sampling frequency of the applications whose target is 1, see SimpleReadData.retrieve_data.
+
+        Returns:
+            dict: The sampling frequency, the rows and positive rows read, the wall time, the peak memory in bytes and the
+                accuracy of the probe.
+        """
+        profiler = self.reader.profiler
+        profiler.reset_peak_memory()
+        start = time.perf_counter()
+        loans, accuracy = self.run_probe(files_path, target_variable, sampling_frequency, positive_sampling_frequency)
+        elapsed_time = time.perf_counter() - start
+        peak_memory = profiler.get_peak_memory()
+        rows, positive_rows = len(loans), int((loans[target_variable] == 1).sum())
+        del loans
+
+        if peak_memory['peak_rss'] is not None:
+            memory = peak_memory['peak_rss'] + (peak_memory['peak_rss_workers'] or 0) * self.reader.max_workers
+        else:
+            memory = self.trace_probe(files_path, target_variable, sampling_frequency, positive_sampling_frequency)
+
+        return {
+            'sampling_frequency': sampling_frequency,
+            'rows': rows,
+            'positive_rows': positive_rows,
+            'time': elapsed_time,
+            'memory': memory,
+            'accuracy': None if accuracy is None else float(accuracy),
+        }
+
+    def trace_probe(self, files_path: str, target_variable: str, sampling_frequency: int, positive_sampling_frequency: int = None) -> int:
+        """
+        Measure the peak memory allocated in this process by a run on a sample of the data, as traced by tracemalloc.
+
+        Args:
+            files_path (str): The path where the files are located.
+            target_variable (str): The name of the target variable.
+            sampling_frequency (int): The sampling frequency of the probe.
+            positive_sampling_frequency (int): The sampling frequency of the applications whose target is 1, see SimpleReadData.retrieve_data.
+
+        Returns:
+            int: The peak traced memory in bytes. The memory of worker processes is not counted.
+        """
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+
+        try:
+            self.run_probe(files_path, target_variable, sampling_frequency, positive_sampling_frequency)
+            return tracemalloc.get_traced_memory()[1] - traced_before
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+    @staticmethod
+    def fit_linear(rows: np.ndarray, values: np.ndarray) -> tuple:
+        """
+        Fit values = a + b * rows by least squares, with a, b >= 0.
+
+        Args:
+            rows (np.ndarray): The rows of the probes.
+            values (np.ndarray): The measured values.
+
+        Returns:
+            tuple: a and b.
+        """
+        (intercept, slope), *_ = np.linalg.lstsq(np.column_stack([np.ones(len(rows)), rows]), values, rcond=None)
+        if intercept < 0:
+            intercept, slope = 0.0, max(float(np.dot(rows, values) / np.dot(rows, rows)), 0.0)
+        elif slope < 0:
+            intercept, slope = float(np.mean(values)), 0.0
+
+        return float(intercept), float(slope)
+
+    @staticmethod
+    def fit_learning_curve(rows: np.ndarray, accuracies: np.ndarray) -> tuple:
+        """
+        Fit error = c * rows ** -d in log space, with d >= 0.
+
+        Args:
+            rows (np.ndarray): The rows of the probes.
+            accuracies (np.ndarray): The accuracies of the probes.
+
+        Returns:
+            tuple: c and d. None if an accuracy is missing.
+        """
+        if any(accuracy is None or np.isnan(accuracy) for accuracy in accuracies):
+            return None
+
+        # A probe without errors is given half an error, so that the logarithm is defined
+        errors = np.maximum(1 - np.asarray(accuracies, dtype='float64'), 0.5 / rows)
+        slope, intercept = np.polyfit(np.log(rows), np.log(errors), 1)
+        decay = max(-slope, 0.0)
+        if decay == 0.0:
+            return float(np.mean(errors)), 0.0
+
+        return float(np.exp(intercept)), float(decay)
+
+    def plan(self, files_path: str, target_variable: str, time_budget: float = None, memory_budget: int = None,
+             positive_sampling_frequency: int = None) -> dict:
+        """
+        Choose the sampling frequency of a run from a budget.
+
+        Args:
+            files_path (str): The path where the files are located.
+            target_variable (str): The name of the target variable.
+            time_budget (float): The wall-clock time, in seconds, of the probes and of the run. Unlimited if None.
+            memory_budget (int): The peak memory, in bytes, of the run. Unlimited if None.
+            positive_sampling_frequency (int): The sampling frequency of the applications whose target is 1. The other
+                applications are sampled with the frequency chosen.
+
+        Returns:
+            dict: The sampling frequency chosen, the expected rows, time, memory and accuracy of the run, whether it fits
+                the budget (the largest probe frequency is chosen otherwise) and the measures of the probes.
+        """
+        if time_budget is None and memory_budget is None:
+            raise ValueError("A time or memory budget is needed to choose the sampling frequency.")
+
+        start = time.perf_counter()
+        probes = [self.probe(files_path, target_variable, frequency, positive_sampling_frequency) for frequency in self.probe_frequencies]
+        probes_time = time.perf_counter() - start
+
+        probe_rows = np.array([probe['rows'] for probe in probes], dtype='float64')
+        time_curve = self.fit_linear(probe_rows, np.array([probe['time'] for probe in probes]))
+        memory_curve = self.fit_linear(probe_rows, np.array([probe['memory'] for probe in probes], dtype='float64'))
+        learning_curve = self.fit_learning_curve(probe_rows, [probe['accuracy'] for probe in probes])
+
+        # The applications of each class in the files, estimated from the probes, as the hash sampling keeps 1 out of the frequency of each class
+        positive_frequency = positive_sampling_frequency
+        positives = np.mean([probe['positive_rows'] * (positive_frequency or probe['sampling_frequency']) for probe in probes])
+        negatives = np.mean([(probe['rows'] - probe['positive_rows']) * probe['sampling_frequency'] for probe in probes])
+
+        remaining_time = None if time_budget is None else time_budget - probes_time
+        frequencies = np.arange(1, max(self.MAX_FREQUENCY, self.probe_frequencies[0]) + 1)
+        rows = negatives / frequencies + (positives / positive_frequency if positive_frequency else positives / frequencies)
+        expected_times = time_curve[0] + time_curve[1] * rows
+        expected_memories = memory_curve[0] + memory_curve[1] * rows
+
+        fits = np.ones(len(frequencies), dtype=bool)
+        if remaining_time is not None:
+            fits &= expected_times <= remaining_time
+        if memory_budget is not None:
+            fits &= expected_memories <= memory_budget
+
+        position = int(np.argmax(fits)) if fits.any() else self.probe_frequencies[0] - 1
+        expected_rows = float(rows[position])
+
+        return {
+            'sampling_frequency': int(frequencies[position]),
+            'positive_sampling_frequency': positive_sampling_frequency,
+            'fits_budget': bool(fits[position]),
+            'expected_rows': int(round(expected_rows)),
+            'expected_time': float(expected_times[position]),
+            'expected_memory': int(expected_memories[position]),
+            'expected_accuracy': None if learning_curve is None else float(1 - min(learning_curve[0] * expected_rows ** -learning_curve[1], 1.0)),
+            'probes_time': probes_time,
+            'probes': probes,
+        }
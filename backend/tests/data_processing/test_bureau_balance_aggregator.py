@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.bureau_balance_aggregator import BureauBalanceAggregator
+
+class TestBureauBalanceAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files_path = self.temp_dir.name
+
+        rng = np.random.default_rng(0)
+        nb_rows = 500
+        self.bureau_data = pd.DataFrame({
+            'SK_ID_CURR': np.repeat(np.arange(1, 21), 3),
+            'SK_ID_BUREAU': np.arange(1000, 1060),
+        })
+        self.balance_data = pd.DataFrame({
+            'SK_ID_BUREAU': rng.integers(1000, 1080, nb_rows),
+            'MONTHS_BALANCE': rng.integers(-96, 1, nb_rows),
+            'STATUS': rng.choice(BureauBalanceAggregator.STATUS_VALUES, nb_rows),
+        })
+        self.balance_data.to_csv(os.path.join(self.files_path, 'bureau_balance.csv'), index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def expected_balance(self, bureau_ids) -> pd.DataFrame:
+        data = self.balance_data[self.balance_data['SK_ID_BUREAU'].isin(bureau_ids)]
+        dpd = data['STATUS'].map(BureauBalanceAggregator.DPD_BY_STATUS)
+
+        expected_balance = pd.DataFrame({
+            'MONTHS_BALANCE_min': data.groupby('SK_ID_BUREAU')['MONTHS_BALANCE'].min(),
+            'MONTHS_BALANCE_max': data.groupby('SK_ID_BUREAU')['MONTHS_BALANCE'].max(),
+            'MONTHS_BALANCE_size': data.groupby('SK_ID_BUREAU').size(),
+            'DPD_max': dpd.groupby(data['SK_ID_BUREAU']).max(),
+        })
+        for value in BureauBalanceAggregator.STATUS_VALUES:
+            expected_balance[f"STATUS_{value}_sum"] = (data['STATUS'] == value).groupby(data['SK_ID_BUREAU']).sum()
+
+        return expected_balance
+
+    def test_reduce_chunk(self):
+        # Arrange
+        aggregator = BureauBalanceAggregator(chunk_size=10)
+        chunk = pd.DataFrame({
+            'SK_ID_BUREAU': [1, 1, 1, 2],
+            'MONTHS_BALANCE': [0, -1, -2, -5],
+            'STATUS': ['C', '2', '0', 'X'],
+        })
+
+        # Act
+        result = aggregator.reduce_chunk(chunk)
+
+        # Assert
+        self.assertEqual(result.loc[1, 'MONTHS_BALANCE_min'], -2)
+        self.assertEqual(result.loc[1, 'MONTHS_BALANCE_size'], 3)
+        self.assertEqual(result.loc[1, 'DPD_max'], 2)
+        self.assertTrue(np.isnan(result.loc[2, 'DPD_max']))
+        self.assertEqual(result.loc[1, ['STATUS_C_sum', 'STATUS_X_sum', 'STATUS_0_sum', 'STATUS_2_sum']].tolist(), [1, 0, 1, 1])
+        self.assertEqual(result.loc[2, 'STATUS_X_sum'], 1)
+
+    def test_aggregate_balance_in_chunks(self):
+        # Arrange
+        aggregator = BureauBalanceAggregator(chunk_size=7)
+        bureau_ids = self.bureau_data['SK_ID_BUREAU']
+
+        # Act
+        result = aggregator.aggregate_balance(self.files_path, 'bureau_balance.csv', bureau_ids)
+
+        # Assert
+        expected_result = self.expected_balance(bureau_ids)
+        self.assertTrue(result.index.isin(bureau_ids).all())
+        pd.testing.assert_frame_equal(result.sort_index(), expected_result, check_dtype=False, check_names=False)
+
+    def test_aggregate_balance_columnar_file(self):
+        # Arrange
+        aggregator = BureauBalanceAggregator(chunk_size=50)
+        bureau_ids = self.bureau_data['SK_ID_BUREAU'][:10]
+        csv_result = aggregator.aggregate_balance(self.files_path, 'bureau_balance.csv', bureau_ids)
+        self.balance_data.to_parquet(os.path.join(self.files_path, 'bureau_balance.parquet'), index=False)
+
+        # Act
+        result = aggregator.aggregate_balance(self.files_path, 'bureau_balance.csv', bureau_ids)
+
+        # Assert
+        pd.testing.assert_frame_equal(result.sort_index(), csv_result.sort_index(), check_dtype=False)
+
+    def test_aggregate_balance_without_credits(self):
+        # Arrange
+        aggregator = BureauBalanceAggregator(chunk_size=50)
+
+        # Act
+        result = aggregator.aggregate_balance(self.files_path, 'bureau_balance.csv', [1])
+
+        # Assert
+        self.assertTrue(result.empty)
+        self.assertIn('STATUS_C_sum', result.columns)
+
+    def test_aggregate(self):
+        # Arrange
+        aggregator = BureauBalanceAggregator(chunk_size=50)
+        balance_data = aggregator.aggregate_balance(self.files_path, 'bureau_balance.csv', self.bureau_data['SK_ID_BUREAU'])
+
+        # Act
+        result = aggregator.aggregate(self.bureau_data, balance_data)
+
+        # Assert
+        data = self.bureau_data.join(self.expected_balance(self.bureau_data['SK_ID_BUREAU']), on='SK_ID_BUREAU', how='inner')
+        self.assertEqual(result['SK_ID_CURR'].tolist(), sorted(data['SK_ID_CURR'].unique()))
+        np.testing.assert_array_equal(result['MONTHS_BALANCE_size_sum'], data.groupby('SK_ID_CURR')['MONTHS_BALANCE_size'].sum())
+        np.testing.assert_array_equal(result['DPD_max_max'], data.groupby('SK_ID_CURR')['DPD_max'].max())
+        np.testing.assert_array_equal(result['STATUS_5_sum_sum'], data.groupby('SK_ID_CURR')['STATUS_5_sum'].sum())
+
+if __name__ == '__main__':
+    unittest.main()
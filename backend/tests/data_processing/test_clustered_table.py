@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.clustered_table import ClusteredTable
+
+class TestClusteredTable(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'bureau.clustered.arrow')
+        self.data = pd.DataFrame({
+            'SK_ID_CURR': [30, 10, 20, 10, 40, 30, 10, 50, 20, 30],
+            'AMT_CREDIT_SUM': np.arange(10) * 1.5,
+            'CREDIT_ACTIVE': list('ABCDEFGHIJ')
+        })
+        ClusteredTable.write(self.data, self.path, 'SK_ID_CURR', block_size=3)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_read_all_rows_sorted_by_key(self):
+        # Arrange
+        table = ClusteredTable(self.path)
+
+        # Act
+        result = table.read()
+
+        # Assert
+        pd.testing.assert_frame_equal(result, self.data.sort_values('SK_ID_CURR', kind='stable', ignore_index=True))
+        self.assertEqual(table.first_keys.tolist(), [10, 20, 30, 50])
+        self.assertEqual(table.last_keys.tolist(), [10, 30, 40, 50])
+        self.assertEqual(os.listdir(self.temp_dir.name), ['bureau.clustered.arrow'])
+
+    def test_read_ids(self):
+        # Arrange
+        table = ClusteredTable(self.path)
+        expected_result = self.data[self.data['SK_ID_CURR'].isin([20, 40, 30])].sort_values('SK_ID_CURR', kind='stable', ignore_index=True)
+
+        # Act
+        result = table.read([40, 30, 20, 15, 40], columns=['SK_ID_CURR', 'CREDIT_ACTIVE'])
+
+        # Assert
+        pd.testing.assert_frame_equal(result, expected_result[['SK_ID_CURR', 'CREDIT_ACTIVE']])
+
+    def test_read_only_the_blocks_of_the_ids(self):
+        # Arrange
+        table = ClusteredTable(self.path)
+
+        # Act
+        batches = list(table.iter_record_batches([50]))
+
+        # Assert
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0].column('AMT_CREDIT_SUM').to_pylist(), [10.5])
+
+    def test_read_missing_ids(self):
+        # Arrange
+        table = ClusteredTable(self.path)
+
+        # Act
+        result = table.read([1, 25, 60], columns=['SK_ID_CURR', 'AMT_CREDIT_SUM'])
+        empty_result = table.read([])
+
+        # Assert
+        self.assertTrue(result.empty)
+        self.assertEqual(list(result.columns), ['SK_ID_CURR', 'AMT_CREDIT_SUM'])
+        self.assertEqual(str(result['AMT_CREDIT_SUM'].dtype), 'float64')
+        self.assertEqual(list(empty_result.columns), list(self.data.columns))
+
+    def test_get_row_indices(self):
+        # Arrange
+        keys = np.array([-1, -1, 10, 10, 10, 20, 30, 30, 30])
+
+        # Act
+        result = ClusteredTable.get_row_indices(keys, np.array([10, 15, 30, 40]))
+
+        # Assert
+        np.testing.assert_array_equal(result, [2, 3, 4, 6, 7, 8])
+
+    def test_get_clustered_path(self):
+        # Arrange
+        files_path = self.temp_dir.name
+        with open(os.path.join(files_path, 'bureau.csv'), 'w') as f:
+            f.write('SK_ID_CURR\n1\n')
+        os.utime(os.path.join(files_path, 'bureau.csv'), ns=(0, 0))
+
+        # Act
+        up_to_date_path = ClusteredTable.get_clustered_path(files_path, 'bureau.csv')
+        missing_path = ClusteredTable.get_clustered_path(files_path, 'previous_application.csv')
+        os.utime(self.path, ns=(0, 0))
+        os.utime(os.path.join(files_path, 'bureau.csv'), ns=(10 ** 9, 10 ** 9))
+        outdated_path = ClusteredTable.get_clustered_path(files_path, 'bureau.csv')
+
+        # Assert
+        self.assertEqual(up_to_date_path, f"{files_path}/bureau.clustered.arrow")
+        self.assertIsNone(missing_path)
+        self.assertIsNone(outdated_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.data_structure_builder import DataStructureBuilder
+
+def column_by_column_structure(data: pd.DataFrame) -> dict:
+    """
+    Structure computed column by column, as write_data_structure_json used to.
+    """
+    structure = {}
+    for column in data.columns:
+        dtype = str(data[column].dtype)
+        if (dtype.startswith('int') and data[column].nunique() > 2) or dtype.startswith('float'):
+            structure[column] = {'type': dtype}
+        else:
+            structure[column] = {'type': dtype, 'values': data[column].dropna().unique().tolist()}
+
+    return structure
+
+class TestDataStructureBuilder(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        nb_rows = 250
+        self.data = pd.DataFrame({
+            'SK_ID_CURR': np.arange(nb_rows),
+            'TARGET': rng.integers(0, 2, nb_rows),
+            'FLAG_CONSTANT': np.full(nb_rows, 7, dtype='int8'),
+            'FLAG_LATE_VALUE': np.where(np.arange(nb_rows) < 200, 1, 0),
+            'CNT_SMALL': np.where(np.arange(nb_rows) < 100, rng.integers(0, 2, nb_rows), 2),
+            'AMT_CREDIT': rng.normal(0, 1, nb_rows),
+            'AMT_ANNUITY_mean': rng.normal(0, 1, nb_rows).astype('float32'),
+            'NAME_CONTRACT_TYPE': rng.choice(['Cash loans', 'Revolving loans', None], nb_rows),
+            'ORGANIZATION_TYPE': pd.Categorical(rng.choice(['Business', 'School', 'XNA'], nb_rows)),
+            'FLAG_OWN_CAR': rng.random(nb_rows) < 0.5,
+            'EMPTY': np.full(nb_rows, None, dtype=object),
+        })
+
+    def test_build_matches_column_by_column_structure(self):
+        for batch_size in [1000, 64, 1]:
+            # Arrange
+            builder = DataStructureBuilder()
+            builder.BATCH_SIZE = batch_size
+
+            # Act
+            result = builder.build(self.data)
+
+            # Assert
+            self.assertEqual(result, column_by_column_structure(self.data))
+
+    def test_build_empty_data(self):
+        # Act
+        result = DataStructureBuilder().build(self.data.iloc[:0])
+
+        # Assert
+        self.assertEqual(result, column_by_column_structure(self.data.iloc[:0]))
+
+    def test_max_values(self):
+        # Arrange
+        builder = DataStructureBuilder(max_values=2)
+
+        # Act
+        result = builder.build(self.data)
+
+        # Assert
+        self.assertEqual(result['NAME_CONTRACT_TYPE']['values'], column_by_column_structure(self.data)['NAME_CONTRACT_TYPE']['values'])
+        self.assertEqual(result['ORGANIZATION_TYPE'], {'type': 'category'})
+
+    def test_update_integer_columns_across_batches(self):
+        # Arrange
+        builder = DataStructureBuilder()
+
+        # Act
+        builder.update(pd.DataFrame({'FLAG': [1, 1], 'COUNT': [0, 1]}))
+        builder.update(pd.DataFrame({'FLAG': [0, 1], 'COUNT': [2, 2]}))
+
+        # Assert
+        self.assertEqual(builder.get_structure(), {
+            'FLAG': {'type': 'int64', 'values': [1, 0]},
+            'COUNT': {'type': 'int64'},
+        })
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timezone
+from backend.src.data_processing.download_manifest import DownloadManifest
+from backend.src.data_processing.local_blob_container import LocalBlobProperties
+
+class TestDownloadManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.download_path = self.temp_dir.name
+        self.file_path = os.path.join(self.download_path, 'test.csv')
+        with open(self.file_path, 'wb') as f:
+            f.write(b'test data')
+        self.properties = LocalBlobProperties('test.csv', 9, '"0x1"', datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_record_and_reload(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+
+        # Act
+        manifest.record('test.csv', self.properties)
+        reloaded_manifest = DownloadManifest(self.download_path)
+
+        # Assert
+        entry = reloaded_manifest.entries['test.csv']
+        self.assertEqual(entry['blob'], {'etag': '"0x1"', 'size': 9, 'last_modified': '2024-01-01T00:00:00+00:00'})
+        self.assertEqual(entry['sha256'], DownloadManifest.file_checksum(self.file_path))
+        self.assertEqual(entry['size'], 9)
+
+    def test_is_up_to_date_unchanged_file_is_not_read(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+
+        # Act
+        with patch.object(DownloadManifest, 'file_checksum') as mock_checksum:
+            result = manifest.is_up_to_date('test.csv', self.properties)
+
+        # Assert
+        self.assertTrue(result)
+        mock_checksum.assert_not_called()
+
+    def test_is_up_to_date_changed_blob(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+        new_properties = LocalBlobProperties('test.csv', 9, '"0x2"', datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+        # Act and Assert
+        self.assertFalse(manifest.is_up_to_date('test.csv', new_properties))
+
+    def test_is_up_to_date_corrupt_file(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+        with open(self.file_path, 'wb') as f:
+            f.write(b'test dat!')
+        os.utime(self.file_path, ns=(0, 0))
+
+        # Act and Assert
+        self.assertFalse(manifest.is_up_to_date('test.csv', self.properties))
+
+    def test_is_up_to_date_truncated_file(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+        with open(self.file_path, 'wb') as f:
+            f.write(b'test')
+
+        # Act and Assert
+        self.assertFalse(manifest.is_up_to_date('test.csv', self.properties))
+
+    def test_is_up_to_date_touched_file(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+        os.utime(self.file_path, ns=(0, 0))
+
+        # Act and Assert
+        self.assertTrue(manifest.is_up_to_date('test.csv', self.properties))
+        self.assertEqual(manifest.entries['test.csv']['mtime_ns'], 0)
+
+    def test_is_up_to_date_adopts_matching_file_without_entry(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        properties = LocalBlobProperties('test.csv', 9, '"0x1"', datetime(2024, 1, 1, tzinfo=timezone.utc), hashlib.md5(b'test data').digest())
+
+        # Act and Assert
+        self.assertTrue(manifest.is_up_to_date('test.csv', properties))
+        self.assertIn('test.csv', DownloadManifest(self.download_path).entries)
+
+    def test_is_up_to_date_rejects_other_content_without_entry(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        properties = LocalBlobProperties('test.csv', 9, '"0x1"', datetime(2024, 1, 1, tzinfo=timezone.utc), hashlib.md5(b'test dat!').digest())
+
+        # Act and Assert
+        # A file of the same size but another content, or without the MD5 of the blob to compare with, is downloaded again
+        self.assertFalse(manifest.is_up_to_date('test.csv', properties))
+        self.assertFalse(manifest.is_up_to_date('test.csv', self.properties))
+        self.assertNotIn('test.csv', DownloadManifest(self.download_path).entries)
+
+    def test_is_up_to_date_rejects_partial_file_without_entry(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        properties = LocalBlobProperties('test.csv', 100, '"0x1"', datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+        # Act and Assert
+        self.assertFalse(manifest.is_up_to_date('test.csv', properties))
+
+    def test_is_up_to_date_missing_file(self):
+        # Arrange
+        manifest = DownloadManifest(self.download_path)
+        manifest.record('test.csv', self.properties)
+        os.remove(self.file_path)
+
+        # Act and Assert
+        self.assertFalse(manifest.is_up_to_date('test.csv', self.properties))
+
+if __name__ == '__main__':
+    unittest.main()
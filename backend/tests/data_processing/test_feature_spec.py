@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.feature_spec import FeatureSpec
+from backend.src.data_processing.simple_read_data import SimpleReadData
+
+class TestFeatureSpec(unittest.TestCase):
+
+    def setUp(self):
+        self.feature_spec = FeatureSpec()
+
+    def test_compile_all_features(self):
+        # Act
+        plan = self.feature_spec.compile('bureau.csv')
+
+        # Assert
+        self.assertEqual(list(plan.derived), ['CREDIT_DURATION'])
+        self.assertIn('CREDIT_DURATION', plan.aggregations)
+        self.assertIn('DAYS_ENDDATE_FACT', plan.read_columns)
+        self.assertNotIn('CREDIT_DURATION', plan.read_columns)
+        self.assertNotIn('SK_ID_BUREAU', plan.read_columns)
+        self.assertEqual(plan.get_extra_columns(), ['DAYS_CREDIT_ENDDATE', 'DAYS_ENDDATE_FACT'])
+        self.assertEqual(plan.sequences['order'], 'DAYS_CREDIT')
+        self.assertEqual(list(plan.sequences['features']), ['DAYS_CREDIT_DIFF_MEAN'])
+        self.assertIsNone(self.feature_spec.compile('application_train.csv'))
+
+    def test_compile_removes_unused_columns(self):
+        # Act
+        duration_plan = self.feature_spec.compile('bureau.csv', ['CREDIT_DURATION_mean', 'AMT_CREDIT_SUM_max'])
+        amount_plan = self.feature_spec.compile('bureau.csv', ['AMT_CREDIT_SUM_max', 'CREDIT_ACTIVE_Closed_sum'])
+
+        # Assert
+        self.assertEqual(duration_plan.aggregations, {'CREDIT_DURATION': ['mean'], 'AMT_CREDIT_SUM': ['max']})
+        self.assertEqual(sorted(duration_plan.read_columns), ['AMT_CREDIT_SUM', 'DAYS_CREDIT', 'DAYS_CREDIT_ENDDATE', 'DAYS_ENDDATE_FACT', 'SK_ID_CURR'])
+        self.assertEqual(duration_plan.categorical_columns, [])
+        self.assertEqual(duration_plan.sequences, {})
+        self.assertIsNone(duration_plan.get_sequence_aggregator())
+        self.assertEqual(amount_plan.derived, {})
+        self.assertEqual(sorted(amount_plan.read_columns), ['AMT_CREDIT_SUM', 'CREDIT_ACTIVE', 'SK_ID_CURR'])
+
+    def test_plan_aggregate(self):
+        # Arrange
+        data = pd.DataFrame({
+            'SK_ID_CURR': [1, 1, 2],
+            'CREDIT_ACTIVE': ['Active', 'Closed', 'Active'],
+            'DAYS_CREDIT': [-100, -50, -10],
+            'DAYS_ENDDATE_FACT': [-20, np.nan, np.nan],
+            'DAYS_CREDIT_ENDDATE': [10, 100, np.nan],
+            'AMT_CREDIT_SUM': [1000.0, 3000.0, 500.0],
+        })
+        plan = self.feature_spec.compile('bureau.csv', ['CREDIT_DURATION_max', 'AMT_CREDIT_SUM_mean', 'CREDIT_ACTIVE_Active_sum', 'DAYS_CREDIT_DIFF_MEAN'])
+
+        # Act
+        result = plan.aggregate(data)
+
+        # Assert
+        expected_result = pd.DataFrame({
+            'SK_ID_CURR': [1, 2],
+            'CREDIT_DURATION_max': [150, 0],
+            'AMT_CREDIT_SUM_mean': [2000.0, 500.0],
+            'CREDIT_ACTIVE_Active_sum': [1, 1],
+            'CREDIT_ACTIVE_Closed_sum': [1, 0],
+            'DAYS_CREDIT_DIFF_MEAN': [50.0, np.nan],
+        })
+        pd.testing.assert_frame_equal(result, expected_result)
+        self.assertNotIn('CREDIT_DURATION', data.columns)
+
+    def test_plan_aggregate_shards(self):
+        # Arrange
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'SK_ID_CURR': np.sort(rng.integers(1, 20, 200)),
+            'CREDIT_ACTIVE': rng.choice(['Active', 'Closed', 'Sold'], 200),
+            'DAYS_CREDIT': rng.integers(-3000, 0, 200),
+            'DAYS_ENDDATE_FACT': np.where(rng.random(200) < 0.3, np.nan, rng.integers(-3000, 0, 200)),
+            'DAYS_CREDIT_ENDDATE': rng.integers(-3000, 3000, 200).astype('float64'),
+            'AMT_CREDIT_SUM': rng.random(200) * 1000,
+        })
+        plan = self.feature_spec.compile('bureau.csv', ['CREDIT_DURATION_max', 'AMT_CREDIT_SUM_mean', 'CREDIT_ACTIVE_Active_sum', 'DAYS_CREDIT_DIFF_MEAN'])
+
+        # Act
+        result = plan.aggregate(data[start:start + 13] for start in range(0, len(data), 13))
+
+        # Assert
+        self.assertIn('DAYS_CREDIT_DIFF_MEAN', result.columns)
+        pd.testing.assert_frame_equal(result, plan.aggregate(data))
+
+    def test_expression(self):
+        # Arrange
+        expression = ['subtract', ['coalesce', 'A', 'B'], ['multiply', 'C', 2]]
+        data = pd.DataFrame({'A': [1.0, np.nan], 'B': [5.0, 6.0], 'C': [1, 2]})
+
+        # Act
+        values = FeatureSpec.evaluate(expression, data)
+        sql = FeatureSpec.to_sql(expression, lambda column: f't."{column}"')
+
+        # Assert
+        self.assertEqual(FeatureSpec.get_expression_columns(expression), ['A', 'B', 'C'])
+        self.assertEqual(values.tolist(), [-1.0, 2.0])
+        self.assertEqual(sql, '(COALESCE(t."A", t."B") - (t."C" * 2))')
+
+    def test_invalid_spec(self):
+        with tempfile.TemporaryDirectory() as temp_path:
+            for table_spec in [
+                {'derived': {'X': {'expression': ['power', 'AMT_BALANCE', 2]}}, 'aggregations': {'X': ['max']}},
+                {'aggregations': {'UNKNOWN_COLUMN': ['max']}},
+                {'aggregations': {'AMT_BALANCE': ['median']}},
+                {'sequences': {'order': 'MONTHS_BALANCE', 'features': {'X': {'column': 'AMT_BALANCE', 'function': 'median'}}}},
+                {'sequences': {'order': 'MONTHS_BALANCE', 'features': {'X': {'column': 'AMT_BALANCE', 'function': 'last', 'last': 3}}}},
+            ]:
+                # Arrange
+                feature_spec_path = os.path.join(temp_path, 'feature_spec.json')
+                with open(feature_spec_path, 'w') as f:
+                    json.dump({'groupby': 'SK_ID_CURR', 'tables': {'CREDIT_CARD_BALANCE_NAME': table_spec}}, f)
+                feature_spec = FeatureSpec(feature_spec_path)
+
+                # Act & Assert
+                with self.assertRaises(ValueError):
+                    plan = feature_spec.compile('credit_card_balance.csv')
+                    plan.get_aggregator()
+                    plan.get_sequence_aggregator()
+
+    def test_spec_tables_are_aggregated(self):
+        self.assertEqual(sorted(self.feature_spec.get_file_names()), sorted(set(SimpleReadData().get_aggregation_methods()) - {'bureau_balance.csv'}))
+
+    def test_sequence_columns_are_read(self):
+        # Act
+        plan = self.feature_spec.compile('installments_payments.csv', ['PAYMENT_DELAY_LAST_3_MEAN'])
+        sql_columns = plan.get_sql_columns(lambda column: column, 't')
+
+        # Assert
+        self.assertEqual(plan.aggregations, {})
+        self.assertEqual(list(plan.derived), ['PAYMENT_DELAY'])
+        self.assertEqual(sorted(plan.read_columns), ['DAYS_ENTRY_PAYMENT', 'DAYS_INSTALMENT', 'SK_ID_CURR'])
+        self.assertEqual(sql_columns, {'DAYS_INSTALMENT': 't.DAYS_INSTALMENT', 'PAYMENT_DELAY': '(t.DAYS_ENTRY_PAYMENT - t.DAYS_INSTALMENT)', 'DAYS_ENTRY_PAYMENT': 't.DAYS_ENTRY_PAYMENT'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from backend.src.data_processing.feature_store import FeatureStore
+
+class TestFeatureStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.temp_dir.name, 'features')
+        self.data = pd.DataFrame({'SK_ID_CURR': [1, 2], 'AMT_CREDIT_SUM_mean': [0.5, 1.5]})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_and_load(self):
+        # Arrange
+        store = FeatureStore(self.store_path)
+
+        # Act
+        store.save('bureau.csv', 'fingerprint', self.data)
+        result = FeatureStore(self.store_path).load('bureau.csv', 'fingerprint')
+
+        # Assert
+        self.assertTrue(os.path.isfile(os.path.join(self.store_path, 'bureau.parquet')))
+        pd.testing.assert_frame_equal(result, self.data)
+
+    def test_load_outdated_or_missing_entry(self):
+        # Arrange
+        store = FeatureStore(self.store_path)
+        store.save('bureau.csv', 'fingerprint', self.data)
+
+        # Act & Assert
+        self.assertIsNone(store.load('bureau.csv', 'other fingerprint'))
+        self.assertIsNone(store.load('previous_application.csv', 'fingerprint'))
+
+        os.remove(store.get_path('bureau.csv'))
+        self.assertIsNone(store.load('bureau.csv', 'fingerprint'))
+
+    def test_unreadable_manifest(self):
+        # Arrange
+        os.makedirs(self.store_path)
+        with open(os.path.join(self.store_path, FeatureStore.MANIFEST_NAME), 'w') as f:
+            f.write('{not json')
+
+        # Act
+        store = FeatureStore(self.store_path)
+
+        # Assert
+        self.assertEqual(store.entries, {})
+
+    def test_fingerprint(self):
+        # Act & Assert
+        self.assertEqual(FeatureStore.fingerprint(a=1, b=[1, 2]), FeatureStore.fingerprint(b=[1, 2], a=1))
+        self.assertNotEqual(FeatureStore.fingerprint(a=1, b=[1, 2]), FeatureStore.fingerprint(a=2, b=[1, 2]))
+
+    def test_source_fingerprint(self):
+        # Arrange
+        csv_path = os.path.join(self.temp_dir.name, 'bureau.csv')
+        self.data.to_csv(csv_path, index=False)
+
+        # Act
+        fingerprint = FeatureStore.source_fingerprint(self.temp_dir.name, 'bureau.csv')
+        os.utime(csv_path, ns=(0, 0))
+        touched_fingerprint = FeatureStore.source_fingerprint(self.temp_dir.name, 'bureau.csv')
+
+        # Assert
+        self.assertEqual(list(fingerprint), ['bureau.csv'])
+        self.assertEqual(fingerprint['bureau.csv']['size'], os.path.getsize(csv_path))
+        self.assertNotEqual(fingerprint, touched_fingerprint)
+        self.assertEqual(FeatureStore.source_fingerprint(self.temp_dir.name, 'missing.csv'), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from backend.src.data_processing.local_blob_container import LocalBlobContainerClient
+
+class TestLocalBlobContainerClient(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.temp_dir.name, 'test.csv'), 'wb') as f:
+            f.write(b'0123456789')
+        self.container_client = LocalBlobContainerClient(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_list_blob_names(self):
+        self.assertEqual(self.container_client.list_blob_names(), ['test.csv'])
+
+    def test_get_blob_properties(self):
+        properties = self.container_client.get_blob_client('test.csv').get_blob_properties()
+
+        self.assertEqual(properties.name, 'test.csv')
+        self.assertEqual(properties.size, 10)
+        self.assertTrue(properties.etag)
+        self.assertIsNotNone(properties.last_modified)
+
+    def test_download_blob_read(self):
+        downloader = self.container_client.get_blob_client('test.csv').download_blob()
+
+        self.assertEqual(downloader.read(4), b'0123')
+        self.assertEqual(downloader.read(4), b'4567')
+        self.assertEqual(downloader.read(4), b'89')
+        self.assertEqual(downloader.read(4), b'')
+
+    def test_download_blob_range(self):
+        downloader = self.container_client.get_blob_client('test.csv').download_blob(offset=3, length=5)
+
+        self.assertEqual(downloader.size, 5)
+        self.assertEqual(downloader.readall(), b'34567')
+
+    def test_download_blob_chunks(self):
+        downloader = self.container_client.get_blob_client('test.csv').download_blob()
+
+        self.assertEqual(b''.join(downloader.chunks()), b'0123456789')
+
+if __name__ == '__main__':
+    unittest.main()
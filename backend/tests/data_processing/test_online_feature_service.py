@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.online_feature_service import OnlineFeatureService
+from backend.src.data_processing.simple_load_data import SimpleLoadData
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.tests.schema_tables import write_schema_tables
+
+class TestOnlineFeatureService(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files_path = self.temp_dir.name
+        self.store_path = os.path.join(self.files_path, 'online_features')
+        write_schema_tables(self.files_path, nb_applications=40)
+        self.applications = pd.read_csv(os.path.join(self.files_path, 'application_train.csv'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_batch_features_match_retrieve_data(self):
+        for compact_dtypes in [False, True]:
+            # Arrange
+            reader = SimpleReadData(compact_dtypes=compact_dtypes)
+            expected_result = reader.retrieve_data(self.files_path, 1)
+            service = OnlineFeatureService(os.path.join(self.store_path, str(compact_dtypes)), reader)
+            service.build(self.files_path)
+
+            # Act
+            result = service.get_batch_features(self.applications, list(expected_result.columns))
+
+            # Assert
+            pd.testing.assert_frame_equal(result, expected_result, check_dtype=False)
+
+    def test_features_of_one_application(self):
+        # Arrange
+        reader = SimpleReadData()
+        expected_result = reader.retrieve_data(self.files_path, 1)
+        service = OnlineFeatureService(self.store_path, reader)
+        service.build(self.files_path)
+        application = self.applications.iloc[3].to_dict()
+
+        # Act
+        result = service.get_features(application.pop('SK_ID_CURR'), application, list(expected_result.columns))
+
+        # Assert
+        pd.testing.assert_frame_equal(result, expected_result.iloc[[3]].reset_index(drop=True), check_dtype=False)
+
+    def test_features_of_an_application_without_credits(self):
+        # Arrange
+        service = OnlineFeatureService(self.store_path)
+        service.build(self.files_path)
+
+        # Act
+        result = service.get_features(1, {'AMT_CREDIT': 1000.0})
+
+        # Assert
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result['AMT_CREDIT'].iloc[0], 1000.0)
+        self.assertTrue(result.drop(columns=['SK_ID_CURR', 'AMT_CREDIT']).isna().all(axis=None))
+
+    def test_build_aggregates_the_columnar_copies(self):
+        # Arrange
+        SimpleLoadData(container_client=Mock()).convert_to_columnar(SimpleReadData.FILES_NAMES, self.files_path)
+        service = OnlineFeatureService(self.store_path)
+
+        # Act
+        with patch('pandas.read_csv') as mock_read_csv:
+            service.build(self.files_path)
+
+        # Assert
+        # The child tables are read from the copies written by convert_to_columnar, and only their aggregated data is
+        # stored, one row per application
+        mock_read_csv.assert_not_called()
+        for file_name in service.reader.get_aggregation_methods():
+            ids, features = service.open_table(file_name)
+            self.assertTrue((np.diff(ids) > 0).all())
+            self.assertEqual(features.shape, (len(ids), len(service.manifest['tables'][file_name]['columns'])))
+
+    def test_build_only_changed_tables(self):
+        # Arrange
+        service = OnlineFeatureService(self.store_path)
+        first_build = service.build(self.files_path)
+
+        # Act
+        second_build = OnlineFeatureService(self.store_path).build(self.files_path)
+        os.utime(os.path.join(self.files_path, 'credit_card_balance.csv'), ns=(0, 0))
+        third_build = service.build(self.files_path)
+
+        # Assert
+        self.assertEqual(first_build, list(service.reader.get_aggregation_methods()))
+        self.assertEqual(second_build, [])
+        self.assertEqual(third_build, ['credit_card_balance.csv'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.partial_aggregator import PartialAggregator
+
+def split(data: pd.DataFrame, nb_shards: int) -> list:
+    """
+    Split a DataFrame into contiguous shards.
+    """
+    return [data.iloc[positions] for positions in np.array_split(np.arange(len(data)), nb_shards)]
+
+class TestPartialAggregator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = pd.DataFrame({
+            'SK_ID_CURR': rng.integers(0, 200, 5000),
+            'AMOUNT': np.where(rng.random(5000) < 0.1, np.nan, rng.normal(0, 1000, 5000)),
+            'DAYS': rng.integers(-3000, 0, 5000),
+            'STATUS': rng.choice(['Active', 'Closed', 'Sold', None], 5000),
+        })
+        self.aggregator = PartialAggregator(
+            {'AMOUNT': ['max', 'min', 'mean', 'sum', 'count'], 'DAYS': ['min', 'mean', 'size']},
+            ['STATUS']
+        )
+
+    def test_aggregate_matches_groupby(self):
+        # Act
+        result = self.aggregator.aggregate([self.data])
+
+        # Assert
+        expected_result = self.data.groupby('SK_ID_CURR').agg({'AMOUNT': ['max', 'min', 'mean', 'sum', 'count'], 'DAYS': ['min', 'mean', 'size']})
+        expected_result.columns = ['_'.join(column) for column in expected_result.columns]
+        status_counts = pd.crosstab(self.data['SK_ID_CURR'], self.data['STATUS'])
+        status_counts.columns = [f"STATUS_{value}_sum" for value in status_counts.columns]
+        expected_result = expected_result.join(status_counts).reset_index()
+        pd.testing.assert_frame_equal(result, expected_result, check_names=False)
+
+    def test_aggregate_does_not_depend_on_the_shards(self):
+        # Arrange
+        result = self.aggregator.aggregate([self.data])
+        shuffled_data = self.data.sample(frac=1, random_state=1)
+
+        for nb_shards in [2, 7, 64]:
+            # Act
+            sharded_result = self.aggregator.aggregate(split(shuffled_data, nb_shards))
+
+            # Assert
+            exact_columns = [column for column in result.columns if not column.endswith(('_mean', '_sum')) or column.startswith('STATUS_')]
+            pd.testing.assert_frame_equal(sharded_result[exact_columns], result[exact_columns], check_exact=True)
+            pd.testing.assert_frame_equal(sharded_result, result, check_exact=False, rtol=1e-12)
+
+    def test_merge_in_any_order(self):
+        # Arrange
+        partials = [self.aggregator.partial(shard) for shard in split(self.data, 4)]
+
+        # Act
+        merged = self.aggregator.merge([self.aggregator.merge(partials[:2]), self.aggregator.merge(partials[2:])])
+        reversed_merged = self.aggregator.merge(partials[::-1])
+
+        # Assert
+        pd.testing.assert_frame_equal(self.aggregator.finalize(merged), self.aggregator.finalize(reversed_merged))
+
+    def test_values_counted_in_some_shards_only(self):
+        # Arrange
+        shards = [
+            pd.DataFrame({'SK_ID_CURR': [1, 2], 'STATUS': ['b', 'b']}),
+            pd.DataFrame({'SK_ID_CURR': [2, 3], 'STATUS': ['a', None]}),
+        ]
+        aggregator = PartialAggregator({}, ['STATUS'])
+
+        # Act
+        result = aggregator.aggregate(shards)
+        levels_result = PartialAggregator({}, ['STATUS'], levels={'STATUS': ['c', 'b', 'a']}).aggregate(shards)
+
+        # Assert
+        expected_result = pd.DataFrame({'SK_ID_CURR': [1, 2, 3], 'STATUS_a_sum': [0, 1, 0], 'STATUS_b_sum': [1, 1, 0]})
+        pd.testing.assert_frame_equal(result, expected_result)
+        self.assertEqual(list(levels_result.columns), ['SK_ID_CURR', 'STATUS_c_sum', 'STATUS_b_sum', 'STATUS_a_sum'])
+
+    def test_float32_means_keep_their_dtype(self):
+        # Arrange
+        data = pd.DataFrame({'SK_ID_CURR': [1, 1, 2], 'AMOUNT': np.array([0.1, 0.2, 0.3], dtype='float32')})
+
+        # Act
+        result = PartialAggregator({'AMOUNT': ['mean', 'sum']}).aggregate([data.iloc[:1], data.iloc[1:]])
+
+        # Assert
+        self.assertEqual(str(result['AMOUNT_mean'].dtype), 'float32')
+        self.assertEqual(str(result['AMOUNT_sum'].dtype), 'float64')
+        np.testing.assert_allclose(result['AMOUNT_mean'], [0.15, 0.3], rtol=1e-6)
+
+    def test_means_of_shards_with_different_float_dtypes(self):
+        # Arrange
+        shards = [
+            pd.DataFrame({'SK_ID_CURR': [1, 1], 'AMOUNT': np.array([0.1, 0.2], dtype='float64')}),
+            pd.DataFrame({'SK_ID_CURR': [2], 'AMOUNT': np.array([0.3], dtype='float32')}),
+        ]
+
+        # Act
+        result = PartialAggregator({'AMOUNT': ['mean']}).aggregate(shards)
+
+        # Assert
+        self.assertEqual(str(result['AMOUNT_mean'].dtype), 'float64')
+        self.assertAlmostEqual(result['AMOUNT_mean'][0], 0.15)
+
+    def test_unmergeable_aggregation(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            PartialAggregator({'AMOUNT': ['median']})
+
+if __name__ == '__main__':
+    unittest.main()
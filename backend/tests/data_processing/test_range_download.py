@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from backend.src.data_processing.local_blob_container import LocalBlobContainerClient, LocalBlobDownloader
+from backend.src.data_processing.range_download import RangeDownload
+
+class TestRangeDownload(unittest.TestCase):
+    def setUp(self):
+        self.container_dir = tempfile.TemporaryDirectory()
+        self.download_dir = tempfile.TemporaryDirectory()
+        self.content = bytes(range(256)) * 40
+        with open(os.path.join(self.container_dir.name, 'test.csv'), 'wb') as f:
+            f.write(self.content)
+        self.blob_client = LocalBlobContainerClient(self.container_dir.name).get_blob_client('test.csv')
+        self.download_file_path = os.path.join(self.download_dir.name, 'test.csv')
+
+    def tearDown(self):
+        self.container_dir.cleanup()
+        self.download_dir.cleanup()
+
+    def read_downloaded_file(self):
+        with open(self.download_file_path, 'rb') as f:
+            return f.read()
+
+    def test_split_ranges(self):
+        self.assertEqual(RangeDownload.split_ranges(10, 3), [[0, 4, 0], [4, 8, 0], [8, 10, 0]])
+        self.assertEqual(RangeDownload.split_ranges(2, 4), [[0, 1, 0], [1, 2, 0]])
+        self.assertEqual(RangeDownload.split_ranges(0, 4), [[0, 0, 0]])
+
+    def test_run_single_range(self):
+        # Act
+        sha256 = RangeDownload(self.blob_client, self.blob_client.get_blob_properties(), self.download_file_path, 1000).run()
+
+        # Assert
+        self.assertEqual(self.read_downloaded_file(), self.content)
+        self.assertIsNotNone(sha256)
+        self.assertFalse(os.path.exists(f"{self.download_file_path}.part"))
+        self.assertFalse(os.path.exists(f"{self.download_file_path}.part.json"))
+
+    def test_run_parallel_ranges(self):
+        # Act
+        sha256 = RangeDownload(self.blob_client, self.blob_client.get_blob_properties(), self.download_file_path, 1000, range_count=4).run()
+
+        # Assert
+        self.assertEqual(self.read_downloaded_file(), self.content)
+        self.assertIsNone(sha256)
+
+    def test_run_resumes_interrupted_download(self):
+        # Arrange
+        properties = self.blob_client.get_blob_properties()
+        original_read = LocalBlobDownloader.read
+        calls = []
+
+        def failing_read(downloader, size=-1):
+            calls.append(size)
+            if len(calls) > 3:
+                raise ConnectionError("Connection lost")
+            return original_read(downloader, size)
+
+        with patch.object(LocalBlobDownloader, 'read', failing_read):
+            with self.assertRaises(ConnectionError):
+                RangeDownload(self.blob_client, properties, self.download_file_path, 1000).run()
+
+        self.assertFalse(os.path.exists(self.download_file_path))
+        with open(f"{self.download_file_path}.part.json", 'r') as f:
+            self.assertEqual(json.load(f)['ranges'], [[0, len(self.content), 3000]])
+
+        # Act
+        with patch.object(self.blob_client, 'download_blob', wraps=self.blob_client.download_blob) as mock_download_blob:
+            RangeDownload(self.blob_client, properties, self.download_file_path, 1000).run()
+
+        # Assert
+        self.assertEqual(mock_download_blob.call_args.kwargs['offset'], 3000)
+        self.assertEqual(self.read_downloaded_file(), self.content)
+
+    def test_run_restarts_when_blob_changed(self):
+        # Arrange
+        with open(f"{self.download_file_path}.part", 'wb') as f:
+            f.write(b'x' * len(self.content))
+        with open(f"{self.download_file_path}.part.json", 'w') as f:
+            json.dump({'blob': {'etag': 'old', 'size': len(self.content), 'last_modified': None}, 'ranges': [[0, len(self.content), 5000]]}, f)
+
+        # Act
+        RangeDownload(self.blob_client, self.blob_client.get_blob_properties(), self.download_file_path, 1000).run()
+
+        # Assert
+        self.assertEqual(self.read_downloaded_file(), self.content)
+
+if __name__ == '__main__':
+    unittest.main()
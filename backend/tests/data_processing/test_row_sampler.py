@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.row_sampler import RowSampler
+
+class TestRowSampler(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'SK_ID_CURR': np.arange(100000, 120000),
+            'DATA': np.arange(20000)
+        })
+
+    def test_init_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            RowSampler(0)
+        with self.assertRaises(ValueError):
+            RowSampler(10, 'random')
+
+    def test_hash_ids_is_deterministic(self):
+        ids = np.array([1, 2, 3, 100002])
+
+        np.testing.assert_array_equal(RowSampler.hash_ids(ids), RowSampler.hash_ids(ids))
+        self.assertEqual(len(set(RowSampler.hash_ids(ids).tolist())), 4)
+
+    def test_rows_sampling_matches_csv_skiprows(self):
+        with tempfile.TemporaryDirectory() as temp_path:
+            # Arrange
+            file_path = os.path.join(temp_path, 'test.csv')
+            self.data.to_csv(file_path, index=False)
+            expected_result = pd.read_csv(file_path, skiprows=lambda i: i % 7 != 0)
+            sampler = RowSampler(7, RowSampler.ROWS)
+            sampler.CSV_CHUNK_SIZE = 999
+
+            # Act
+            result = sampler.read_csv(file_path)
+
+            # Assert
+            pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_hash_sampling_size(self):
+        result = RowSampler(10).sample(self.data)
+
+        self.assertTrue(1800 < len(result) < 2200)
+
+    def test_hash_sampling_is_nested(self):
+        sample_10 = set(RowSampler(10).sample(self.data)['SK_ID_CURR'])
+        sample_20 = set(RowSampler(20).sample(self.data)['SK_ID_CURR'])
+        sample_30 = set(RowSampler(30).sample(self.data)['SK_ID_CURR'])
+
+        self.assertTrue(sample_20 <= sample_10)
+        self.assertTrue(sample_30 <= sample_20)
+
+    def test_hash_sampling_does_not_depend_on_order_or_chunks(self):
+        sampler = RowSampler(10)
+        shuffled_data = self.data.sample(frac=1, random_state=0)
+
+        result = sampler.sample(self.data)
+        shuffled_result = pd.concat([sampler.sample(shuffled_data.iloc[start:start + 3000]) for start in range(0, len(shuffled_data), 3000)])
+
+        self.assertEqual(set(result['SK_ID_CURR']), set(shuffled_result['SK_ID_CURR']))
+
+    def test_hash_sampling_is_consistent_across_tables(self):
+        # Arrange
+        sampler = RowSampler(5)
+        child_data = pd.DataFrame({'SK_ID_CURR': np.repeat(self.data['SK_ID_CURR'].to_numpy(), 3)})
+
+        # Act
+        sampled_ids = set(sampler.sample(self.data)['SK_ID_CURR'])
+        sampled_child_ids = set(sampler.sample(child_data)['SK_ID_CURR'])
+
+        # Assert
+        self.assertEqual(sampled_ids, sampled_child_ids)
+
+    def test_sampling_frequency_one_keeps_everything(self):
+        pd.testing.assert_frame_equal(RowSampler(1).sample(self.data), self.data)
+
+    def test_class_aware_sampling(self):
+        # Arrange
+        data = self.data.assign(TARGET=(self.data['DATA'] % 12 == 0).astype(int))
+        sampler = RowSampler(10, positive_sampling_frequency=1)
+
+        # Act
+        result = sampler.sample(data)
+        weights = sampler.get_weights(result)
+
+        # Assert
+        self.assertEqual(result['TARGET'].sum(), data['TARGET'].sum())
+        negatives = set(result.loc[result['TARGET'] == 0, 'SK_ID_CURR'])
+        self.assertEqual(negatives, set(RowSampler(10).sample(data[data['TARGET'] == 0])['SK_ID_CURR']))
+        np.testing.assert_array_equal(weights, np.where(result['TARGET'] == 1, 1.0, 10.0))
+        self.assertTrue(abs(weights.sum() - len(data)) < 0.05 * len(data))
+
+    def test_class_aware_sampling_is_nested(self):
+        # Arrange
+        data = self.data.assign(TARGET=(self.data['DATA'] % 12 == 0).astype(int))
+
+        # Act
+        sample_10 = set(RowSampler(10, positive_sampling_frequency=2).sample(data)['SK_ID_CURR'])
+        sample_20 = set(RowSampler(20, positive_sampling_frequency=4).sample(data)['SK_ID_CURR'])
+
+        # Assert
+        self.assertTrue(sample_20 <= sample_10)
+
+    def test_class_aware_sampling_reads_the_target(self):
+        # Arrange
+        sampler = RowSampler(10, positive_sampling_frequency=1)
+
+        # Act & Assert
+        self.assertEqual(sampler.get_read_columns(['DATA']), ['DATA', 'SK_ID_CURR', 'TARGET'])
+        self.assertFalse(sampler.keeps_everything)
+        self.assertFalse(RowSampler(3, positive_sampling_frequency=3).is_class_aware)
+        with self.assertRaises(ValueError):
+            RowSampler(10, RowSampler.ROWS, positive_sampling_frequency=1)
+        with self.assertRaises(ValueError):
+            RowSampler(10, positive_sampling_frequency=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.sequence_aggregator import SequenceAggregator
+
+class TestSequenceAggregator(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = pd.DataFrame({
+            'SK_ID_CURR': rng.integers(0, 100, 2000),
+            'DAYS': rng.choice(np.arange(-5000, 0), 2000, replace=False).astype('float64'),
+            'AMOUNT': np.where(rng.random(2000) < 0.1, np.nan, rng.normal(0, 1000, 2000)),
+        })
+        self.features = {
+            'AMOUNT_FIRST': {'column': 'AMOUNT', 'function': 'first'},
+            'AMOUNT_LAST': {'column': 'AMOUNT', 'function': 'last'},
+            'DAYS_DIFF_MEAN': {'column': 'DAYS', 'function': 'diff_mean'},
+            'AMOUNT_DIFF_MAX': {'column': 'AMOUNT', 'function': 'diff_max'},
+            'AMOUNT_TREND': {'column': 'AMOUNT', 'function': 'trend'},
+            'AMOUNT_LAST_3_MEAN': {'column': 'AMOUNT', 'function': 'mean', 'last': 3},
+            'AMOUNT_LAST_5_MIN': {'column': 'AMOUNT', 'function': 'min', 'last': 5},
+            'AMOUNT_SUM': {'column': 'AMOUNT', 'function': 'sum'},
+        }
+
+    def get_expected_features(self, group: pd.DataFrame) -> pd.Series:
+        """
+        Compute the features of a single group, sorted by DAYS.
+        """
+        group = group.sort_values('DAYS')
+        valid = group.dropna(subset=['AMOUNT'])
+        slope = np.polyfit(valid['DAYS'], valid['AMOUNT'], 1)[0] if valid['DAYS'].nunique() > 1 else np.nan
+
+        return pd.Series({
+            'AMOUNT_FIRST': valid['AMOUNT'].iloc[0] if len(valid) else np.nan,
+            'AMOUNT_LAST': valid['AMOUNT'].iloc[-1] if len(valid) else np.nan,
+            'DAYS_DIFF_MEAN': group['DAYS'].diff().mean(),
+            'AMOUNT_DIFF_MAX': group['AMOUNT'].diff().max(),
+            'AMOUNT_TREND': slope,
+            'AMOUNT_LAST_3_MEAN': group['AMOUNT'].iloc[-3:].mean(),
+            'AMOUNT_LAST_5_MIN': group['AMOUNT'].iloc[-5:].min(),
+            'AMOUNT_SUM': group['AMOUNT'].sum(),
+        })
+
+    def test_aggregate_matches_each_group(self):
+        # Arrange
+        aggregator = SequenceAggregator('DAYS', self.features)
+
+        # Act
+        result = aggregator.aggregate(self.data)
+
+        # Assert
+        expected_result = self.data.groupby('SK_ID_CURR').apply(self.get_expected_features).reset_index()
+        pd.testing.assert_frame_equal(result, expected_result, check_exact=False, rtol=1e-9)
+
+    def test_aggregate_does_not_depend_on_the_row_order(self):
+        # Arrange
+        aggregator = SequenceAggregator('DAYS', self.features)
+
+        # Act
+        result = aggregator.aggregate(self.data)
+        shuffled_result = aggregator.aggregate(self.data.sample(frac=1, random_state=1))
+
+        # Assert
+        pd.testing.assert_frame_equal(shuffled_result, result, check_exact=False, rtol=1e-12)
+
+    def test_short_groups_and_missing_orders(self):
+        # Arrange
+        data = pd.DataFrame({
+            'SK_ID_CURR': [2, 1, 1, 1, 3, 3],
+            'MONTHS_BALANCE': pd.array([-1, -3, None, -2, -5, -5], dtype='Int64'),
+            'SK_DPD': [7, 1, 9, 4, 0, 2],
+        })
+        aggregator = SequenceAggregator('MONTHS_BALANCE', {
+            'SK_DPD_LAST': {'column': 'SK_DPD', 'function': 'last'},
+            'SK_DPD_DIFF_MEAN': {'column': 'SK_DPD', 'function': 'diff_mean'},
+            'SK_DPD_TREND': {'column': 'SK_DPD', 'function': 'trend'},
+        })
+
+        # Act
+        result = aggregator.aggregate(data)
+
+        # Assert
+        expected_result = pd.DataFrame({
+            'SK_ID_CURR': [1, 2, 3],
+            'SK_DPD_LAST': [9.0, 7.0, 2.0],
+            'SK_DPD_DIFF_MEAN': [4.0, np.nan, 2.0],
+            'SK_DPD_TREND': [3.0, np.nan, np.nan],
+        })
+        pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_first_and_last_skip_the_missing_values(self):
+        # Arrange
+        data = pd.DataFrame({
+            'SK_ID_CURR': [1, 1, 1, 2, 2, 3],
+            'DAYS': [-3.0, -2.0, -1.0, -2.0, -1.0, -1.0],
+            'AMOUNT': [np.nan, 5.0, np.nan, 7.0, 8.0, np.nan],
+        })
+        aggregator = SequenceAggregator('DAYS', {
+            'AMOUNT_FIRST': {'column': 'AMOUNT', 'function': 'first'},
+            'AMOUNT_LAST': {'column': 'AMOUNT', 'function': 'last'},
+        })
+
+        # Act
+        result = aggregator.aggregate(data)
+
+        # Assert
+        expected_result = pd.DataFrame({
+            'SK_ID_CURR': [1, 2, 3],
+            'AMOUNT_FIRST': [5.0, 7.0, np.nan],
+            'AMOUNT_LAST': [5.0, 8.0, np.nan],
+        })
+        pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_aggregate_empty_data(self):
+        # Arrange
+        aggregator = SequenceAggregator('DAYS', self.features)
+
+        # Act
+        result = aggregator.aggregate(self.data.iloc[:0])
+
+        # Assert
+        self.assertTrue(result.empty)
+        self.assertEqual(list(result.columns), ['SK_ID_CURR', *self.features])
+
+    def test_invalid_features(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            SequenceAggregator('DAYS', {'X': {'column': 'AMOUNT', 'function': 'median'}})
+        with self.assertRaises(ValueError):
+            SequenceAggregator('DAYS', {'X': {'column': 'AMOUNT', 'function': 'trend', 'last': 3}})
+        with self.assertRaises(ValueError):
+            SequenceAggregator('DAYS', {'X': {'column': 'AMOUNT', 'function': 'mean', 'last': 0}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import Mock, patch
+import pandas as pd
 from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
+from backend.src.data_processing.clustered_table import ClusteredTable
+from backend.src.data_processing.local_blob_container import LocalBlobContainerClient
+from backend.src.data_processing.range_download import RangeDownload
 from backend.src.data_processing.simple_load_data import SimpleLoadData
 
 class TestSimpleLoadData(unittest.TestCase):
@@ -39,18 +45,178 @@ class TestSimpleLoadData(unittest.TestCase):
         mock_open.assert_called()
         mock_blob_client.download_blob().readall.assert_called()
 
+    def test_load_concurrent_streaming(self):
+        with tempfile.TemporaryDirectory() as container_path, tempfile.TemporaryDirectory() as download_root:
+            # Arrange
+            contents = {
+                'test1.csv': b'a,b\n' * 1000,
+                'test2.csv': b'c,d\n' * 10,
+                'test3.csv': b'',
+            }
+            for name, content in contents.items():
+                with open(os.path.join(container_path, name), 'wb') as f:
+                    f.write(content)
+
+            download_path = os.path.join(download_root, 'data')
+            simple_load_data = SimpleLoadData(max_workers=3, chunk_size=64, container_client=LocalBlobContainerClient(container_path))
+
+            # Act
+            simple_load_data.load(list(contents), download_path)
+
+            # Assert
+            for name, content in contents.items():
+                with open(os.path.join(download_path, name), 'rb') as f:
+                    self.assertEqual(f.read(), content)
+
+    def test_load_concurrent_records_downloads_in_the_calling_stage(self):
+        with tempfile.TemporaryDirectory() as container_path, tempfile.TemporaryDirectory() as download_root:
+            # Arrange
+            for name in ['test1.csv', 'test2.csv']:
+                with open(os.path.join(container_path, name), 'wb') as f:
+                    f.write(b'a,b\n')
+
+            simple_load_data = SimpleLoadData(max_workers=2, container_client=LocalBlobContainerClient(container_path))
+
+            # Act
+            with simple_load_data.profiler.stage('load'):
+                simple_load_data.load(['test1.csv', 'test2.csv'], os.path.join(download_root, 'data'))
+
+            # Assert
+            stages = simple_load_data.profiler.get_report()['stages']
+            downloads = [stage for stage in stages if stage['stage'] != 'load']
+            self.assertEqual(sorted(stage['table'] for stage in downloads), ['test1.csv', 'test2.csv'])
+            self.assertEqual({stage['stage'] for stage in downloads}, {'load/download'})
+
+    def test_load_concurrent_failure_does_not_stop_other_downloads(self):
+        with tempfile.TemporaryDirectory() as container_path, tempfile.TemporaryDirectory() as download_path:
+            # Arrange
+            with open(os.path.join(container_path, 'test1.csv'), 'wb') as f:
+                f.write(b'test data')
+
+            simple_load_data = SimpleLoadData(max_workers=2, chunk_size=4, container_client=LocalBlobContainerClient(container_path))
+
+            # Act
+            with self.assertLogs(level='ERROR') as logs:
+                simple_load_data.load(['missing.csv', 'test1.csv'], download_path)
+
+            # Assert
+            self.assertIn('missing.csv', logs.output[0])
+            with open(os.path.join(download_path, 'test1.csv'), 'rb') as f:
+                self.assertEqual(f.read(), b'test data')
+
+    def test_load_downloads_only_changed_or_corrupt_files(self):
+        with tempfile.TemporaryDirectory() as container_path, tempfile.TemporaryDirectory() as download_path:
+            # Arrange
+            for name in ['test1.csv', 'test2.csv', 'test3.csv']:
+                with open(os.path.join(container_path, name), 'wb') as f:
+                    f.write(b'test data')
+
+            simple_load_data = SimpleLoadData(chunk_size=4, container_client=LocalBlobContainerClient(container_path))
+            simple_load_data.load(['test1.csv', 'test2.csv', 'test3.csv'], download_path)
+
+            # Blob changed remotely
+            with open(os.path.join(container_path, 'test2.csv'), 'wb') as f:
+                f.write(b'new test data')
+            # Local copy truncated
+            with open(os.path.join(download_path, 'test3.csv'), 'wb') as f:
+                f.write(b'test')
+
+            # Act
+            with patch.object(SimpleLoadData, 'download_file', wraps=simple_load_data.download_file) as mock_download_file:
+                simple_load_data.load(['test1.csv', 'test2.csv', 'test3.csv'], download_path)
+
+            # Assert
+            downloaded = sorted(call.args[1] for call in mock_download_file.call_args_list)
+            self.assertEqual(downloaded, ['test2.csv', 'test3.csv'])
+            for name, content in [('test1.csv', b'test data'), ('test2.csv', b'new test data'), ('test3.csv', b'test data')]:
+                with open(os.path.join(download_path, name), 'rb') as f:
+                    self.assertEqual(f.read(), content)
+
+    def test_load_large_files_as_parallel_ranges(self):
+        with tempfile.TemporaryDirectory() as container_path, tempfile.TemporaryDirectory() as download_path:
+            # Arrange
+            contents = {'small.csv': b'a' * 10, 'large.csv': bytes(range(256)) * 10}
+            for name, content in contents.items():
+                with open(os.path.join(container_path, name), 'wb') as f:
+                    f.write(content)
+
+            simple_load_data = SimpleLoadData(chunk_size=64, container_client=LocalBlobContainerClient(container_path), range_threshold=100, range_workers=3)
+
+            # Act
+            with patch('backend.src.data_processing.simple_load_data.RangeDownload', wraps=RangeDownload) as mock_range_download:
+                simple_load_data.load(list(contents), download_path)
+
+            # Assert
+            range_counts = {call.args[2]: call.args[4] for call in mock_range_download.call_args_list}
+            self.assertEqual(range_counts, {f"{download_path}/small.csv": 1, f"{download_path}/large.csv": 3})
+            for name, content in contents.items():
+                with open(os.path.join(download_path, name), 'rb') as f:
+                    self.assertEqual(f.read(), content)
+
+    def test_init_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            SimpleLoadData(max_workers=0, container_client=Mock())
+        with self.assertRaises(ValueError):
+            SimpleLoadData(chunk_size=0, container_client=Mock())
+
     @patch.dict('os.environ', {
         'AZURE_STORAGE_CONNECTION_STRING': 'DefaultEndpointsProtocol=https;AccountName=testaccount;AccountKey=testkey;BlobEndpoint=testendpoint',
         'AZURE_STORAGE_CONTAINER_NAME': 'test_container_name'
     })
     @patch('backend.src.data_processing.simple_load_data.load_dotenv')
     def test_save(self, mock_load_dotenv):
-        # Arrange
-        simple_load_data = SimpleLoadData()
+        with tempfile.TemporaryDirectory() as temp_path:
+            # Arrange
+            simple_load_data = SimpleLoadData()
+            data = pd.DataFrame({'SK_ID_CURR': [1, 2], 'DATA': ['A', 'B']})
+            file_path = os.path.join(temp_path, 'test.parquet')
+
+            # Act
+            simple_load_data.save(file_path, data)
+
+            # Assert
+            pd.testing.assert_frame_equal(pd.read_parquet(file_path), data)
+            self.assertEqual(os.listdir(temp_path), ['test.parquet'])
+
+    def test_convert_to_columnar(self):
+        with tempfile.TemporaryDirectory() as download_path:
+            # Arrange
+            with open(os.path.join(download_path, 'bureau_balance.csv'), 'w') as f:
+                f.write('SK_ID_BUREAU,MONTHS_BALANCE,STATUS\n1,0,C\n1,-1,0\n2,-3,X\n')
+            with open(os.path.join(download_path, 'bureau.csv'), 'w') as f:
+                f.write('SK_ID_CURR,SK_ID_BUREAU,CNT_CREDIT_PROLONG\n1,1,\n2,2,0\n')
+            simple_load_data = SimpleLoadData(container_client=Mock())
+
+            # Act
+            simple_load_data.convert_to_columnar(['bureau_balance.csv', 'bureau.csv', 'missing.csv'], download_path)
+
+            # Assert
+            bureau_balance = pd.read_parquet(os.path.join(download_path, 'bureau_balance.parquet'))
+            self.assertEqual(str(bureau_balance['MONTHS_BALANCE'].dtype), 'int64')
+            self.assertEqual(bureau_balance['STATUS'].tolist(), ['C', '0', 'X'])
+            bureau = pd.read_parquet(os.path.join(download_path, 'bureau.parquet'))
+            self.assertEqual(str(bureau['SK_ID_CURR'].dtype), 'int64')
+            self.assertEqual(str(bureau['CNT_CREDIT_PROLONG'].dtype), 'float64')
+            self.assertFalse(os.path.exists(os.path.join(download_path, 'missing.parquet')))
+            clustered_bureau_balance = ClusteredTable(os.path.join(download_path, 'bureau_balance.clustered.arrow')).read()
+            self.assertEqual(clustered_bureau_balance['SK_ID_BUREAU'].tolist(), [1, 1, 2])
+            self.assertEqual(clustered_bureau_balance['STATUS'].tolist(), ['C', '0', 'X'])
+
+    def test_convert_to_columnar_skips_up_to_date_files(self):
+        with tempfile.TemporaryDirectory() as download_path:
+            # Arrange
+            with open(os.path.join(download_path, 'bureau_balance.csv'), 'w') as f:
+                f.write('SK_ID_BUREAU,MONTHS_BALANCE,STATUS\n1,0,C\n')
+            simple_load_data = SimpleLoadData(container_client=Mock())
+            simple_load_data.convert_to_columnar(['bureau_balance.csv'], download_path)
+
+            # Act
+            with patch.object(SimpleLoadData, 'save') as mock_save, patch.object(ClusteredTable, 'write') as mock_write:
+                simple_load_data.convert_to_columnar(['bureau_balance.csv'], download_path)
 
-        # Act and Assert
-        with self.assertRaises(NotImplementedError):
-            simple_load_data.save('test.txt', 'test data')
+            # Assert
+            mock_save.assert_not_called()
+            mock_write.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
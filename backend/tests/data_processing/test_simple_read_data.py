@@ -1,8 +1,14 @@
+import json
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch
 import pandas as pd
 import numpy as np
-from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.clustered_table import ClusteredTable
+from backend.src.data_processing.simple_read_data import SimpleReadData, limit_worker_memory
+from backend.tests.schema_tables import write_schema_tables
 
 class TestSimpleReadData(unittest.TestCase):
     def setUp(self):
@@ -106,6 +112,44 @@ class TestSimpleReadData(unittest.TestCase):
         })
         pd.testing.assert_frame_equal(result, expected_result)
 
+    def test_aggregate_categorical_data_matches_one_hot_aggregation(self):
+        # Arrange
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'SK_ID_CURR': rng.integers(0, 50, 500),
+            'AMOUNT': rng.normal(0, 1, 500),
+            'STATUS': rng.choice(['Active', 'Closed', None], 500),
+            'FLAG': rng.integers(0, 2, 500),
+            'TYPE': pd.Categorical(rng.choice(['x', 'y'], 500), categories=['y', 'x', 'z']),
+        })
+        categorical_columns = ['STATUS', 'FLAG', 'TYPE']
+        aggregation_dict = {'AMOUNT': ['max', 'min', 'mean']}
+
+        # Act
+        result = self.reader.aggregate_categorical_data(data, aggregation_dict, categorical_columns, 'SK_ID_CURR')
+
+        # Assert
+        expected_result = self.reader.aggregate_data(self.reader.one_hot_encode(data, categorical_columns), dict(aggregation_dict), categorical_columns, 'SK_ID_CURR')
+        self.assertEqual(aggregation_dict, {'AMOUNT': ['max', 'min', 'mean']})
+        pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_count_categories(self):
+        # Arrange
+        data = pd.DataFrame({
+            'SK_ID_CURR': [2, 1, 2, 2, 3],
+            'STATUS': ['b', 'a', 'a', 'a', np.nan],
+        })
+
+        # Act
+        result = self.reader.count_categories(data, ['STATUS'], 'SK_ID_CURR', pd.Index([1, 2, 3]))
+
+        # Assert
+        expected_result = pd.DataFrame({
+            'STATUS_a_sum': [1, 2, 0],
+            'STATUS_b_sum': [0, 1, 0],
+        }, index=pd.Index([1, 2, 3]))
+        pd.testing.assert_frame_equal(result, expected_result)
+
     def test_get_aggregated_bureau_data(self):
         # Arrange
         bureau_data = pd.DataFrame({
@@ -268,6 +312,8 @@ class TestSimpleReadData(unittest.TestCase):
             'SK_DPD_DEF_min': [1],
             'SK_DPD_DEF_mean': [2.0],
             'NAME_CONTRACT_STATUS_Active_sum': [2],
+            'AMT_BALANCE_TREND': [-5000 / 9],
+            'AMT_BALANCE_LAST_3_MEAN': [27500.0],
         })    
         pd.testing.assert_frame_equal(result, expected_result)
 
@@ -306,6 +352,11 @@ class TestSimpleReadData(unittest.TestCase):
             'AMT_PAYMENT_max': [13500.0],
             'AMT_PAYMENT_min': [250.0],
             'AMT_PAYMENT_mean': [6875.0],
+            'PAYMENT_DELAY_max': [2],
+            'PAYMENT_DELAY_mean': [2.0],
+            'DAYS_INSTALMENT_DIFF_MEAN': [1150.0],
+            'PAYMENT_DELAY_TREND': [0.0],
+            'PAYMENT_DELAY_LAST_3_MEAN': [2.0],
         })
         pd.testing.assert_frame_equal(result, expected_result)
 
@@ -435,6 +486,8 @@ class TestSimpleReadData(unittest.TestCase):
             'PRODUCT_COMBINATION_Cash_sum': [1],
             'NFLAG_INSURED_ON_APPROVAL_0_sum': [1],
             'NFLAG_INSURED_ON_APPROVAL_1_sum': [1],
+            'DAYS_DECISION_DIFF_MEAN': [0.0],
+            'AMT_CREDIT_LAST': [45000.0],
         })
         pd.testing.assert_frame_equal(result, expected_result)
 
@@ -472,22 +525,25 @@ class TestSimpleReadData(unittest.TestCase):
             'SK_DPD_DEF_min': [0],
             'SK_DPD_DEF_mean': [0.0],
             'NAME_CONTRACT_STATUS_Active_sum': [2],
+            'SK_DPD_TREND': [0.0],
+            'SK_DPD_LAST_6_MEAN': [0.0],
         }) 
         pd.testing.assert_frame_equal(result, expected_result)
 
-    @patch('pandas.read_csv')
+    @patch('backend.src.data_processing.simple_read_data.SimpleReadData.read_table')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_bureau_data')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_credit_card_balance_data')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_installments_payments_data')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_previous_application_data')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_pos_cash_balance_data')
-    def test_retrieve_data_concat(self, mock_pos, mock_previous, mock_installments, mock_credit, mock_bureau, mock_read_csv):
-        # Create a mock DataFrame to return from pd.read_csv
+    @patch('backend.src.data_processing.simple_read_data.SimpleReadData.get_aggregated_bureau_balance_data')
+    def test_retrieve_data_concat(self, mock_bureau_balance, mock_pos, mock_previous, mock_installments, mock_credit, mock_bureau, mock_read_table):
+        # Create a mock DataFrame to return from read_table
         mock_df = pd.DataFrame({
             'SK_ID_CURR': [1, 2, 3],
             'DATA': ['A', 'B', 'C']
         })
-        mock_read_csv.return_value = mock_df
+        mock_read_table.return_value = mock_df
 
         # Create a mock DataFrame to return from the get_aggregated_* methods
         mock_aggregated_bureau = pd.DataFrame({
@@ -510,15 +566,20 @@ class TestSimpleReadData(unittest.TestCase):
             'SK_ID_CURR': [1, 2, 3],
             'POS_AGGREGATED_DATA': ['D', 'E', 'F']
         })
+        mock_aggregated_bureau_balance = pd.DataFrame({
+            'SK_ID_CURR': [1, 3],
+            'BUREAU_BALANCE_AGGREGATED_DATA': ['D', 'F']
+        })
 
         mock_bureau.return_value = mock_aggregated_bureau
         mock_credit.return_value = mock_aggregated_credit
         mock_installments.return_value =  mock_aggregated_installments
         mock_previous.return_value = mock_aggregated_previous
         mock_pos.return_value = mock_aggregated_pos
+        mock_bureau_balance.return_value = mock_aggregated_bureau_balance
 
         # Create an instance of the class and call the method
-        result = self.reader.retrieve_data('mock_path', 2)
+        result = self.reader.retrieve_data('mock_path', 1)
 
         # Check that the result is as expected
         expected_result = pd.DataFrame({
@@ -529,11 +590,435 @@ class TestSimpleReadData(unittest.TestCase):
             'INSTALLMENTS_AGGREGATED_DATA': ['D', 'E', 'F'],
             'PREVIOUS_AGGREGATED_DATA': ['D', 'E', 'F'],
             'POS_AGGREGATED_DATA': ['D', 'E', 'F'],
+            'BUREAU_BALANCE_AGGREGATED_DATA': ['D', np.nan, 'F'],
         })
 
         self.assertTrue(isinstance(result, pd.DataFrame))
         pd.testing.assert_frame_equal(result, expected_result)
 
+    def test_read_table_prefers_columnar_file(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({'SK_ID_CURR': range(1, 11), 'DATA': list('ABCDEFGHIJ')})
+            data.to_csv(os.path.join(files_path, 'application_train.csv'), index=False)
+            reader = SimpleReadData(sampling_method='rows')
+            csv_sample = reader.read_table(files_path, 'application_train.csv', sampling_frequency=3)
+            data.to_parquet(os.path.join(files_path, 'application_train.parquet'), index=False)
+
+            # Act
+            with patch('pandas.read_csv') as mock_read_csv:
+                result = reader.read_table(files_path, 'application_train.csv', sampling_frequency=3)
+                columns_result = reader.read_table(files_path, 'application_train.csv', columns=['SK_ID_CURR'])
+
+            # Assert
+            mock_read_csv.assert_not_called()
+            pd.testing.assert_frame_equal(result, csv_sample)
+            self.assertEqual(result['SK_ID_CURR'].tolist(), [3, 6, 9])
+            self.assertEqual(list(columns_result.columns), ['SK_ID_CURR'])
+
+    def test_read_table_hash_sampling_matches_csv_and_columnar(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({'SK_ID_CURR': range(100000, 101000), 'AMT_BALANCE': np.arange(1000) * 1.5})
+            data.to_csv(os.path.join(files_path, 'credit_card_balance.csv'), index=False)
+
+            # Act
+            csv_sample = self.reader.read_table(files_path, 'credit_card_balance.csv', columns=['AMT_BALANCE'], sampling_frequency=10)
+            data.to_parquet(os.path.join(files_path, 'credit_card_balance.parquet'), index=False)
+            columnar_sample = self.reader.read_table(files_path, 'credit_card_balance.csv', columns=['AMT_BALANCE'], sampling_frequency=10)
+
+            # Assert
+            self.assertEqual(list(csv_sample.columns), ['AMT_BALANCE'])
+            pd.testing.assert_frame_equal(csv_sample, columnar_sample)
+            self.assertTrue(50 < len(csv_sample) < 150)
+
+    def test_read_table_filters_ids_chunk_by_chunk(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({'SK_ID_CURR': np.repeat(np.arange(100), 3), 'AMT_PAYMENT': np.arange(300) * 1.0})
+            data.to_csv(os.path.join(files_path, 'installments_payments.csv'), index=False)
+            reader = SimpleReadData(chunk_size=7)
+            ids = pd.Series([3, 50, 99, 1000])
+            expected_result = data[data['SK_ID_CURR'].isin(ids)].reset_index(drop=True)
+
+            # Act
+            csv_result = reader.read_table(files_path, 'installments_payments.csv', ids=ids)
+            data.to_parquet(os.path.join(files_path, 'installments_payments.parquet'), index=False)
+            columnar_result = reader.read_table(files_path, 'installments_payments.csv', ids=ids)
+            columns_result = reader.read_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=ids)
+
+            # Assert
+            pd.testing.assert_frame_equal(csv_result, expected_result)
+            pd.testing.assert_frame_equal(columnar_result, expected_result)
+            pd.testing.assert_frame_equal(columns_result, expected_result[['AMT_PAYMENT']])
+
+    def test_iter_table_chunks_match_read_table(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({'SK_ID_CURR': np.repeat(np.arange(100), 3), 'AMT_PAYMENT': np.arange(300) * 1.0})
+            data.to_csv(os.path.join(files_path, 'installments_payments.csv'), index=False)
+            reader = SimpleReadData(chunk_size=7)
+            ids = pd.Series([3, 50, 99, 1000])
+            expected_result = reader.read_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=ids)
+            results = {}
+
+            # Act
+            results['csv'] = list(reader.iter_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=ids))
+            data.to_parquet(os.path.join(files_path, 'installments_payments.parquet'), index=False)
+            results['columnar'] = list(reader.iter_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=ids))
+            ClusteredTable.write(data, os.path.join(files_path, ClusteredTable.clustered_file_name('installments_payments.csv')), 'SK_ID_CURR', block_size=7)
+            results['clustered'] = list(reader.iter_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=ids))
+            empty_chunks = list(reader.iter_table(files_path, 'installments_payments.csv', columns=['AMT_PAYMENT'], ids=[1000]))
+
+            # Assert
+            for chunks in results.values():
+                self.assertGreater(len(chunks), 1)
+                pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected_result)
+            self.assertEqual(len(empty_chunks), 1)
+            self.assertEqual((len(empty_chunks[0]), list(empty_chunks[0].columns)), (0, ['AMT_PAYMENT']))
+
+    def test_aggregate_table_chunk_by_chunk(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            ids = pd.read_csv(f"{files_path}/application_train.csv")['SK_ID_CURR']
+
+            for compact_dtypes in [False, True]:
+                reader = SimpleReadData(chunk_size=7, compact_dtypes=compact_dtypes)
+
+                for file_name in ['bureau.csv', 'installments_payments.csv', 'previous_application.csv']:
+                    columns = reader.get_aggregation_columns(file_name)
+                    data = reader.read_table(files_path, file_name, columns=columns, ids=ids, compact=compact_dtypes)
+                    expected_result = reader.get_aggregation_methods()[file_name](data)
+
+                    # Act
+                    with patch.object(SimpleReadData, 'read_table') as mock_read_table:
+                        result = reader.aggregate_table(files_path, file_name, ids)
+
+                    # Assert
+                    mock_read_table.assert_not_called()
+                    pd.testing.assert_frame_equal(result, expected_result, check_exact=False, rtol=1e-5)
+
+    def test_get_aggregation_columns(self):
+        self.assertEqual(self.reader.get_aggregation_columns('POS_CASH_balance.csv'), [
+            'SK_ID_CURR', 'MONTHS_BALANCE', 'CNT_INSTALMENT', 'CNT_INSTALMENT_FUTURE', 'NAME_CONTRACT_STATUS', 'SK_DPD', 'SK_DPD_DEF'
+        ])
+        bureau_columns = self.reader.get_aggregation_columns('bureau.csv')
+        self.assertIn('DAYS_ENDDATE_FACT', bureau_columns)
+        self.assertNotIn('CREDIT_DURATION', bureau_columns)
+        self.assertNotIn('SK_ID_BUREAU', bureau_columns)
+        self.assertEqual(self.reader.get_aggregation_columns('bureau_balance.csv'), ['SK_ID_BUREAU', 'MONTHS_BALANCE', 'STATUS'])
+        self.assertIsNone(self.reader.get_aggregation_columns('application_train.csv'))
+
+    def test_read_table_compact_dtypes(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({
+                'SK_ID_PREV': [10, 11, 12, 13],
+                'SK_ID_CURR': [100001, 100001, 100002, 100003],
+                'MONTHS_BALANCE': [-1, -2, -1, -5],
+                'CNT_INSTALMENT': [12.0, np.nan, 24.0, 6.0],
+                'CNT_INSTALMENT_FUTURE': [1.0, 2.0, 3.0, 4.0],
+                'NAME_CONTRACT_STATUS': ['Active', 'Completed', 'Active', 'Signed'],
+                'SK_DPD': [0, 0, 3, 0],
+                'SK_DPD_DEF': [0, 0, 0, 0],
+            })
+            data.to_csv(os.path.join(files_path, 'POS_CASH_balance.csv'), index=False)
+            reader = SimpleReadData(chunk_size=2, compact_dtypes=True)
+            columns = reader.get_aggregation_columns('POS_CASH_balance.csv')
+
+            # Act
+            result = reader.read_table(files_path, 'POS_CASH_balance.csv', columns=columns, ids=[100001, 100003], compact=True)
+
+            # Assert
+            self.assertNotIn('SK_ID_PREV', result.columns)
+            self.assertEqual(str(result['SK_ID_CURR'].dtype), 'int32')
+            self.assertEqual(str(result['MONTHS_BALANCE'].dtype), 'int8')
+            self.assertEqual(str(result['CNT_INSTALMENT'].dtype), 'float32')
+            self.assertEqual(result['NAME_CONTRACT_STATUS'].dtype, 'category')
+            self.assertEqual(sorted(result['NAME_CONTRACT_STATUS'].cat.categories), ['Active', 'Completed', 'Signed'])
+
+            # The aggregated features are the same as with the default dtypes
+            expected_result = self.reader.get_aggregated_pos_cash_balance_data(data[data['SK_ID_CURR'].isin([100001, 100003])])
+            compact_result = reader.get_aggregated_pos_cash_balance_data(result)
+            self.assertEqual(list(compact_result.columns), list(expected_result.columns))
+            pd.testing.assert_frame_equal(compact_result, expected_result, check_dtype=False)
+
+    def test_retrieve_data_parallel_matches_serial(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            parallel_reader = SimpleReadData(max_workers=2, worker_memory_limit=4 * 1024 ** 3)
+
+            # Act
+            serial_result = self.reader.retrieve_data(files_path, 2)
+            parallel_result = parallel_reader.retrieve_data(files_path, 2)
+
+            # Assert
+            self.assertGreater(len(serial_result.columns), 200)
+            pd.testing.assert_frame_equal(parallel_result, serial_result)
+
+    def test_retrieve_data_class_aware_sampling(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path, nb_applications=200)
+            applications = pd.read_csv(f"{files_path}/application_train.csv")
+            all_data = self.reader.retrieve_data(files_path, 1)
+
+            # Act
+            with patch.object(SimpleReadData, 'read_table', autospec=True, side_effect=SimpleReadData.read_table) as mock_read_table:
+                result = self.reader.retrieve_data(files_path, 4, positive_sampling_frequency=1)
+            applications.to_parquet(f"{files_path}/application_train.parquet", index=False)
+            columnar_result = self.reader.retrieve_data(files_path, 4, positive_sampling_frequency=1)
+
+            # Assert
+            positives = applications.loc[applications['TARGET'] == 1, 'SK_ID_CURR']
+            self.assertTrue(set(positives) <= set(result['SK_ID_CURR']))
+            self.assertLess(len(result), len(applications))
+            self.assertEqual(result[SimpleReadData.SAMPLE_WEIGHT_COLUMN].tolist(), np.where(result['TARGET'] == 1, 1.0, 4.0).tolist())
+
+            # The rows of the child tables of the other applications are not read, and the features are not changed
+            child_ids = [set(call.kwargs['ids']) for call in mock_read_table.call_args_list if call.kwargs.get('ids') is not None]
+            self.assertTrue(child_ids and all(ids == set(result['SK_ID_CURR']) for ids in child_ids))
+            expected_result = all_data[all_data['SK_ID_CURR'].isin(result['SK_ID_CURR'])].reset_index(drop=True)
+            pd.testing.assert_frame_equal(result.drop(columns=[SimpleReadData.SAMPLE_WEIGHT_COLUMN]), expected_result, check_dtype=False)
+            pd.testing.assert_frame_equal(columnar_result, result)
+
+    def test_retrieve_data_matches_with_clustered_tables(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            expected_result = self.reader.retrieve_data(files_path, 2)
+            for file_name, key in ClusteredTable.CLUSTER_KEYS.items():
+                ClusteredTable.write(pd.read_csv(f"{files_path}/{file_name}"), f"{files_path}/{ClusteredTable.clustered_file_name(file_name)}", key, block_size=7)
+
+            # Act
+            with patch.object(ClusteredTable, 'iter_record_batches', autospec=True, side_effect=ClusteredTable.iter_record_batches) as mock_read:
+                result = self.reader.retrieve_data(files_path, 2)
+
+            # Assert
+            read_paths = {os.path.basename(call.args[0].path) for call in mock_read.call_args_list}
+            self.assertEqual(read_paths, {ClusteredTable.clustered_file_name(file_name) for file_name in ClusteredTable.CLUSTER_KEYS})
+            pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_get_aggregated_bureau_balance_data(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            ids = [100000, 100001, 100002]
+            bureau_data = pd.read_csv(f"{files_path}/bureau.csv")
+            balance_data = pd.read_csv(f"{files_path}/bureau_balance.csv")
+            data = balance_data.merge(bureau_data[bureau_data['SK_ID_CURR'].isin(ids)][['SK_ID_CURR', 'SK_ID_BUREAU']], on='SK_ID_BUREAU')
+
+            # Act
+            result = SimpleReadData(chunk_size=7).get_aggregated_bureau_balance_data(files_path, ids)
+
+            # Assert
+            self.assertEqual(result['SK_ID_CURR'].tolist(), sorted(data['SK_ID_CURR'].unique()))
+            self.assertEqual(result['MONTHS_BALANCE_size_sum'].tolist(), data.groupby('SK_ID_CURR').size().tolist())
+            self.assertEqual(result['STATUS_C_sum_sum'].tolist(), (data['STATUS'] == 'C').groupby(data['SK_ID_CURR']).sum().tolist())
+
+    def test_retrieve_data_feature_store(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            reader = SimpleReadData(feature_store_path=os.path.join(files_path, 'features'))
+            expected_result = self.reader.retrieve_data(files_path, 2)
+
+            # Act
+            first_result = reader.retrieve_data(files_path, 2)
+            with patch.object(SimpleReadData, 'aggregate_table', wraps=reader.aggregate_table) as mock_aggregate_table, \
+                    patch.object(SimpleReadData, 'read_table', wraps=reader.read_table) as mock_read_table:
+                cached_result = SimpleReadData(feature_store_path=os.path.join(files_path, 'features')).retrieve_data(files_path, 2)
+                cached_read_count = mock_read_table.call_count
+
+                os.utime(f"{files_path}/credit_card_balance.csv", ns=(0, 0))
+                updated_result = SimpleReadData(feature_store_path=os.path.join(files_path, 'features')).retrieve_data(files_path, 2)
+
+            # Assert
+            pd.testing.assert_frame_equal(first_result, expected_result)
+            pd.testing.assert_frame_equal(cached_result, expected_result)
+            pd.testing.assert_frame_equal(updated_result, expected_result)
+            self.assertEqual(cached_read_count, 0)
+            mock_aggregate_table.assert_called_once()
+            self.assertEqual(mock_aggregate_table.call_args[0][1], 'credit_card_balance.csv')
+
+    def test_retrieve_data_with_spill_matches_in_memory(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path, nb_applications=30)
+            feature_store_path = os.path.join(files_path, 'features')
+
+            for compact_dtypes in [False, True]:
+                expected_result = SimpleReadData(compact_dtypes=compact_dtypes).retrieve_data(files_path, 2)
+                reader = SimpleReadData(compact_dtypes=compact_dtypes, feature_store_path=feature_store_path, spill_path=os.path.join(files_path, 'spill'))
+
+                # Act
+                with patch.object(SimpleReadData, 'get_nb_partitions', return_value=4), \
+                        patch.object(SimpleReadData, 'iter_table', autospec=True, side_effect=SimpleReadData.iter_table) as mock_iter_table:
+                    result = reader.retrieve_data(files_path, 2)
+                os.utime(f"{files_path}/credit_card_balance.csv", ns=(0, 0))
+                with patch.object(SimpleReadData, 'get_nb_partitions', return_value=3):
+                    updated_result = SimpleReadData(compact_dtypes=compact_dtypes, feature_store_path=feature_store_path).retrieve_data(files_path, 2)
+                stored_result = SimpleReadData(compact_dtypes=compact_dtypes, feature_store_path=feature_store_path).retrieve_data(files_path, 2)
+
+                # Assert
+                pd.testing.assert_frame_equal(result, expected_result)
+                pd.testing.assert_frame_equal(updated_result, expected_result)
+                pd.testing.assert_frame_equal(stored_result, expected_result)
+                stages = reader.profiler.get_report()['stages']
+                partitions = {stage['partition'] for stage in stages if stage['stage'] == 'aggregate/merge'}
+                self.assertEqual(partitions, {0, 1, 2, 3})
+                # Each table is read once, whatever the number of partitions
+                file_names = list(reader.get_aggregation_methods())
+                self.assertEqual(sorted(stage['table'] for stage in stages if stage['stage'] == 'aggregate'), sorted(file_names))
+                self.assertEqual(sorted(call.args[2] for call in mock_iter_table.call_args_list), sorted(set(file_names) - {'bureau_balance.csv'}))
+                self.assertEqual(os.listdir(os.path.join(files_path, 'spill')), [])
+                shutil.rmtree(feature_store_path)
+
+    def test_get_nb_partitions(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path, nb_applications=40)
+            train_data = pd.read_csv(f"{files_path}/application_train.csv")
+            file_names = list(self.reader.get_aggregation_methods())
+            largest_table_memory = max(self.reader.estimate_memory(files_path, file_names, len(train_data)).values())
+            memory_budget = largest_table_memory // 5
+            reader = SimpleReadData(memory_budget=memory_budget)
+
+            # Act
+            nb_partitions = reader.get_nb_partitions(files_path, file_names, train_data)
+
+            # Assert
+            self.assertEqual(self.reader.get_nb_partitions(files_path, file_names, train_data), 1)
+            self.assertEqual(SimpleReadData(memory_budget=10 ** 12).get_nb_partitions(files_path, file_names, train_data), 1)
+            self.assertEqual(reader.get_nb_partitions(files_path, [], train_data), 1)
+            # The budget of a read does not change the one of the reader
+            self.assertEqual(self.reader.get_nb_partitions(files_path, file_names, train_data, memory_budget=memory_budget), nb_partitions)
+            self.assertIsNone(self.reader.memory_budget)
+            self.assertEqual(nb_partitions, int(np.ceil(2 * largest_table_memory / memory_budget)))
+            record = reader.profiler.get_report()['stages'][0]
+            self.assertEqual((record['stage'], record['memory_budget'], record['partitions']), ('estimate_memory', memory_budget, nb_partitions))
+            self.assertGreater(record['estimated_memory'], train_data.memory_usage(deep=True).sum())
+            # No more partitions than applications, and budgets needing more than MAX_SPILL_PARTITIONS are rejected
+            self.assertEqual(self.reader.get_nb_partitions(files_path, file_names, train_data, memory_budget=largest_table_memory // 25), 40)
+            with self.assertRaises(ValueError):
+                self.reader.get_nb_partitions(files_path, file_names, train_data, memory_budget=1)
+
+    def test_estimate_table_memory(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path, nb_applications=500)
+            data = pd.read_csv(f"{files_path}/previous_application.csv")
+            columns = self.reader.get_aggregation_columns('previous_application.csv')
+            csv_memory = self.reader.estimate_table_memory(files_path, 'previous_application.csv')
+
+            # Act
+            sample, nb_rows = self.reader.sample_table(files_path, 'previous_application.csv', columns)
+            data.to_parquet(f"{files_path}/previous_application.parquet", index=False)
+            columnar_sample, columnar_nb_rows = self.reader.sample_table(files_path, 'previous_application.csv', columns)
+            columnar_memory = self.reader.estimate_table_memory(files_path, 'previous_application.csv')
+            compact_memory = SimpleReadData(compact_dtypes=True).estimate_table_memory(files_path, 'previous_application.csv')
+
+            # Assert
+            self.assertEqual(len(sample), SimpleReadData.MEMORY_SAMPLE_ROWS)
+            self.assertAlmostEqual(nb_rows, len(data), delta=len(data) * 0.05)
+            pd.testing.assert_frame_equal(columnar_sample, sample, check_dtype=False)
+            self.assertEqual(columnar_nb_rows, len(data))
+            self.assertAlmostEqual(csv_memory, data[columns].memory_usage(deep=True).sum(), delta=csv_memory * 0.1)
+            self.assertAlmostEqual(columnar_memory, csv_memory, delta=csv_memory * 0.1)
+            self.assertLess(compact_memory, columnar_memory / 2)
+
+    def test_get_spilled_columns(self):
+        # Arrange
+        reader = SimpleReadData(features=['AMT_CREDIT_SUM_max', 'CREDIT_ACTIVE_Active_sum', 'CREDIT_TYPE_Car loan_sum', 'DAYS_CREDIT_DIFF_MEAN'])
+        fixed_columns = ['SK_ID_CURR', 'AMT_CREDIT_SUM_max']
+        column_lists = [
+            fixed_columns + ['CREDIT_ACTIVE_Closed_sum', 'CREDIT_TYPE_Car loan_sum', 'CREDIT_TYPE_Mortgage_sum', 'DAYS_CREDIT_DIFF_MEAN'],
+            fixed_columns + ['CREDIT_ACTIVE_Active_sum', 'CREDIT_ACTIVE_Closed_sum', 'CREDIT_TYPE_Consumer credit_sum', 'DAYS_CREDIT_DIFF_MEAN'],
+        ]
+
+        # Act
+        columns = reader.get_spilled_columns('bureau.csv', column_lists)
+
+        # Assert
+        self.assertEqual(columns, fixed_columns + [
+            'CREDIT_ACTIVE_Active_sum', 'CREDIT_ACTIVE_Closed_sum',
+            'CREDIT_TYPE_Car loan_sum', 'CREDIT_TYPE_Consumer credit_sum', 'CREDIT_TYPE_Mortgage_sum',
+            'DAYS_CREDIT_DIFF_MEAN',
+        ])
+        self.assertEqual(reader.get_spilled_columns('bureau.csv', [column_lists[0], column_lists[0]]), column_lists[0])
+
+    def test_join_tables_matches_successive_merges(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path)
+            train_data = self.reader.read_table(files_path, 'application_train.csv')
+            aggregated_tables = [
+                self.reader.aggregate_table(files_path, file_name, train_data['SK_ID_CURR'])
+                for file_name in self.reader.get_aggregation_methods()
+            ]
+
+            for how in SimpleReadData.JOIN_METHODS:
+                expected_result = train_data
+                for aggregated_table in aggregated_tables:
+                    expected_result = pd.merge(expected_result, aggregated_table, on='SK_ID_CURR', how=how)
+
+                # Act
+                result = self.reader.join_tables(train_data, aggregated_tables, on='SK_ID_CURR', how=how)
+
+                # Assert
+                self.assertIn('AMT_ANNUITY_max_x', result.columns)
+                self.assertIn('AMT_ANNUITY_max_y', result.columns)
+                self.assertEqual(list(result.columns), list(expected_result.columns))
+                pd.testing.assert_frame_equal(result, expected_result.reset_index(drop=True), check_dtype=False)
+
+    def test_join_tables_methods(self):
+        # Arrange
+        data = pd.DataFrame({'DATA': ['A', 'B', 'C'], 'SK_ID_CURR': [3, 1, 2]})
+        first_table = pd.DataFrame({'SK_ID_CURR': [1, 3, 4], 'VALUE': [10, 30, 40]})
+        second_table = pd.DataFrame({'SK_ID_CURR': [3, 2], 'VALUE': [0.5, 0.25]})
+
+        # Act
+        left_result = self.reader.join_tables(data, [first_table, second_table], on='SK_ID_CURR', how='left')
+        inner_result = self.reader.join_tables(data, [first_table, second_table], on='SK_ID_CURR', how='inner')
+        outer_result = self.reader.join_tables(data, [first_table, second_table], on='SK_ID_CURR', how='outer')
+
+        # Assert
+        self.assertEqual(list(left_result.columns), ['DATA', 'SK_ID_CURR', 'VALUE_x', 'VALUE_y'])
+        self.assertEqual(left_result['SK_ID_CURR'].tolist(), [3, 1, 2])
+        self.assertEqual(left_result['VALUE_x'].tolist()[:2], [30, 10])
+        self.assertTrue(np.isnan(left_result['VALUE_x'][2]))
+        self.assertEqual(inner_result['SK_ID_CURR'].tolist(), [3])
+        self.assertEqual(outer_result['SK_ID_CURR'].tolist(), [1, 2, 3, 4])
+        self.assertTrue(pd.isna(outer_result['DATA'][3]))
+        with self.assertRaises(ValueError):
+            self.reader.join_tables(data, [first_table], on='SK_ID_CURR', how='cross')
+
+    def test_resolve_column_names(self):
+        # Act
+        result = SimpleReadData.resolve_column_names([['A', 'B'], ['B', 'C'], ['C', 'D'], ['B']])
+
+        # Assert
+        self.assertEqual(result, [['A', 'B_x'], ['B_y', 'C_x'], ['C_y', 'D'], ['B']])
+
+    @patch('backend.src.data_processing.simple_read_data.resource')
+    def test_limit_worker_memory(self, mock_resource):
+        limit_worker_memory(1024)
+        mock_resource.setrlimit.assert_called_once_with(mock_resource.RLIMIT_AS, (1024, 1024))
+
+        mock_resource.reset_mock()
+        limit_worker_memory(None)
+        mock_resource.setrlimit.assert_not_called()
+
+    def test_init_invalid_sampling_method(self):
+        with self.assertRaises(ValueError):
+            SimpleReadData(sampling_method='random')
+
+    def test_init_invalid_join(self):
+        with self.assertRaises(ValueError):
+            SimpleReadData(join='cross')
+
     @patch('pandas.DataFrame.to_csv')
     @patch('backend.src.data_processing.simple_read_data.SimpleReadData.retrieve_data')
     def test_write_data_for_model(self, mock_read_data, mock_to_csv):
@@ -551,9 +1036,57 @@ class TestSimpleReadData(unittest.TestCase):
         self.reader.write_data_for_model(mock_path, mock_file)
 
         # Check that the result is as expected
-        mock_read_data.assert_called_once_with(mock_path, sampling_frequency = 1)
+        mock_read_data.assert_called_once_with(mock_path, sampling_frequency = 1, positive_sampling_frequency = None, memory_budget = None)
         mock_df.to_csv.assert_called_once_with(f"{mock_path}/{mock_file}", index=False)
 
+    @patch('backend.src.data_processing.simple_read_data.SimpleReadData.retrieve_data')
+    def test_write_and_read_binary_data_for_model(self, mock_retrieve_data):
+        # Arrange
+        data = pd.DataFrame({
+            'SK_ID_CURR': [1, 2, 3],
+            'DATA': ['A', None, 'C'],
+            'AMOUNT_mean': np.array([0.5, np.nan, 1.5], dtype='float32'),
+            'FLAG_sum': np.array([1, 0, 1], dtype='int8'),
+        })
+        mock_retrieve_data.return_value = data
+
+        with tempfile.TemporaryDirectory() as files_path:
+            for filename in ['data_for_model.parquet', 'data_for_model.feather']:
+                # Act
+                written_data = self.reader.write_data_for_model(files_path, filename, 2)
+                result = self.reader.read_data(files_path, filename)
+
+                # Assert
+                self.assertIs(written_data, data)
+                pd.testing.assert_frame_equal(result, data)
+                self.assertNotIn(f"{filename}.tmp", os.listdir(files_path))
+
+    @patch('backend.src.data_processing.simple_read_data.SimpleReadData.retrieve_data')
+    def test_write_data_for_model_without_sample_weights(self, mock_retrieve_data):
+        # Arrange
+        mock_retrieve_data.return_value = pd.DataFrame({
+            'SK_ID_CURR': [1, 2, 3],
+            'TARGET': [1, 0, 0],
+            SimpleReadData.SAMPLE_WEIGHT_COLUMN: [1.0, 4.0, 4.0],
+        })
+
+        with tempfile.TemporaryDirectory() as files_path:
+            for filename in ['data_for_model.parquet', 'data_for_model.csv']:
+                # Act
+                written_data = self.reader.write_data_for_model(files_path, filename, 4, positive_sampling_frequency=1)
+                result = self.reader.read_data(files_path, filename)
+
+                # Assert
+                # The weights are kept for the training but are not a column of the file
+                self.assertEqual(list(written_data.columns), ['SK_ID_CURR', 'TARGET', SimpleReadData.SAMPLE_WEIGHT_COLUMN])
+                self.assertEqual(list(result.columns), ['SK_ID_CURR', 'TARGET'])
+
+    def test_get_data_format(self):
+        self.assertEqual(SimpleReadData.get_data_format('data_for_model.parquet'), '.parquet')
+        self.assertEqual(SimpleReadData.get_data_format('data_for_model.Feather'), '.feather')
+        self.assertEqual(SimpleReadData.get_data_format('data_for_model.csv'), '.csv')
+        self.assertEqual(SimpleReadData.get_data_format('data_for_model'), '.csv')
+
     @patch('pandas.read_csv')
     def test_read_data(self, mock_read_csv):
         # Arrange
@@ -574,6 +1107,43 @@ class TestSimpleReadData(unittest.TestCase):
         self.assertTrue(isinstance(result, pd.DataFrame))
         pd.testing.assert_frame_equal(result, mock_df)
 
+    def test_write_data_file_structure_json_cache(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            data = pd.DataFrame({
+                'SK_ID_CURR': [1, 2, 3],
+                'DATA': ['A', 'B', None],
+                'FLAG': [1, 0, 1]
+            })
+            data.to_parquet(f"{files_path}/data_for_model.parquet", index=False)
+
+            # Act
+            first_cached = self.reader.write_data_file_structure_json(files_path, 'data_for_model.parquet', files_path, 'data_structure.json')
+            with patch('pandas.read_parquet') as mock_read_parquet, patch('pyarrow.parquet.ParquetFile') as mock_parquet_file:
+                second_cached = self.reader.write_data_file_structure_json(files_path, 'data_for_model.parquet', files_path, 'data_structure.json')
+            with open(f"{files_path}/data_structure.json", 'r') as f:
+                structure = json.load(f)
+
+            data['FLAG'] = [1, 2, 3]
+            data.to_parquet(f"{files_path}/data_for_model.parquet", index=False)
+            os.utime(f"{files_path}/data_for_model.parquet", ns=(0, 0))
+            third_cached = self.reader.write_data_file_structure_json(files_path, 'data_for_model.parquet', files_path, 'data_structure.json')
+            with open(f"{files_path}/data_structure.json", 'r') as f:
+                updated_structure = json.load(f)
+
+            # Assert
+            self.assertFalse(first_cached)
+            self.assertTrue(second_cached)
+            self.assertFalse(third_cached)
+            mock_read_parquet.assert_not_called()
+            mock_parquet_file.assert_not_called()
+            self.assertEqual(structure, {
+                'SK_ID_CURR': {'type': 'int64'},
+                'DATA': {'type': 'object', 'values': ['A', 'B']},
+                'FLAG': {'type': 'int64', 'values': [1, 0]}
+            })
+            self.assertEqual(updated_structure['FLAG'], {'type': 'int64'})
+
     @patch('builtins.open')
     @patch('json.dump')
     def test_write_data_structure_json(self, mock_json_dump, mock_open):
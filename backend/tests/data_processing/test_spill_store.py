@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.spill_store import SpillStore
+
+class TestSpillStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.spill_store = SpillStore(os.path.join(self.temp_dir.name, 'spill'))
+
+    def tearDown(self):
+        self.spill_store.close()
+        self.temp_dir.cleanup()
+
+    def test_partition_ids(self):
+        # Arrange
+        ids = np.arange(100000, 101000)
+
+        # Act
+        partitions = SpillStore.partition_ids(ids, 4)
+        shuffled_partitions = SpillStore.partition_ids(ids[::-1], 4)
+
+        # Assert
+        self.assertEqual(len(partitions), 4)
+        self.assertEqual(sorted(np.concatenate(partitions).tolist()), ids.tolist())
+        self.assertTrue(all(len(partition) > 150 for partition in partitions))
+        for partition, shuffled_partition in zip(partitions, shuffled_partitions):
+            self.assertEqual(partition.tolist(), sorted(partition.tolist()))
+            self.assertEqual(set(partition), set(shuffled_partition))
+
+    def test_read_partitions_with_their_schema(self):
+        # Arrange
+        self.spill_store.write('bureau.csv', 0, pd.DataFrame({'SK_ID_CURR': [1, 2], 'X': [1, 2], 'A_sum': [3, 4]}, index=[5, 6]))
+        self.spill_store.write('bureau.csv', 1, pd.DataFrame({'SK_ID_CURR': [3], 'X': [np.nan], 'B_sum': [1]}))
+
+        # Act
+        schema = self.spill_store.get_schema('bureau.csv')
+        partition = self.spill_store.read('bureau.csv', 1, schema)
+        data = self.spill_store.concat('bureau.csv')
+
+        # Assert
+        self.assertEqual(self.spill_store.get_partitions('bureau.csv'), [0, 1])
+        self.assertEqual(self.spill_store.get_columns('bureau.csv'), [['SK_ID_CURR', 'X', 'A_sum'], ['SK_ID_CURR', 'X', 'B_sum']])
+        self.assertEqual(schema.names, ['SK_ID_CURR', 'X', 'A_sum', 'B_sum'])
+        self.assertEqual(list(partition.columns), schema.names)
+        expected_data = pd.DataFrame({
+            'SK_ID_CURR': [1, 2, 3],
+            'X': [1.0, 2.0, np.nan],
+            'A_sum': [3.0, 4.0, np.nan],
+            'B_sum': [np.nan, np.nan, 1.0],
+        })
+        pd.testing.assert_frame_equal(data, expected_data)
+
+    def test_write_partitions_in_parts(self):
+        # Arrange
+        ids = np.arange(100000, 100100)
+        partitions = SpillStore.get_partition(ids, 3)
+
+        # Act
+        for part, chunk in enumerate(np.array_split(ids, 4)):
+            chunk_partitions = SpillStore.get_partition(chunk, 3)
+            for partition in np.unique(chunk_partitions):
+                self.spill_store.write('bureau.csv.states', partition, pd.DataFrame({'SK_ID_CURR': chunk[chunk_partitions == partition]}), part)
+
+        # Assert
+        for partition, partition_ids in enumerate(SpillStore.partition_ids(ids, 3)):
+            self.assertEqual(partition_ids.tolist(), ids[partitions == partition].tolist())
+            parts = self.spill_store.get_parts('bureau.csv.states', partition)
+            self.assertEqual(parts, [0, 1, 2, 3])
+            read_ids = np.concatenate([self.spill_store.read('bureau.csv.states', partition, part=part)['SK_ID_CURR'] for part in parts])
+            self.assertEqual(read_ids.tolist(), partition_ids.tolist())
+        self.assertEqual(self.spill_store.get_partitions('bureau.csv'), [])
+
+    def test_close_removes_the_files(self):
+        # Arrange
+        with SpillStore(self.temp_dir.name) as spill_store:
+            spill_store.write('model_data', 0, pd.DataFrame({'SK_ID_CURR': [1]}))
+            path = spill_store.path
+
+            # Act & Assert
+            self.assertTrue(os.path.isfile(spill_store.get_path('model_data', 0)))
+
+        self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.sqlite_read_data import SqliteReadData
+from backend.tests.schema_tables import write_schema_tables
+
+class TestSqliteReadData(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files_path = self.temp_dir.name
+        self.database_path = os.path.join(self.files_path, 'loan_score.sqlite')
+        write_schema_tables(self.files_path, nb_applications=40)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_retrieve_data_matches_simple_read_data(self):
+        for sampling_method in ['hash', 'rows']:
+            # Arrange
+            reader = SqliteReadData(self.database_path, sampling_method=sampling_method)
+            expected_result = SimpleReadData(sampling_method=sampling_method).retrieve_data(self.files_path, 2)
+
+            # Act
+            result = reader.retrieve_data(self.files_path, 2)
+
+            # Assert
+            self.assertEqual(list(result.columns), list(expected_result.columns))
+            pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_class_aware_sampling_matches_simple_read_data(self):
+        # Arrange
+        reader = SqliteReadData(self.database_path)
+        expected_result = SimpleReadData().retrieve_data(self.files_path, 3, positive_sampling_frequency=1)
+
+        # Act
+        result = reader.retrieve_data(self.files_path, 3, positive_sampling_frequency=1)
+
+        # Assert
+        self.assertIn(SimpleReadData.SAMPLE_WEIGHT_COLUMN, result.columns)
+        pd.testing.assert_frame_equal(result, expected_result)
+
+    def test_retrieve_data_with_spill_matches_simple_read_data(self):
+        # Arrange
+        reader = SqliteReadData(self.database_path)
+        expected_result = SimpleReadData().retrieve_data(self.files_path, 2)
+
+        # Act
+        with patch.object(SqliteReadData, 'get_nb_partitions', return_value=3), patch.object(SqliteReadData, 'iter_table') as mock_iter_table:
+            result = reader.retrieve_data(self.files_path, 2)
+
+        # Assert
+        pd.testing.assert_frame_equal(result, expected_result)
+        mock_iter_table.assert_not_called()
+
+    def test_ingest_only_changed_tables(self):
+        # Arrange
+        reader = SqliteReadData(self.database_path)
+        file_names = ['application_train.csv', 'bureau.csv']
+
+        # Act
+        first_ingestion = reader.ingest(self.files_path, file_names)
+        second_ingestion = reader.ingest(self.files_path, file_names)
+        os.utime(os.path.join(self.files_path, 'bureau.csv'), ns=(0, 0))
+        third_ingestion = reader.ingest(self.files_path, file_names)
+
+        # Assert
+        self.assertEqual(first_ingestion, file_names)
+        self.assertEqual(second_ingestion, [])
+        self.assertEqual(third_ingestion, ['bureau.csv'])
+        with sqlite3.connect(self.database_path) as connection:
+            indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            row_count = connection.execute('SELECT COUNT(*) FROM "bureau"').fetchone()[0]
+        self.assertIn('bureau_SK_ID_CURR', indexes)
+        self.assertIn('bureau_SK_ID_BUREAU', indexes)
+        self.assertEqual(row_count, len(pd.read_csv(os.path.join(self.files_path, 'bureau.csv'))))
+
+    def test_read_table(self):
+        # Arrange
+        reader = SqliteReadData(self.database_path, sampling_method='rows')
+        reader.ingest(self.files_path, ['credit_card_balance.csv'])
+        ids = [100001, 100002, 100003]
+
+        # Act
+        result = reader.read_table(self.files_path, 'credit_card_balance.csv', columns=['SK_ID_CURR', 'AMT_BALANCE'], sampling_frequency=3, ids=ids)
+
+        # Assert
+        expected_result = SimpleReadData(sampling_method='rows').read_table(self.files_path, 'credit_card_balance.csv', columns=['SK_ID_CURR', 'AMT_BALANCE'], sampling_frequency=3)
+        expected_result = expected_result[expected_result['SK_ID_CURR'].isin(ids)].reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected_result)
+
+if __name__ == '__main__':
+    unittest.main()
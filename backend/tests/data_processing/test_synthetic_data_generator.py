@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.synthetic_data_generator import SyntheticDataGenerator
+from backend.src.data_processing.table_schema import TableSchema
+
+class TestSyntheticDataGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files_path = self.temp_dir.name
+        self.schema = TableSchema()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read(self, file_name, files_path=None):
+        return pd.read_csv(os.path.join(files_path or self.files_path, file_name))
+
+    def test_write_tables_of_the_schema(self):
+        # Arrange
+        generator = SyntheticDataGenerator(scale=0.001, batch_size=100)
+
+        # Act
+        sizes = generator.write(self.files_path)
+
+        # Assert
+        self.assertEqual(set(sizes), set(ReadDataABC.FILES_NAMES))
+        self.assertEqual(sizes[ReadDataABC.APPLICATION_TRAIN_NAME], 308)
+        self.assertEqual(sizes[ReadDataABC.APPLICATION_TEST_NAME], 49)
+        for file_name in ReadDataABC.FILES_NAMES:
+            data = self.read(file_name)
+            self.assertEqual(len(data), sizes[file_name])
+            self.assertEqual(data.dtypes.astype(str).to_dict(), self.schema.get_dtypes(file_name))
+            for column in self.schema.get_columns(file_name):
+                if column['values'] is not None:
+                    self.assertTrue(data[column['fieldname']].dropna().isin(column['values']).all(), column['fieldname'])
+
+    def test_write_one_to_many_tables(self):
+        # Arrange
+        generator = SyntheticDataGenerator(scale=0.001, batch_size=100)
+
+        # Act
+        sizes = generator.write(self.files_path)
+
+        # Assert
+        applications = pd.concat([self.read(ReadDataABC.APPLICATION_TRAIN_NAME), self.read(ReadDataABC.APPLICATION_TEST_NAME)])
+        bureau = self.read(ReadDataABC.BUREAU_NAME)
+        bureau_balance = self.read(ReadDataABC.BUREAU_BALANCE_NAME)
+        previous_application = self.read(ReadDataABC.PREVIOUS_APPLICATION_NAME)
+        installments_payments = self.read(ReadDataABC.INSTALLMENTS_PAYMENTS_NAME)
+
+        self.assertTrue(applications['SK_ID_CURR'].is_unique)
+        self.assertTrue(bureau['SK_ID_BUREAU'].is_unique)
+        self.assertTrue(bureau['SK_ID_CURR'].isin(applications['SK_ID_CURR']).all())
+        self.assertTrue(bureau_balance['SK_ID_BUREAU'].isin(bureau['SK_ID_BUREAU']).all())
+        self.assertEqual(
+            installments_payments[['SK_ID_PREV', 'SK_ID_CURR']].drop_duplicates().merge(previous_application, on='SK_ID_PREV')['SK_ID_CURR_x'].tolist(),
+            installments_payments[['SK_ID_PREV', 'SK_ID_CURR']].drop_duplicates().merge(previous_application, on='SK_ID_PREV')['SK_ID_CURR_y'].tolist()
+        )
+        # Some applicants have no credit, others several
+        credits = bureau.groupby('SK_ID_CURR').size().reindex(applications['SK_ID_CURR'], fill_value=0)
+        self.assertGreater((credits == 0).sum(), 0)
+        self.assertGreater(credits.max(), 4)
+        self.assertAlmostEqual(sizes[ReadDataABC.BUREAU_NAME] / len(applications), 4.82, delta=1)
+        # The months of a credit follow each other from 0
+        months = bureau_balance.groupby('SK_ID_BUREAU')['MONTHS_BALANCE']
+        self.assertTrue((months.max() == 0).all())
+        self.assertTrue((months.min() == 1 - months.size()).all())
+
+    def test_write_is_deterministic(self):
+        # Arrange
+        other_path = os.path.join(self.files_path, 'other')
+
+        # Act
+        SyntheticDataGenerator(scale=0.001, batch_size=100).write(self.files_path)
+        SyntheticDataGenerator(scale=0.001, batch_size=100).write(other_path, [ReadDataABC.BUREAU_BALANCE_NAME, ReadDataABC.INSTALLMENTS_PAYMENTS_NAME])
+
+        # Assert
+        self.assertEqual(sorted(os.listdir(other_path)), sorted([ReadDataABC.BUREAU_BALANCE_NAME, ReadDataABC.INSTALLMENTS_PAYMENTS_NAME]))
+        for file_name in os.listdir(other_path):
+            pd.testing.assert_frame_equal(self.read(file_name, other_path), self.read(file_name))
+
+    def test_invalid_scale(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            SyntheticDataGenerator(scale=0)
+
+    def test_retrieve_data_from_synthetic_tables(self):
+        # Arrange
+        SyntheticDataGenerator(scale=0.001).write(self.files_path)
+
+        # Act
+        result = SimpleReadData(compact_dtypes=True).retrieve_data(self.files_path, 1)
+
+        # Assert
+        self.assertEqual(len(result), 308)
+        self.assertIn('DPD_max_max', result.columns)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.table_schema import TableSchema
+
+class TestTableSchema(unittest.TestCase):
+    def setUp(self):
+        self.schema = TableSchema()
+
+    def test_get_columns(self):
+        columns = self.schema.get_columns('bureau_balance.csv')
+
+        self.assertEqual([column['fieldname'] for column in columns], ['SK_ID_BUREAU', 'MONTHS_BALANCE', 'STATUS'])
+
+    def test_get_columns_unknown_table(self):
+        self.assertEqual(self.schema.get_columns('unknown.csv'), [])
+
+    def test_get_dtypes(self):
+        self.assertEqual(self.schema.get_dtypes('bureau_balance.csv'), {
+            'SK_ID_BUREAU': 'int64',
+            'MONTHS_BALANCE': 'int64',
+            'STATUS': 'object'
+        })
+
+    def test_get_compact_dtypes_keeps_the_amounts_in_float64(self):
+        compact_dtypes = self.schema.get_compact_dtypes('bureau.csv')
+
+        self.assertEqual(compact_dtypes['DAYS_CREDIT_ENDDATE'], 'float32')
+        self.assertEqual(compact_dtypes['CREDIT_ACTIVE'], 'category')
+        self.assertNotIn('AMT_CREDIT_SUM', compact_dtypes)
+        self.assertNotIn('SK_ID_BUREAU', compact_dtypes)
+
+    def test_compact_keeps_the_precision_of_large_floats(self):
+        data = pd.DataFrame({
+            'SK_ID_CURR': [100001, 100002],
+            'DAYS_CREDIT_ENDDATE': [-10.0, np.nan],
+            'DAYS_ENDDATE_FACT': [123456789.5, 1.0],
+            'AMT_CREDIT_SUM': [1234567.89, 0.5],
+        })
+
+        result = self.schema.compact(data.copy(), 'bureau.csv')
+
+        self.assertEqual(str(result['SK_ID_CURR'].dtype), 'int32')
+        self.assertEqual(str(result['DAYS_CREDIT_ENDDATE'].dtype), 'float32')
+        self.assertEqual(str(result['DAYS_ENDDATE_FACT'].dtype), 'float64')
+        self.assertEqual(result['AMT_CREDIT_SUM'].tolist(), [1234567.89, 0.5])
+
+    def test_columnar_file_name(self):
+        self.assertEqual(TableSchema.columnar_file_name('bureau.csv'), 'bureau.parquet')
+
+    def test_get_columnar_path(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            csv_path = os.path.join(files_path, 'bureau.csv')
+            columnar_path = os.path.join(files_path, 'bureau.parquet')
+
+            # No columnar copy
+            open(csv_path, 'w').close()
+            self.assertIsNone(TableSchema.get_columnar_path(files_path, 'bureau.csv'))
+
+            # Up to date columnar copy
+            open(columnar_path, 'w').close()
+            self.assertEqual(TableSchema.get_columnar_path(files_path, 'bureau.csv'), f"{files_path}/bureau.parquet")
+
+            # CSV updated after the conversion
+            later = time.time() + 10
+            os.utime(csv_path, (later, later))
+            self.assertIsNone(TableSchema.get_columnar_path(files_path, 'bureau.csv'))
+
+if __name__ == '__main__':
+    unittest.main()
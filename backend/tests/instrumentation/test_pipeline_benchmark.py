@@ -0,0 +1,33 @@
+import json
+import tempfile
+import unittest
+from backend.src.data_processing.read_data_abc import ReadDataABC
+from backend.src.instrumentation.pipeline_benchmark import PipelineBenchmark, compare_runs
+
+class TestPipelineBenchmark(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        # Arrange
+        benchmark = PipelineBenchmark(scales=[0.0005])
+        benchmark.PREDICTED_LOANS = 3
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Act
+            run_paths = benchmark.run(temp_dir) + benchmark.run(temp_dir)
+            with open(run_paths[0]) as f:
+                run_record = json.load(f)
+            comparison = compare_runs(*run_paths)
+
+        # Assert
+        self.assertEqual(len(set(run_paths)), 2)
+        self.assertEqual(run_record['scale'], 0.0005)
+        self.assertEqual(set(run_record['tables']), set(ReadDataABC.FILES_NAMES))
+        self.assertIn('pandas', run_record['environment'])
+        stages = {stage['stage'] for stage in run_record['stages']}
+        self.assertTrue({'load/download', 'load', 'retrieve_data/join', 'train/fit', 'evaluate', 'predict'} <= stages)
+        self.assertEqual(list(comparison.columns), ['wall_time_baseline', 'wall_time_candidate', 'ratio'])
+        self.assertFalse(comparison['ratio'].isna().any())
+        self.assertIn(('retrieve_data/aggregate', ReadDataABC.BUREAU_NAME), comparison.index)
+
+if __name__ == '__main__':
+    unittest.main()
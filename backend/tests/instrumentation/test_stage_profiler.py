@@ -0,0 +1,189 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from backend.src.instrumentation.stage_profiler import StageProfiler, get_peak_rss
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.tests.schema_tables import write_schema_tables
+
+class TestStageProfiler(unittest.TestCase):
+
+    def test_stage_records_nested_stages(self):
+        # Arrange
+        profiler = StageProfiler()
+
+        # Act
+        with profiler.stage('retrieve_data'):
+            with profiler.stage('aggregate', table='bureau.csv') as record:
+                profiler.record_data(record, pd.DataFrame({'A': [1, 2, 3], 'B': [4, 5, 6]}))
+
+        # Assert
+        stages = profiler.get_report()['stages']
+        self.assertEqual([stage['stage'] for stage in stages], ['retrieve_data/aggregate', 'retrieve_data'])
+        self.assertEqual(stages[0]['table'], 'bureau.csv')
+        self.assertEqual((stages[0]['rows'], stages[0]['columns']), (3, 2))
+        for stage in stages:
+            self.assertGreaterEqual(stage['wall_time'], 0)
+            self.assertGreaterEqual(stage['cpu_time'], 0)
+            self.assertGreaterEqual(stage['peak_rss_increase'], 0)
+
+    def test_stage_records_failed_stage(self):
+        # Arrange
+        profiler = StageProfiler()
+
+        # Act
+        with self.assertRaises(ValueError):
+            with profiler.stage('join'):
+                raise ValueError()
+
+        # Assert
+        self.assertEqual([stage['stage'] for stage in profiler.get_report()['stages']], ['join'])
+        self.assertEqual(profiler.get_stack(), [])
+
+    def test_stage_in_another_thread_records_its_parent(self):
+        # Arrange
+        profiler = StageProfiler()
+
+        # Act
+        with profiler.stage('load'):
+            parent = profiler.get_current_stage()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for table in ['bureau.csv', 'previous_application.csv']:
+                    executor.submit(self.run_nested_stages, profiler, parent, table).result()
+
+        # Assert
+        stages = [stage['stage'] for stage in profiler.get_report()['stages']]
+        self.assertEqual(stages, ['load/download/write', 'load/download'] * 2 + ['load'])
+        self.assertEqual(profiler.get_stack(), [])
+
+    @staticmethod
+    def run_nested_stages(profiler: StageProfiler, parent: str, table: str) -> None:
+        with profiler.stage('download', parent=parent, table=table):
+            with profiler.stage('write'):
+                pass
+        assert profiler.get_stack() == []
+
+    def test_trace_memory(self):
+        # Arrange
+        profiler = StageProfiler(trace_memory=True)
+
+        # Act
+        with profiler.stage('allocate'):
+            data = bytearray(10_000_000)
+
+        # Assert
+        self.assertGreaterEqual(profiler.get_report()['stages'][0]['traced_memory_peak'], len(data))
+
+    def test_trace_memory_of_nested_stages(self):
+        # Arrange
+        profiler = StageProfiler(trace_memory=True)
+
+        # Act
+        with profiler.stage('train'):
+            data = bytearray(10_000_000)
+            del data
+            with profiler.stage('fit'):
+                data = bytearray(1_000_000)
+
+        # Assert
+        report = {record['stage']: record for record in profiler.get_report()['stages']}
+        # The nested stage does not reset the peak of the stage it runs in
+        self.assertGreaterEqual(report['train']['traced_memory_peak'], 10_000_000)
+        self.assertLess(report['train/fit']['traced_memory_peak'], 10_000_000)
+        self.assertGreaterEqual(report['train/fit']['traced_memory_peak'], len(data))
+        self.assertEqual(profiler.get_traced_peaks(), [])
+
+    def test_add_records_of_a_copy(self):
+        # Arrange
+        profiler = StageProfiler()
+        worker_profiler = pickle.loads(pickle.dumps(profiler))
+        with worker_profiler.stage('aggregate', table='bureau.csv'):
+            pass
+
+        # Act
+        with profiler.stage('retrieve_data'):
+            profiler.add_records(worker_profiler.get_report()['stages'])
+
+        # Assert
+        self.assertEqual([stage['stage'] for stage in profiler.get_report()['stages']], ['retrieve_data/aggregate', 'retrieve_data'])
+
+    def test_reset(self):
+        # Arrange
+        profiler = StageProfiler()
+        with profiler.stage('load'):
+            pass
+
+        # Act
+        profiler.reset()
+
+        # Assert
+        self.assertEqual(profiler.get_report(), {'stages': []})
+
+    def test_get_peak_memory_of_a_run(self):
+        # Arrange
+        profiler = StageProfiler()
+        profiler.reset()
+        if not profiler.peak_rss_reset:
+            self.skipTest('The peak RSS cannot be reset on this platform')
+        allocation_size = 200 * 1024 ** 2
+
+        # Act
+        rss_before = get_peak_rss()
+        data = np.ones(allocation_size // 8)
+        del data
+        large_run_peak = profiler.get_peak_memory()
+
+        profiler.reset()
+        profiler.add_records([{'stage': 'aggregate', 'peak_rss': 1000}, {'stage': 'aggregate', 'peak_rss': 3000}])
+        small_run_peak = profiler.get_peak_memory()
+
+        # Assert
+        self.assertGreaterEqual(large_run_peak['peak_rss'] - rss_before, 0.9 * allocation_size)
+        self.assertIsNone(large_run_peak['peak_rss_workers'])
+        # The allocation of the previous run is not part of the peak of the next one
+        self.assertLess(small_run_peak['peak_rss'], large_run_peak['peak_rss'] - 0.9 * allocation_size)
+        self.assertEqual(small_run_peak['peak_rss_workers'], 3000)
+
+    def test_write_run_record(self):
+        # Arrange
+        profiler = StageProfiler()
+        with profiler.stage('load'):
+            pass
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Act
+            run_path = profiler.write_run_record(os.path.join(temp_dir, StageProfiler.RUNS_FOLDER), sampling_frequency=10)
+
+            # Assert
+            with open(run_path) as f:
+                run_record = json.load(f)
+        self.assertEqual(run_record['sampling_frequency'], 10)
+        self.assertEqual(run_record['stages'], profiler.get_report()['stages'])
+        self.assertIn('date', run_record)
+
+    def test_reader_records_stages_per_table(self):
+        for max_workers in [1, 2]:
+            # Arrange
+            profiler = StageProfiler()
+            reader = SimpleReadData(max_workers=max_workers, profiler=profiler)
+
+            with tempfile.TemporaryDirectory() as temp_dir:
+                write_schema_tables(temp_dir, nb_applications=20)
+
+                # Act
+                data = reader.write_data_for_model(temp_dir, 'data_for_model.parquet')
+
+            # Assert
+            stages = profiler.get_report()['stages']
+            aggregated_tables = {stage['table'] for stage in stages if stage['stage'] == 'retrieve_data/aggregate'}
+            self.assertEqual(aggregated_tables, set(reader.get_aggregation_methods()))
+            join = next(stage for stage in stages if stage['stage'] == 'retrieve_data/join')
+            self.assertEqual((join['rows'], join['columns']), data.shape)
+            self.assertIn('write_data_for_model', [stage['stage'] for stage in stages])
+
+if __name__ == '__main__':
+    unittest.main()
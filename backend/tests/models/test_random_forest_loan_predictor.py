@@ -151,6 +151,40 @@ class TestRandomForestLoanPredictor(unittest.TestCase):
         mock_fit.assert_called_with(test_df, self.predictor.y_train)
 
 
+    @patch('backend.src.models.random_forest_loan_predictor.RandomForestClassifier.fit')
+    def test_train_with_weights(self, mock_fit):
+        # Define loans sampled with a weight per loan
+        loans = pd.DataFrame({
+            'col1': np.arange(10) * 1.0,
+            'target': [1, 0] * 5,
+            'weight': [1.0, 4.0] * 5,
+        })
+        self.predictor.model.fit = mock_fit
+
+        # Call the method under test
+        self.predictor.train(loans, 'target', weight_column='weight')
+
+        # Assert that the weight is not a feature and that the model is fitted with the weights of the training loans
+        self.assertEqual(list(self.predictor.X_train.columns), ['col1'])
+        assert_series_equal(self.predictor.weights_train, loans.loc[self.predictor.X_train.index, 'weight'])
+        assert_series_equal(self.predictor.weights_test, loans.loc[self.predictor.X_test.index, 'weight'])
+        mock_fit.assert_called_once_with(self.predictor.X_train, self.predictor.y_train, sample_weight=self.predictor.weights_train)
+
+    @patch('backend.src.models.random_forest_loan_predictor.RandomForestClassifier.predict')
+    def test_evaluate_with_weights(self, mock_predict):
+        # Define test loans whose first one stands for 3 loans
+        self.predictor.X_test = pd.DataFrame({'col1': [1, 2, 3]})
+        self.predictor.y_test = pd.Series([1, 0, 0])
+        self.predictor.weights_test = pd.Series([3.0, 1.0, 1.0])
+        mock_predict.return_value = [0, 0, 0]
+        self.predictor.model.predict = mock_predict
+
+        # Call the method under test
+        result = self.predictor.evaluate()
+
+        # Assert that the accuracy is weighted
+        self.assertAlmostEqual(result, 2 / 5)
+
     @patch('backend.src.models.random_forest_loan_predictor.RandomForestClassifier.predict')
     @patch('backend.src.models.random_forest_loan_predictor.accuracy_score')
     def test_evaluate(self, mock_accuracy_score, mock_predict):
@@ -0,0 +1,122 @@
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+import numpy as np
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.models.sampling_planner import SamplingPlanner
+from backend.tests.schema_tables import write_schema_tables
+
+def make_probe(sampling_frequency: int, nb_applications: int = 100000, positive_rate: float = 0.08) -> dict:
+    """
+    Build the measures of a probe whose time, memory and error follow known curves.
+    """
+    rows = nb_applications / sampling_frequency
+    return {
+        'sampling_frequency': sampling_frequency,
+        'rows': int(rows),
+        'positive_rows': int(rows * positive_rate),
+        'time': 2.0 + 0.001 * rows,
+        'memory': 1000 + 500 * rows,
+        'accuracy': 1 - 0.5 * rows ** -0.25,
+    }
+
+class TestSamplingPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = SamplingPlanner(SimpleReadData(), probe_frequencies=[64, 32, 16])
+
+    def test_fit_linear(self):
+        # Arrange
+        rows = np.array([100.0, 200.0, 400.0])
+
+        # Act
+        line = SamplingPlanner.fit_linear(rows, 3 + 0.5 * rows)
+        decreasing_line = SamplingPlanner.fit_linear(rows, np.array([5.0, 4.0, 3.0]))
+
+        # Assert
+        np.testing.assert_allclose(line, (3.0, 0.5))
+        self.assertEqual(decreasing_line, (4.0, 0.0))
+
+    def test_fit_learning_curve(self):
+        # Arrange
+        rows = np.array([100.0, 200.0, 400.0])
+
+        # Act
+        curve = SamplingPlanner.fit_learning_curve(rows, 1 - 0.5 * rows ** -0.25)
+
+        # Assert
+        np.testing.assert_allclose(curve, (0.5, 0.25))
+        self.assertIsNone(SamplingPlanner.fit_learning_curve(rows, [0.9, None, 0.95]))
+
+    def test_plan_chooses_the_largest_sample_within_the_budget(self):
+        with patch.object(self.planner, 'probe', side_effect=lambda files_path, target, frequency, positive: make_probe(frequency)), \
+                patch('backend.src.models.sampling_planner.time.perf_counter', side_effect=[0.0, 10.0]):
+            # Act
+            time_plan = self.planner.plan('data', 'TARGET', time_budget=10.0 + 2.0 + 0.001 * 100000 / 4)
+
+        with patch.object(self.planner, 'probe', side_effect=lambda files_path, target, frequency, positive: make_probe(frequency)):
+            memory_plan = self.planner.plan('data', 'TARGET', memory_budget=1000 + 500 * 100000 / 8)
+            unlimited_plan = self.planner.plan('data', 'TARGET', memory_budget=10 ** 12)
+            impossible_plan = self.planner.plan('data', 'TARGET', memory_budget=10)
+
+        # Assert
+        self.assertEqual(time_plan['sampling_frequency'], 4)
+        self.assertTrue(time_plan['fits_budget'])
+        self.assertAlmostEqual(time_plan['expected_time'], 2.0 + 0.001 * 100000 / 4, delta=0.1)
+        self.assertEqual(len(time_plan['probes']), 3)
+        self.assertEqual(memory_plan['sampling_frequency'], 8)
+        self.assertEqual(unlimited_plan['sampling_frequency'], 1)
+        self.assertAlmostEqual(unlimited_plan['expected_accuracy'], 1 - 0.5 * 100000 ** -0.25, delta=1e-3)
+        self.assertEqual(impossible_plan['sampling_frequency'], 64)
+        self.assertFalse(impossible_plan['fits_budget'])
+
+    def test_plan_keeps_the_positive_sampling_frequency(self):
+        with patch.object(self.planner, 'probe', side_effect=lambda files_path, target, frequency, positive: make_probe(frequency)):
+            # Act
+            plan = self.planner.plan('data', 'TARGET', memory_budget=10 ** 12, positive_sampling_frequency=1)
+
+        # Assert
+        self.assertEqual(plan['positive_sampling_frequency'], 1)
+        self.assertGreater(plan['expected_rows'], 0)
+
+    def test_plan_needs_a_budget(self):
+        with self.assertRaises(ValueError):
+            self.planner.plan('data', 'TARGET')
+        with self.assertRaises(ValueError):
+            SamplingPlanner(SimpleReadData(), probe_frequencies=[8])
+        with tempfile.TemporaryDirectory() as feature_store_path, self.assertRaises(ValueError):
+            SamplingPlanner(SimpleReadData(feature_store_path=feature_store_path))
+
+    def test_probe(self):
+        with tempfile.TemporaryDirectory() as files_path:
+            # Arrange
+            write_schema_tables(files_path, nb_applications=100)
+            planner = SamplingPlanner(SimpleReadData(max_workers=2), probe_frequencies=[4, 2])
+
+            tracing = []
+            run_probe = planner.run_probe
+            def traced_run_probe(*args):
+                tracing.append(tracemalloc.is_tracing())
+                return run_probe(*args)
+
+            # Act
+            with patch.object(planner, 'run_probe', side_effect=traced_run_probe):
+                probe = planner.probe(files_path, 'TARGET', 2, positive_sampling_frequency=1)
+                peak_memory = planner.reader.profiler.get_peak_memory()
+                with patch('backend.src.instrumentation.stage_profiler.reset_peak_rss', return_value=False):
+                    traced_probe = planner.probe(files_path, 'TARGET', 2, positive_sampling_frequency=1)
+
+            # Assert
+            # The memory is the peak RSS of the process and of the workers, traced in a second run where it can not be reset
+            self.assertEqual(tracing, [False, False, True])
+            self.assertFalse(tracemalloc.is_tracing())
+            self.assertEqual(probe['sampling_frequency'], 2)
+            self.assertTrue(0 < probe['positive_rows'] < probe['rows'] < 100)
+            self.assertGreater(probe['time'], 0)
+            self.assertTrue(0 < traced_probe['memory'] < probe['memory'])
+            self.assertEqual(probe['memory'], peak_memory['peak_rss'] + 2 * peak_memory['peak_rss_workers'])
+            self.assertTrue(0 <= probe['accuracy'] <= 1)
+
+if __name__ == '__main__':
+    unittest.main()
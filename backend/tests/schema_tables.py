@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pandas as pd
+from backend.src.data_processing.simple_read_data import SimpleReadData
+from backend.src.data_processing.table_schema import TableSchema
+
+def write_schema_tables(files_path: str, nb_applications: int = 20, seed: int = 0) -> None:
+    """
+    Write small random versions of the tables described in shared_config/columns_info.json.
+    """
+    rng = np.random.default_rng(seed)
+    schema = TableSchema()
+    ids = np.arange(100000, 100000 + nb_applications)
+    bureau_ids = np.arange(500000, 500000 + nb_applications * 3)
+
+    for file_name in SimpleReadData.FILES_NAMES:
+        nb_rows = nb_applications if file_name.startswith('application') else nb_applications * 3
+        table = {}
+        for column in schema.get_columns(file_name):
+            name, dtype, values = column['fieldname'], column['type'], column['values']
+            if name == 'SK_ID_CURR':
+                table[name] = ids if nb_rows == nb_applications else rng.choice(ids, nb_rows)
+            elif name == 'SK_ID_BUREAU':
+                # bureau_balance has several months of most of the bureau credits
+                table[name] = bureau_ids if file_name == 'bureau.csv' else rng.choice(bureau_ids, nb_rows)
+            elif values:
+                table[name] = rng.choice(values, nb_rows)
+            elif dtype == 'object':
+                table[name] = rng.choice(['A', 'B', 'C'], nb_rows)
+            elif dtype.startswith('int'):
+                table[name] = rng.integers(-100, 100, nb_rows)
+            else:
+                table[name] = np.where(rng.random(nb_rows) < 0.1, np.nan, rng.normal(0, 100, nb_rows))
+        pd.DataFrame(table).to_csv(os.path.join(files_path, file_name), index=False)
@@ -72,12 +72,15 @@ def get_numerical_columns(columns_info: dict) -> dict:
     return numerical_columns 
 
 # Main function
-def _main(FREQUENCY : int):
+def _main(FREQUENCY : int, TIME_BUDGET : float = None, MEMORY_BUDGET : int = None):
     """
     This function is the entry point of the loan scoring application.
     
     Parameters:
     FREQUENCY (int): The frequency at which to sample the training data. Should not be modiefied.
+    TIME_BUDGET (float): If set, the training time in seconds the sampling frequency is chosen for, instead of FREQUENCY.
+    MEMORY_BUDGET (int): If set, the training memory in bytes the sampling frequency is chosen for, instead of FREQUENCY.
+        The tables are aggregated within it too, spilling to disk when needed.
     
     Returns:
     None
@@ -90,12 +93,23 @@ def _main(FREQUENCY : int):
             "target_variable": "TARGET",
             "concat": "True"
         }
+        if TIME_BUDGET is not None or MEMORY_BUDGET is not None:
+            # The backend chooses the largest sample that fits the budget
+            data["sampling_frequency"] = None
+            data["time_budget"] = TIME_BUDGET
+            data["memory_budget"] = MEMORY_BUDGET
 
         response = requests.post(TRAIN_URL, json=data)
         if(response.status_code != 200):
             raise Exception(f"An error occurred while training the model: {response.json()['message']}")
         
         logging.info(f"Model trained successfully: {response.json()['message']}")
+        if response.json().get('sampling_plan') is not None:
+            sampling_plan = response.json()['sampling_plan']
+            logging.info(f"Sampling frequency {sampling_plan['sampling_frequency']} chosen for the budget: "
+                         f"expected time {sampling_plan['expected_time']:.1f} s, expected accuracy {sampling_plan['expected_accuracy']}")
+        if response.json().get('peak_memory') is not None:
+            logging.info(f"Peak RSS of the training: {response.json()['peak_memory']['peak_rss']} bytes")
 
         # Evaluate the model
         response = requests.get(EVALUATE_URL)
@@ -154,17 +168,21 @@ if __name__ == "__main__":
         # Parse command line arguments
         parser = argparse.ArgumentParser(description="Loan prediction application")
         parser.add_argument('--frequency', type=int, default=10, help='The sampling frequency for the data. If set to 10, every 10th line from the CSV files will be used.')        
+        parser.add_argument('--time-budget', type=float, default=None, help='If set, the training time in seconds. The sampling frequency is chosen to fit it instead of --frequency.')
+        parser.add_argument('--memory-budget', type=int, default=None, help='If set, the training memory in bytes. The sampling frequency is chosen to fit it instead of --frequency.')
         args = parser.parse_args()
 
         # Validate command line arguments
         if args.frequency <= 0:
             raise argparse.ArgumentTypeError("Frequency must be a positive integer.")
+        if (args.time_budget is not None and args.time_budget <= 0) or (args.memory_budget is not None and args.memory_budget <= 0):
+            raise argparse.ArgumentTypeError("Budgets must be positive.")
         
         # Extract the frequency and download path from command line arguments
         FREQUENCY = args.frequency if args.frequency else DEFAULT_FREQUENCY
 
         # Call the main function
-        _main(FREQUENCY)
+        _main(FREQUENCY, args.time_budget, args.memory_budget)
 
     except argparse.ArgumentError as e:
         logging.error(f"Invalid command line argument: {str(e)}")